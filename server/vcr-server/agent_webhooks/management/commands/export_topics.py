@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.v2.serializers.export import (
+    EXPORT_CHUNK_SIZE,
+    TopicExporter,
+    export_watermark,
+    parse_since,
+)
+
+
+class Command(BaseCommand):
+    help = "Exports topics with their active credentials as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-format", choices=("ndjson", "csv"), default="ndjson"
+        )
+        parser.add_argument(
+            "--since",
+            help="Only export topics updated after this ISO 8601 timestamp",
+        )
+        parser.add_argument(
+            "--file", help="File to write the export to (default: stdout)"
+        )
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        if since:
+            try:
+                since = parse_since(since)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        export_timestamp = export_watermark()
+        exporter = TopicExporter(since=since, chunk_size=options["chunk_size"])
+        lines = getattr(exporter, options["output_format"])()
+        if options["file"]:
+            with open(options["file"], "w", newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
+
+        # the timestamp to export the next delta from, which overlaps this export
+        self.stderr.write("Export timestamp: {}".format(export_timestamp.isoformat()))
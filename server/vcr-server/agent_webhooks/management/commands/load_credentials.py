@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from agent_webhooks.utils.credential import Credential, CredentialManager
+from vcr_server.utils.solrqueue import create_solr_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads decoded credentials from JSON files into the search database "
+        "using batched writes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            type=str,
+            help="JSON files holding a credential or a list of credentials, each "
+            "with thread_id, schema_id, cred_def_id, rev_reg_id and attrs",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of credentials written per transaction",
+        )
+
+    def handle(self, *args, **options):
+        queue = create_solr_queue()
+        with queue:
+            self.load(*args, **options)
+
+    def load(self, *args, **options):
+        batch_size = options["batch_size"]
+        mgr = CredentialManager()
+        loaded = failed = 0
+
+        batch = []
+        for credential in self.read_credentials(options["paths"]):
+            batch.append(credential)
+            if len(batch) >= batch_size:
+                ok, err = self.load_batch(mgr, batch)
+                loaded, failed = loaded + ok, failed + err
+                batch = []
+        if batch:
+            ok, err = self.load_batch(mgr, batch)
+            loaded, failed = loaded + ok, failed + err
+
+        self.stdout.write("Loaded {} credentials, {} failed".format(loaded, failed))
+
+    def read_credentials(self, paths):
+        for path in paths:
+            with open(path) as cred_file:
+                cred_list = json.load(cred_file)
+            if type(cred_list) is not list:
+                cred_list = [cred_list]
+            for cred_data in cred_list:
+                yield Credential(cred_data)
+
+    def load_batch(self, mgr, batch):
+        loaded = failed = 0
+        for result in mgr.process_batch(batch):
+            if result.success:
+                loaded += 1
+            else:
+                failed += 1
+                self.stderr.write(
+                    "Failed credential {}: {}".format(
+                        result.credential.thread_id, result.error
+                    )
+                )
+        self.stdout.write("Processed batch of {} credentials".format(len(batch)))
+        return loaded, failed
@@ -0,0 +1,102 @@
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from agent_webhooks.utils.ingest import (
+    CREDENTIAL_QUEUE_PARTITIONS,
+    CredentialQueueWorker,
+)
+from vcr_server.utils.solrqueue import create_solr_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes credentials queued by the agent webhooks when "
+        "PROCESS_CREDENTIALS_ASYNC is enabled"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker threads, each one draining its own partitions",
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            nargs="+",
+            help="Partitions processed by this command, to share the queue between "
+            "processes (default: all {})".format(CREDENTIAL_QUEUE_PARTITIONS),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of credentials claimed and written per batch",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for credentials",
+        )
+
+    def handle(self, *args, **options):
+        queue = create_solr_queue()
+        with queue:
+            self.process(*args, **options)
+
+    def process(self, *args, **options):
+        partitions = options["partitions"]
+        if partitions is None:
+            partitions = list(range(CREDENTIAL_QUEUE_PARTITIONS))
+        workers = max(1, min(options["workers"], len(partitions)))
+        if workers < options["workers"]:
+            self.stderr.write(
+                "Only {} partitions to process, starting {} workers".format(
+                    len(partitions), workers
+                )
+            )
+
+        stop_event = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self.run_worker,
+                args=(stop_event, partitions[idx::workers], options),
+                name="credential-queue-{}".format(idx),
+                daemon=True,
+            )
+            for idx in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write("Started {} credential queue workers".format(len(threads)))
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1.0)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping credential queue workers")
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+
+    def run_worker(self, stop_event, partitions, options):
+        worker = CredentialQueueWorker(
+            batch_size=options["batch_size"], partitions=partitions
+        )
+        try:
+            worker.run(
+                stop_event,
+                poll_interval=options["poll_interval"],
+                once=options["once"],
+            )
+        finally:
+            connection.close()
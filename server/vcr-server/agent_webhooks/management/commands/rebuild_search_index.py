@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from vcr_server.utils.solrrebuild import (
+    SOLR_REBUILD_CHUNK_SIZE,
+    SOLR_REBUILD_MAX_RETRIES,
+    SOLR_REBUILD_POSTERS,
+    SOLR_REBUILD_PRODUCERS,
+    SolrRebuild,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the search index with parallel document producers and "
+        "concurrent Solr posters"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Model labels to index, such as api_v2.Topic (default: all)",
+        )
+        parser.add_argument(
+            "--producers",
+            type=int,
+            default=SOLR_REBUILD_PRODUCERS,
+            help="Number of processes preparing documents",
+        )
+        parser.add_argument(
+            "--posters",
+            type=int,
+            default=SOLR_REBUILD_POSTERS,
+            help="Number of threads posting documents to Solr",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=SOLR_REBUILD_CHUNK_SIZE,
+            help="Number of row ids prepared and posted per batch",
+        )
+        parser.add_argument(
+            "--max-retries",
+            type=int,
+            default=SOLR_REBUILD_MAX_RETRIES,
+            help="Number of times a failed batch is posted again",
+        )
+        parser.add_argument(
+            "--target-core",
+            help="Build into this core, cleared first, instead of the live core",
+        )
+        parser.add_argument(
+            "--swap",
+            action="store_true",
+            help="Swap the target core with the live core once it is built",
+        )
+        parser.add_argument(
+            "--alias",
+            help="Point this SolrCloud alias at the target collection once it is built",
+        )
+
+    def handle(self, *args, **options):
+        target_core = options["target_core"]
+        if (options["swap"] or options["alias"]) and not target_core:
+            raise CommandError("--swap and --alias require a --target-core")
+
+        rebuild = SolrRebuild(
+            chunk_size=options["chunk_size"],
+            producers=options["producers"],
+            posters=options["posters"],
+            max_retries=options["max_retries"],
+            target_core=target_core,
+            stdout=self.stdout,
+        )
+        rebuild.run(options["models"])
+        if options["swap"]:
+            rebuild.swap()
+        if options["alias"]:
+            rebuild.create_alias(options["alias"])
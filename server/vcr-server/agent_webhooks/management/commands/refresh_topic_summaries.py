@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.v2.models.Topic import Topic
+from api.v2.models.TopicSummary import TopicSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the search summaries of all topics"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of topics summarised per transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        topic_count = Topic.objects.count()
+        self.stdout.write("Refreshing {} topic summaries".format(topic_count))
+
+        done = 0
+        batch = []
+        for topic_id in Topic.objects.order_by("id").values_list("id", flat=True).iterator():
+            batch.append(topic_id)
+            if len(batch) >= batch_size:
+                TopicSummary.refresh(batch)
+                done += len(batch)
+                batch = []
+                self.stdout.write("Refreshed {} of {}".format(done, topic_count))
+        if batch:
+            TopicSummary.refresh(batch)
+            done += len(batch)
+            self.stdout.write("Refreshed {} of {}".format(done, topic_count))
@@ -1,40 +1,216 @@
-from django.core.management.base import BaseCommand
-from django.db import DEFAULT_DB_ALIAS
-from django.db.models import signals
+import logging
+import multiprocessing
 
-from api.v2.models.Credential import Credential
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from agent_webhooks.models import ReprocessCheckpoint
 from agent_webhooks.utils.credential import CredentialManager
-from vcr_server.utils.solrqueue import SolrQueue
+from api.v2.models.Credential import Credential
+from api.v2.models.Topic import Topic
+from api.v2.models.TopicSummary import TopicSummary
+
+LOGGER = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
     help = "Reprocesses all credentials to populate search database"
 
-    def handle(self, *args, **options):
-        queue = SolrQueue()
-        with queue:
-            self.reprocess(queue, *args, **options)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, each one reprocessing a range of "
+            "credential ids",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of credentials reprocessed per transaction",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Resume the previous run from its checkpoints; the worker "
+            "ranges of that run are kept",
+        )
+        parser.add_argument(
+            "--no-reindex",
+            action="store_true",
+            help="Skip the search index update once all credentials are reprocessed",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of documents sent to Solr per batch when reindexing",
+        )
 
-    def reprocess(self, queue, *args, **options):
+    def handle(self, *args, **options):
         self.stdout.write("Starting...")
 
-        cred_count = Credential.objects.count()
-        self.stdout.write("Reprocessing {} credentials".format(cred_count))
+        if options["resume"]:
+            checkpoints = list(ReprocessCheckpoint.objects.all())
+            if not checkpoints:
+                raise CommandError("There is no previous run to resume")
+            self.stdout.write(
+                "Resuming {} workers from their checkpoints".format(len(checkpoints))
+            )
+        else:
+            checkpoints = self.create_checkpoints(max(1, options["workers"]))
+        started = min(checkpoint.create_timestamp for checkpoint in checkpoints)
 
-        current_cred = 0
-        mgr = CredentialManager()
-        for credential in Credential.objects.all().iterator():
-            current_cred += 1
+        # index updates are deferred to a single pass over the updated rows
+        apps.get_app_config("haystack").signal_processor.teardown()
+
+        pending = [checkpoint.worker for checkpoint in checkpoints if not checkpoint.completed]
+        if len(pending) > 1:
+            self.run_processes(pending, options["chunk_size"])
+        elif pending:
+            self.reprocess_range(pending[0], options["chunk_size"])
+
+        incomplete = ReprocessCheckpoint.objects.filter(completed=False).count()
+        if incomplete:
+            raise CommandError(
+                "{} workers did not complete, rerun with --resume".format(incomplete)
+            )
+        for checkpoint in ReprocessCheckpoint.objects.all():
             self.stdout.write(
-                "Processing credential id: {} ({} of {})".format(
-                    credential.id, current_cred, cred_count
+                "Worker {}: {} credentials reprocessed, {} failed".format(
+                    checkpoint.worker, checkpoint.processed, checkpoint.failed
+                )
+            )
+
+        if not options["no_reindex"]:
+            self.stdout.write(
+                "Updating the search index from {}".format(started.isoformat())
+            )
+            call_command(
+                "update_index",
+                start_date=started.isoformat(),
+                remove=True,
+                workers=options["workers"] if options["workers"] > 1 else 0,
+                batchsize=options["batch_size"],
+                max_retries=5,
+            )
+
+    def create_checkpoints(self, workers):
+        """
+        Split the credential ids into one contiguous range per worker
+        """
+        bounds = Credential.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+        ReprocessCheckpoint.objects.all().delete()
+        if bounds["min_id"] is None:
+            return [
+                ReprocessCheckpoint.objects.create(
+                    worker=0, start_id=0, end_id=0, last_id=0, completed=True
+                )
+            ]
+
+        first_id = bounds["min_id"] - 1
+        span = bounds["max_id"] - first_id
+        workers = min(workers, span)
+        self.stdout.write(
+            "Reprocessing credentials {} to {} with {} workers".format(
+                bounds["min_id"], bounds["max_id"], workers
+            )
+        )
+        checkpoints = []
+        for worker in range(workers):
+            start_id = first_id + span * worker // workers
+            end_id = first_id + span * (worker + 1) // workers
+            checkpoints.append(
+                ReprocessCheckpoint(
+                    worker=worker, start_id=start_id, end_id=end_id, last_id=start_id
+                )
+            )
+        ReprocessCheckpoint.objects.bulk_create(checkpoints)
+        return list(ReprocessCheckpoint.objects.all())
+
+    def run_processes(self, workers, chunk_size):
+        # each process opens its own database connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(
+                target=self.run_process,
+                args=(worker, chunk_size),
+                name="reprocess-{}".format(worker),
+            )
+            for worker in workers
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            if process.exitcode:
+                self.stderr.write(
+                    "Process {} exited with code {}".format(
+                        process.name, process.exitcode
+                    )
+                )
+
+    def run_process(self, worker, chunk_size):
+        try:
+            self.reprocess_range(worker, chunk_size)
+        finally:
+            connections.close_all()
+
+    def reprocess_range(self, worker, chunk_size):
+        checkpoint = ReprocessCheckpoint.objects.get(worker=worker)
+        mgr = CredentialManager()
+        while True:
+            ids = list(
+                Credential.objects.filter(
+                    id__gt=checkpoint.last_id, id__lte=checkpoint.end_id
                 )
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
             )
+            if not ids:
+                break
+
+            failed = 0
+            with transaction.atomic():
+                credentials = list(
+                    Credential.objects.filter(id__in=ids)
+                    .select_related("credential_set")
+                    .prefetch_related("claims")
+                    .order_by("id")
+                )
+                for credential in credentials:
+                    try:
+                        # each credential is reprocessed in its own savepoint
+                        mgr.reprocess(credential, refresh_summary=False)
+                    except Exception:
+                        LOGGER.exception(
+                            "Error reprocessing credential id: %s", credential.id
+                        )
+                        failed += 1
 
-            # Remove and recreate search records
-            mgr.reprocess(credential)
+                topic_ids = {credential.topic_id for credential in credentials}
+                TopicSummary.refresh(topic_ids)
+                # picked up by the update of the search index at the end
+                now = timezone.now()
+                Credential.objects.filter(id__in=ids).update(update_timestamp=now)
+                Topic.objects.filter(id__in=topic_ids).update(update_timestamp=now)
 
-            # Now reindex
-            signals.post_save.send(
-                sender=Credential, instance=credential, using=DEFAULT_DB_ALIAS
+                checkpoint.last_id = ids[-1]
+                checkpoint.processed += len(credentials) - failed
+                checkpoint.failed += failed
+                checkpoint.save()
+
+            self.stdout.write(
+                "Worker {}: reprocessed up to credential id {} of {}".format(
+                    worker, checkpoint.last_id, checkpoint.end_id
+                )
             )
+
+        checkpoint.completed = True
+        checkpoint.save()
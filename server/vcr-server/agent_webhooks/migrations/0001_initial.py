@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:05
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingCredential',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_timestamp', models.DateTimeField(auto_now=True, null=True)),
+                ('cred_ex_id', models.TextField(unique=True)),
+                ('version', models.TextField(null=True)),
+                ('credential_data', django.contrib.postgres.fields.jsonb.JSONField()),
+                ('claimed_at', models.DateTimeField(null=True)),
+                ('attempts', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'pending_credential',
+                'ordering': ('id',),
+            },
+        ),
+    ]
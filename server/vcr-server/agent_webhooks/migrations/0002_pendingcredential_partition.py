@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent_webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingcredential',
+            name='partition',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='pendingcredential',
+            index=models.Index(fields=['partition', 'id'], name='pending_cred_partition_idx'),
+        ),
+    ]
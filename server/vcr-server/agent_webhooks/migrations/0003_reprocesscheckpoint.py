@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent_webhooks', '0002_pendingcredential_partition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReprocessCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_timestamp', models.DateTimeField(auto_now=True, null=True)),
+                ('worker', models.IntegerField(unique=True)),
+                ('start_id', models.IntegerField()),
+                ('end_id', models.IntegerField()),
+                ('last_id', models.IntegerField()),
+                ('processed', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+            ],
+            options={
+                'db_table': 'reprocess_checkpoint',
+                'ordering': ('worker',),
+            },
+        ),
+    ]
@@ -1,3 +1,48 @@
+from django.contrib.postgres import fields as contrib
 from django.db import models
 
-# Create your models here.
+from api.v2.models.Auditable import Auditable
+
+
+class PendingCredential(Auditable):
+    """
+    A received credential waiting to be processed by the credential queue
+    workers, when inbound credentials are processed asynchronously
+    """
+
+    cred_ex_id = models.TextField(unique=True)
+    # issue-credential protocol version, None for 1.0
+    version = models.TextField(null=True)
+    credential_data = contrib.JSONField()
+    # hash of the expected topic, so each topic is processed by a single worker
+    partition = models.IntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True)
+    attempts = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "pending_credential"
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=["partition", "id"], name="pending_cred_partition_idx"),
+        ]
+
+
+class ReprocessCheckpoint(Auditable):
+    """
+    Progress of a reprocess_credentials worker through its range of credential
+    ids, so that an interrupted reprocess can be resumed
+    """
+
+    worker = models.IntegerField(unique=True)
+    # credential ids in (start_id, end_id] are reprocessed by the worker
+    start_id = models.IntegerField()
+    end_id = models.IntegerField()
+    # last credential id of the last committed chunk
+    last_id = models.IntegerField()
+    processed = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "reprocess_checkpoint"
+        ordering = ("worker",)
@@ -0,0 +1,89 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from agent_webhooks.models import ReprocessCheckpoint
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialType import CredentialType
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Schema import Schema
+from api.v2.models.Topic import Topic
+
+COMMAND = "agent_webhooks.management.commands.reprocess_credentials"
+
+
+@patch(COMMAND + ".TopicSummary")
+@patch(COMMAND + ".CredentialManager.reprocess", autospec=True)
+class ReprocessCredentials_TestCase(TestCase):
+    def setUp(self):
+        schema = Schema.objects.create(
+            name="registration", version="1.0.0", origin_did="not:a:did:123"
+        )
+        issuer = Issuer.objects.create(
+            did="not:a:did:123",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        cred_type = CredentialType.objects.create(
+            schema=schema, issuer=issuer, description="registration"
+        )
+        topic = Topic.objects.create(source_id="BC0001", type="registration")
+        self.cred_ids = [
+            Credential.objects.create(
+                topic=topic, credential_type=cred_type, credential_id="cred-{}".format(idx)
+            ).id
+            for idx in range(5)
+        ]
+
+    def reprocess(self, *args):
+        call_command(
+            "reprocess_credentials", "--no-reindex", *args, stdout=StringIO()
+        )
+
+    @staticmethod
+    def reprocessed_ids(mock_reprocess):
+        return [call[0][1].id for call in mock_reprocess.call_args_list]
+
+    def test_reprocess_in_chunks(self, mock_reprocess, mock_summary):
+        mock_reprocess.side_effect = [None, Exception("bad credential"), None, None, None]
+        self.reprocess("--chunk-size=2")
+
+        assert self.reprocessed_ids(mock_reprocess) == self.cred_ids
+        assert mock_summary.refresh.call_count == 3
+        (checkpoint,) = ReprocessCheckpoint.objects.all()
+        assert checkpoint.completed
+        assert checkpoint.last_id == self.cred_ids[-1]
+        assert (checkpoint.processed, checkpoint.failed) == (4, 1)
+
+    def test_worker_ranges(self, mock_reprocess, mock_summary):
+        with patch(COMMAND + ".Command.run_processes") as mock_run:
+            with self.assertRaises(CommandError):
+                self.reprocess("--workers=2")
+        mock_run.assert_called_once_with([0, 1], 500)
+
+        first, second = ReprocessCheckpoint.objects.all()
+        assert first.start_id == self.cred_ids[0] - 1
+        assert first.end_id == second.start_id
+        assert second.end_id == self.cred_ids[-1]
+
+    def test_resume(self, mock_reprocess, mock_summary):
+        with self.assertRaises(CommandError):
+            self.reprocess("--resume")
+
+        ReprocessCheckpoint.objects.create(
+            worker=0,
+            start_id=self.cred_ids[0] - 1,
+            end_id=self.cred_ids[-1],
+            last_id=self.cred_ids[2],
+            processed=3,
+        )
+        self.reprocess("--resume")
+
+        assert self.reprocessed_ids(mock_reprocess) == self.cred_ids[3:]
+        checkpoint = ReprocessCheckpoint.objects.get()
+        assert checkpoint.completed
+        assert checkpoint.processed == 5
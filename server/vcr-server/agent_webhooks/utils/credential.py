@@ -11,7 +11,8 @@ from importlib import import_module
 import os
 
 from django.core.exceptions import ValidationError
-from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import signals
 from django.db.utils import IntegrityError
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
@@ -24,10 +25,12 @@ from api.v2.models.Credential import Credential as CredentialModel
 from api.v2.models.CredentialSet import CredentialSet
 from api.v2.models.CredentialType import CredentialType
 from api.v2.models.Issuer import Issuer
-from api.v2.models.Name import Name
+from api.v2.models.Name import Name, name_key
 from api.v2.models.Schema import Schema
 from api.v2.models.Topic import Topic
 from api.v2.models.TopicRelationship import TopicRelationship
+from api.v2.models.TopicSummary import TopicSummary
+from api.v2.signals import mark_dirty
 
 LOGGER = logging.getLogger(__name__)
 
@@ -58,6 +61,9 @@ else:
     print(">>> NO not creating detail claims for credentials")
     CREATE_CREDENTIAL_CLAIMS = False
 
+# max number of rows to send in a single bulk INSERT statement
+CREDENTIAL_BULK_INSERT_SIZE = int(os.environ.get("CREDENTIAL_BULK_INSERT_SIZE", "1000"))
+
 
 def schema_key(s_id: str) -> SchemaKey:
     """
@@ -227,6 +233,26 @@ class Credential(object):
         return self._request_metadata
 
 
+class CredentialProcessResult:
+    """Outcome of processing a single credential as part of a batch."""
+
+    def __init__(
+        self,
+        credential: Credential,
+        db_credential: CredentialModel = None,
+        error: Exception = None,
+    ):
+        """Initialize the credential process result instance."""
+        self.credential = credential
+        self.db_credential = db_credential
+        self.error = error
+
+    @property
+    def success(self) -> bool:
+        """Whether the credential was written to the application database."""
+        return self.error is None and self.db_credential is not None
+
+
 class CredentialClaims:
     def __init__(self, cred: CredentialModel):
         self._cred = cred
@@ -252,104 +278,186 @@ class CredentialClaims:
             )
 
 
-class CredentialManager(object):
+def resolve_processor_function(function_path_with_name: str):
     """
-    Handles processing of incoming credentials. Populates application
-    database based on rules provided by issuer are registration.
+    Resolve a processor function by dot notation. Last token is the
+    function name and all preceeding dots denote path of module
+    starting from `PROCESSOR_FUNCTION_BASE_PATH`
     """
+    function_path, function_name = function_path_with_name.rsplit(".", 1)
 
-    def __init__(self) -> None:
-        self._cred_type_cache = {}
+    # Does the file exist?
+    try:
+        function_module = import_module(
+            "{}.{}".format(PROCESSOR_FUNCTION_BASE_PATH, function_path)
+        )
+    except ModuleNotFoundError:
+        raise CredentialException(
+            "No processor module named '{}'".format(function_path)
+        )
 
-    @classmethod
-    def get_claims(cls, credential):
-        if isinstance(credential, Credential):
-            return credential
-        elif isinstance(credential, CredentialModel):
-            return CredentialClaims(credential)
+    # Does the function exist?
+    try:
+        return getattr(function_module, function_name)
+    except AttributeError:
+        raise CredentialException(
+            "Module '{}' has no function '{}'.".format(function_path, function_name)
+        )
 
-    @classmethod
-    def process_mapping(cls, rules, credential):
-        """
-        Takes our mapping rules and returns a value from credential
-        """
-        if not rules:
-            return None
 
-        # Get required values from config
-        try:
-            _input = rules["input"]
-            _from = rules["from"]
-        except KeyError:
-            raise CredentialException(
-                "Every mapping must specify 'input' and 'from' values."
-            )
+def _unmapped(credential):
+    return None
+
+
+def compile_mapping(rules):
+    """
+    Compile mapping rules into a function returning the mapped value
+    for a credential
+    """
+    if not rules:
+        return _unmapped
+
+    # Get required values from config
+    try:
+        _input = rules["input"]
+        _from = rules["from"]
+    except KeyError:
+        raise CredentialException(
+            "Every mapping must specify 'input' and 'from' values."
+        )
 
-        # Processor is optional
-        processor = rules.get("processor")
+    if _from not in ("value", "claim"):
+        raise CredentialException(
+            "Supported field from values are 'value' and 'claim'"
+            + " but received '{}'".format(_from)
+        )
 
-        claims = cls.get_claims(credential)
+    # Processor is optional. If we have a processor config, build the
+    # pipeline of functions to run the field value through, in order
+    pipeline = tuple(
+        resolve_processor_function(function_path_with_name)
+        for function_path_with_name in rules.get("processor") or ()
+    )
 
+    def extract(credential):
         # Get model field value from string literal or claim value
         if _from == "value":
             mapped_value = _input
-        elif _from == "claim":
+        else:
             try:
-                mapped_value = getattr(claims, _input)
+                mapped_value = getattr(CredentialManager.get_claims(credential), _input)
             except AttributeError:
                 raise CredentialException(
                     "Credential does not contain the configured claim '{}'".format(
                         _input
                     )
                 )
-        else:
-            raise CredentialException(
-                "Supported field from values are 'value' and 'claim'"
-                + " but received '{}'".format(_from)
+        for function in pipeline:
+            mapped_value = function(mapped_value)
+        return mapped_value
+
+    return extract
+
+
+class ProcessorConfig:
+    """
+    A credential type processor config with its mapping rules compiled
+    into topic selectors and field extractors
+    """
+
+    TOPIC_FIELDS = (
+        "related_name",
+        "related_source_id",
+        "related_type",
+        "name",
+        "source_id",
+        "type",
+    )
+    CREDENTIAL_FIELDS = ("effective_date", "revoked_date", "inactive")
+
+    def __init__(self, config: dict):
+        """Initialize the processor config instance."""
+        config = config or {}
+
+        topic_defs = config.get("topic") or []
+        # We accept object or array for topic def
+        if type(topic_defs) is dict:
+            topic_defs = [topic_defs]
+        self.topic_selectors = [
+            {field: compile_mapping(topic_def.get(field)) for field in self.TOPIC_FIELDS}
+            for topic_def in topic_defs
+        ]
+
+        self.cardinality_fields = config.get("cardinality_fields") or []
+
+        cred_config = config.get("credential")
+        self.credential_fields = (
+            {
+                field: compile_mapping(cred_config.get(field))
+                for field in self.CREDENTIAL_FIELDS
+            }
+            if cred_config
+            else None
+        )
+
+        self.search_models = [
+            (
+                model_mapper["model"],
+                [
+                    (field, compile_mapping(field_mapper))
+                    for field, field_mapper in model_mapper["fields"].items()
+                ],
             )
+            for model_mapper in config.get("mapping") or []
+        ]
 
-        # If we have a processor config, build pipeline of functions
-        # and run field value through pipeline
-        if processor is not None:
-            pipeline = []
-            # Construct pipeline by dot notation. Last token is the
-            # function name and all preceeding dots denote path of
-            # module starting from `PROCESSOR_FUNCTION_BASE_PATH``
-            for function_path_with_name in processor:
-                function_path, function_name = function_path_with_name.rsplit(".", 1)
-
-                # Does the file exist?
-                try:
-                    function_module = import_module(
-                        "{}.{}".format(PROCESSOR_FUNCTION_BASE_PATH, function_path)
-                    )
-                except ModuleNotFoundError:
-                    raise CredentialException(
-                        "No processor module named '{}'".format(function_path)
-                    )
+    @classmethod
+    def compile(cls, config) -> "ProcessorConfig":
+        """Compile a processor config, unless it already is compiled."""
+        if isinstance(config, cls):
+            return config
+        return cls(config)
 
-                # Does the function exist?
-                try:
-                    function = getattr(function_module, function_name)
-                except AttributeError:
-                    raise CredentialException(
-                        "Module '{}' has no function '{}'.".format(
-                            function_path, function_name
-                        )
-                    )
 
-                # Build up a list of functions to call
-                pipeline.append(function)
+class CredentialManager(object):
+    """
+    Handles processing of incoming credentials. Populates application
+    database based on rules provided by issuer are registration.
+    """
+
+    def __init__(self) -> None:
+        self._cred_type_cache = {}
+        self._processor_config_cache = {}
 
-            # We want to run the pipeline in logical order
-            pipeline.reverse()
+    def preload(self):
+        """
+        Load all credential types with their compiled processor configs, so that
+        the first credentials processed do not pay for the lookups
+        """
+        count = 0
+        for credential_type in CredentialType.objects.select_related(
+            "issuer", "schema"
+        ):
+            self._cred_type_cache[credential_type.id] = credential_type
+            if credential_type.credential_def_id:
+                self._cred_type_cache[credential_type.credential_def_id] = credential_type
+            self.get_processor_config(credential_type)
+            count += 1
+        return count
 
-            # Run pipeline
-            while len(pipeline) > 0:
-                function = pipeline.pop()
-                mapped_value = function(mapped_value)
+    @classmethod
+    def get_claims(cls, credential):
+        if isinstance(credential, Credential):
+            return credential
+        elif isinstance(credential, CredentialModel):
+            return CredentialClaims(credential)
 
-        return mapped_value
+    @classmethod
+    def process_mapping(cls, rules, credential):
+        """
+        Takes our mapping rules and returns a value from credential
+        """
+        return compile_mapping(rules)(credential)
 
     def get_credential_type(self, credential: (Credential, CredentialModel)):
         """
@@ -401,6 +509,16 @@ class CredentialManager(object):
             raise CredentialException("Credential type not found")
         return result
 
+    def get_processor_config(self, credential_type: CredentialType) -> ProcessorConfig:
+        """
+        Fetch the compiled processor config for a credential type
+        """
+        result = self._processor_config_cache.get(credential_type.id)
+        if not result:
+            result = ProcessorConfig(credential_type.processor_config)
+            self._processor_config_cache[credential_type.id] = result
+        return result
+
     def process(
         self, credential: Credential, check_from_did: str = None
     ) -> CredentialModel:
@@ -419,14 +537,56 @@ class CredentialManager(object):
             )
         credential_type = self.get_credential_type(credential)
 
-        return self.populate_application_database(credential_type, credential)
+        return self.populate_application_database(
+            credential_type, credential, self.get_processor_config(credential_type)
+        )
+
+    def process_batch(
+        self, credentials, check_from_did: str = None
+    ) -> list:
+        """
+        Processes a batch of incoming credentials, writing the related rows
+        with bulk inserts
+
+        Returns:
+            list -- a CredentialProcessResult for each credential, in order
+        """
+        results = []
+        batch = []
+        for credential in credentials:
+            result = CredentialProcessResult(credential)
+            results.append(result)
+            try:
+                if check_from_did and check_from_did != credential.origin_did:
+                    raise CredentialException(
+                        "Credential origin DID '{}' does not match request origin DID '{}'".format(
+                            credential.origin_did, check_from_did
+                        )
+                    )
+                credential_type = self.get_credential_type(credential)
+                batch.append(
+                    (
+                        credential_type,
+                        self.get_processor_config(credential_type),
+                        result,
+                    )
+                )
+            except Exception as e:
+                LOGGER.error("Error resolving credential type: %s", str(e))
+                result.error = e
+
+        self.populate_application_database_batch(batch)
+        return results
 
-    def reprocess(self, credential: CredentialModel):
+    def reprocess(self, credential: CredentialModel, refresh_summary=True):
         """
         Reprocesses an existing credential in order to update the related search models
+
+        Batch callers may skip the topic summary refresh and refresh the summaries
+        of all their topics at once.
         """
         credential_type = self.get_credential_type(credential)
-        processor_config = credential_type.processor_config
+        processor_config = self.get_processor_config(credential_type)
 
         with transaction.atomic():
             if not credential.credential_set:
@@ -434,6 +594,8 @@ class CredentialManager(object):
                 self.update_credential_set(credential_type, credential, cardinality)
             self.remove_search_models(credential)
             self.create_search_models(credential, processor_config)
+            if refresh_summary:
+                TopicSummary.refresh([credential.topic_id])
 
     @classmethod
     def find_or_create_topic(cls, topic_spec: dict, retry=True):
@@ -455,6 +617,17 @@ class CredentialManager(object):
                     raise CredentialException("Database error while creating topic")
         return cls.find_or_create_topic(topic_spec, retry=False)
 
+    @classmethod
+    def find_topic_by_name(cls, name) -> Topic:
+        """
+        Find the topic holding a credential with a name, probing the index on
+        the name key rather than scanning the name text
+        """
+        return Topic.objects.get(
+            credentials__names__text_key=name_key(name),
+            credentials__names__text=name,
+        )
+
     @classmethod
     def resolve_credential_topics(
         cls, credential, processor_config
@@ -462,10 +635,7 @@ class CredentialManager(object):
         """
         Resolve the related topic(s) for a credential based on the processor config
         """
-        topic_defs = processor_config["topic"]
-        # We accept object or array for topic def
-        if type(topic_defs) is dict:
-            topic_defs = [topic_defs]
+        processor_config = ProcessorConfig.compile(processor_config)
 
         topic_created = False
         related_topic_created = False
@@ -473,32 +643,22 @@ class CredentialManager(object):
 
         # Issuer can register multiple topic selectors to fall back on
         # We use the first valid topic and related parent if applicable
-        for topic_def in topic_defs:
+        for selector in processor_config.topic_selectors:
             related_topic = None
             topic = None
 
-            related_topic_name = cls.process_mapping(
-                topic_def.get("related_name"), credential
-            )
-            related_topic_source_id = cls.process_mapping(
-                topic_def.get("related_source_id"), credential
-            )
-            related_topic_type = cls.process_mapping(
-                topic_def.get("related_type"), credential
-            )
+            related_topic_name = selector["related_name"](credential)
+            related_topic_source_id = selector["related_source_id"](credential)
+            related_topic_type = selector["related_type"](credential)
 
-            topic_name = cls.process_mapping(topic_def.get("name"), credential)
-            topic_source_id = cls.process_mapping(
-                topic_def.get("source_id"), credential
-            )
-            topic_type = cls.process_mapping(topic_def.get("type"), credential)
+            topic_name = selector["name"](credential)
+            topic_source_id = selector["source_id"](credential)
+            topic_type = selector["type"](credential)
 
             # Get parent topic if possible
             if related_topic_name:
                 try:
-                    related_topic = Topic.objects.get(
-                        credentials__names__text=related_topic_name
-                    )
+                    related_topic = cls.find_topic_by_name(related_topic_name)
                 except Topic.DoesNotExist:
                     continue
             elif related_topic_source_id and related_topic_type:
@@ -512,7 +672,7 @@ class CredentialManager(object):
             # Current topic if possible
             if topic_name:
                 try:
-                    topic = Topic.objects.get(credentials__names__text=topic_name)
+                    topic = cls.find_topic_by_name(topic_name)
                 except Topic.DoesNotExist:
                     continue
             elif topic_source_id and topic_type:
@@ -535,12 +695,42 @@ class CredentialManager(object):
                 result = (topic, related_topic, topic_created, related_topic_created)
         return result
 
+    @classmethod
+    def topic_key(cls, credential, processor_config) -> str:
+        """
+        Key for the topic a credential resolves to, following the selector rules
+        of resolve_credential_topics without creating any topics. Topics found by
+        name are keyed by their source_id and type like the other selectors, so
+        there is a single key for each topic.
+        """
+        processor_config = ProcessorConfig.compile(processor_config)
+
+        result = None
+        for selector in processor_config.topic_selectors:
+            related_topic_name = selector["related_name"](credential)
+            topic_name = selector["name"](credential)
+            topic_source_id = selector["source_id"](credential)
+            topic_type = selector["type"](credential)
+
+            try:
+                if related_topic_name:
+                    cls.find_topic_by_name(related_topic_name)
+                if topic_name:
+                    topic = cls.find_topic_by_name(topic_name)
+                    topic_source_id, topic_type = topic.source_id, topic.type
+            except Topic.DoesNotExist:
+                continue
+
+            if topic_source_id and topic_type:
+                result = "{}::{}".format(topic_source_id, topic_type)
+        return result
+
     @classmethod
     def credential_cardinality(cls, credential, processor_config):
         """
         Extract the credential cardinality values and hash
         """
-        fields = processor_config.get("cardinality_fields") or []
+        fields = ProcessorConfig.compile(processor_config).cardinality_fields
         values = {}
         if fields:
             claims = cls.get_claims(credential)
@@ -564,7 +754,12 @@ class CredentialManager(object):
 
     @classmethod
     def process_config_date(cls, config, credential, field_name):
-        date_value = cls.process_mapping(config.get(field_name), credential)
+        return cls.parse_config_date(
+            cls.process_mapping(config.get(field_name), credential), field_name
+        )
+
+    @classmethod
+    def parse_config_date(cls, date_value, field_name):
         date_result = None
         if date_value:
             try:
@@ -601,16 +796,18 @@ class CredentialManager(object):
         """
         Generate a dictionary of additional credential properties from the processor config
         """
-        config = processor_config.get("credential")
+        fields = ProcessorConfig.compile(processor_config).credential_fields
         args = {}
-        if config:
-            effective_date = cls.process_config_date(
-                config, credential, "effective_date"
+        if fields:
+            effective_date = cls.parse_config_date(
+                fields["effective_date"](credential), "effective_date"
             )
             if effective_date:
                 args["effective_date"] = effective_date
 
-            revoked_date = cls.process_config_date(config, credential, "revoked_date")
+            revoked_date = cls.parse_config_date(
+                fields["revoked_date"](credential), "revoked_date"
+            )
             if revoked_date:
                 if revoked_date > datetime.utcnow().replace(tzinfo=timezone.utc):
                     raise CredentialException(
@@ -621,7 +818,7 @@ class CredentialManager(object):
                 args["revoked_date"] = revoked_date
                 args["revoked"] = True
 
-            inactive = cls.process_mapping(config.get("inactive"), credential)
+            inactive = fields["inactive"](credential)
             if inactive:
                 args["inactive"] = bool(inactive)
         return args
@@ -633,20 +830,24 @@ class CredentialManager(object):
         processor_config,
         search_model_map=None,
         save=True,
+        source=None,
     ):
         """
         Create search model instances using mapping from issuer config
 
+        Claim values are read from `source` when provided (for example the
+        incoming credential), otherwise from the stored credential claims.
+
         Returns: a list of the unsaved model instances
         """
-        mapping = processor_config.get("mapping") or []
+        mapping = ProcessorConfig.compile(processor_config).search_models
         if search_model_map is None:
             search_model_map = SUPPORTED_MODELS_MAPPING
+        if source is None:
+            source = credential
         result = []
 
-        for model_mapper in mapping:
-            model_name = model_mapper["model"]
-
+        for model_name, field_extractors in mapping:
             try:
                 Model = search_model_map[model_name]
                 model = Model()
@@ -655,8 +856,8 @@ class CredentialManager(object):
                     "Unsupported model type '{}'".format(model_name)
                 )
 
-            for field, field_mapper in model_mapper["fields"].items():
-                setattr(model, field, cls.process_mapping(field_mapper, credential))
+            for field, extract in field_extractors:
+                setattr(model, field, extract(source))
             if model_name == "category":
                 model.format = "category"
 
@@ -767,11 +968,15 @@ class CredentialManager(object):
 
     @classmethod
     def populate_application_database(
-        cls, credential_type: CredentialType, credential: Credential
+        cls,
+        credential_type: CredentialType,
+        credential: Credential,
+        processor_config: ProcessorConfig = None,
     ) -> CredentialModel:
         LOGGER.warn(">>> store cred in local database")
         start_time = time.perf_counter()
-        processor_config = credential_type.processor_config
+        if processor_config is None:
+            processor_config = ProcessorConfig(credential_type.processor_config)
 
         (
             topic,
@@ -882,10 +1087,12 @@ class CredentialManager(object):
             )
             hookable_cred.save()
 
-            # This hack reindexes the Topic to account for active
-            # Credentials that are created after Topic indexes are
-            # generated.
-            Topic.objects.update_or_create(source_id=topic.source_id, type=topic.type)
+            # Reindex the Topic to account for active Credentials that are
+            # created after Topic indexes are generated. The update timestamp
+            # is still bumped for `update_index --age`, without a save signal.
+            Topic.objects.filter(pk=topic.pk).update(update_timestamp=timezone.now())
+            mark_dirty(topic)
+            TopicSummary.refresh([topic.id])
 
         # create any relationships in a separate transaction
         with transaction.atomic():
@@ -919,3 +1126,286 @@ class CredentialManager(object):
         )
 
         return db_credential
+
+    @classmethod
+    def populate_application_database_batch(cls, batch):
+        """
+        Bulk counterpart of populate_application_database
+
+        Writes a batch of credentials and their claims, search models and
+        hookable credentials using one transaction and a bulk INSERT per table.
+        If the batch transaction fails, each credential is retried on its own
+        so that failures are reported per credential.
+
+        Arguments:
+            batch {list} -- (CredentialType, ProcessorConfig, CredentialProcessResult)
+                tuples
+        """
+        LOGGER.warn(">>> store cred batch in local database: %d", len(batch))
+        start_time = time.perf_counter()
+
+        prepared = []
+        for credential_type, processor_config, result in batch:
+            try:
+                prepared.append(
+                    cls._prepare_batch_item(credential_type, processor_config, result)
+                )
+            except Exception as e:
+                LOGGER.error("Error preparing credential: %s", str(e))
+                result.error = e
+
+        if not prepared:
+            return
+
+        try:
+            with transaction.atomic():
+                cls._write_batch(prepared)
+        except Exception as e:
+            LOGGER.error("Error writing credential batch, retrying singly: %s", str(e))
+            for item in prepared:
+                result = item["result"]
+                try:
+                    result.db_credential = cls.populate_application_database(
+                        item["credential_type"],
+                        result.credential,
+                        item["processor_config"],
+                    )
+                    result.error = None
+                except Exception as e:
+                    LOGGER.error("Error processing credential: %s", str(e))
+                    result.db_credential = None
+                    result.error = e
+        else:
+            # create any relationships in a separate transaction
+            cls._write_batch_relationships(prepared)
+
+        LOGGER.warn(
+            "<<< store cred batch in local database: "
+            + str(time.perf_counter() - start_time)
+        )
+
+    @classmethod
+    def _prepare_batch_item(
+        cls,
+        credential_type: CredentialType,
+        processor_config: ProcessorConfig,
+        result: CredentialProcessResult,
+    ) -> dict:
+        """
+        Resolve topics and map claims for one credential of a batch,
+        without writing any credential data
+        """
+        credential = result.credential
+
+        (
+            topic,
+            related_topic,
+            topic_created,
+            related_topic_created,
+        ) = cls.resolve_credential_topics(credential, processor_config)
+        if not topic:
+            raise CredentialException(
+                "Issuer registration 'topic' must specify at least one valid topic name "
+                "OR topic type and topic source_id"
+            )
+
+        cardinality = cls.credential_cardinality(credential, processor_config)
+        credential_args = {
+            "cardinality_hash": cardinality["hash"] if cardinality else None,
+            "credential_def_id": credential.cred_def_id,
+            "credential_type": credential_type,
+            "credential_id": credential.thread_id,
+        }
+        credential_args.update(
+            cls.process_credential_properties(credential, processor_config)
+        )
+        db_credential = CredentialModel(topic=topic, **credential_args)
+
+        claims = {}
+        search_models = []
+        if CREATE_CREDENTIAL_CLAIMS:
+            for claim_attribute in credential.claim_attributes:
+                claims[claim_attribute] = getattr(credential, claim_attribute)
+            search_models = cls.create_search_models(
+                db_credential, processor_config, save=False, source=credential
+            )
+
+        return {
+            "result": result,
+            "credential_type": credential_type,
+            "processor_config": processor_config,
+            "topic": topic,
+            "topic_created": topic_created,
+            "related_topic": related_topic,
+            "cardinality": cardinality,
+            "db_credential": db_credential,
+            "claims": claims,
+            "search_models": search_models,
+        }
+
+    @classmethod
+    def _bulk_create(cls, model_cls, instances, saved=True):
+        """
+        Insert model instances in bulk
+
+        When `saved` is set the instances get their primary keys and post_save
+        is sent for each of them (driving search indexing and web hooks), as if
+        they were saved individually. Databases which cannot return the generated
+        keys from a bulk insert fall back to individual saves.
+        """
+        if not instances:
+            return
+        if not saved:
+            model_cls.objects.bulk_create(
+                instances, batch_size=CREDENTIAL_BULK_INSERT_SIZE
+            )
+        elif connection.features.can_return_ids_from_bulk_insert:
+            model_cls.objects.bulk_create(
+                instances, batch_size=CREDENTIAL_BULK_INSERT_SIZE
+            )
+            for instance in instances:
+                signals.post_save.send(
+                    sender=model_cls,
+                    instance=instance,
+                    created=True,
+                    raw=False,
+                    using=DEFAULT_DB_ALIAS,
+                    update_fields=None,
+                )
+        else:
+            for instance in instances:
+                instance.save()
+
+    @classmethod
+    def _write_batch(cls, prepared):
+        """
+        Write a prepared batch of credentials; must be called inside a transaction
+        """
+        # Acquire locks on the topics to block competing credentials, in a
+        # consistent order to avoid deadlocks between concurrent batches
+        topic_ids = sorted({item["topic"].id for item in prepared})
+        list(
+            Topic.objects.select_for_update()
+            .filter(pk__in=topic_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        db_credentials = [item["db_credential"] for item in prepared]
+        cls._bulk_create(CredentialModel, db_credentials)
+
+        # Assign to credential sets in arrival order, as the single path does
+        for item in prepared:
+            cls.update_credential_set(
+                item["credential_type"], item["db_credential"], item["cardinality"]
+            )
+
+        claims = []
+        search_models = {}
+        for item in prepared:
+            db_credential = item["db_credential"]
+            for name, value in item["claims"].items():
+                claims.append(
+                    Claim(credential=db_credential, name=name, value=value)
+                )
+            for model in item["search_models"]:
+                # refresh the foreign key now that the credential is saved
+                model.credential = db_credential
+                search_models.setdefault(model.__class__, []).append(model)
+        cls._bulk_create(Claim, claims, saved=False)
+        for model_cls, models in search_models.items():
+            cls._bulk_create(model_cls, models)
+
+        # Update last issue date for credential types
+        if UPDATE_CRED_TYPE_TIMESTAMP:
+            now = datetime.now(timezone.utc)
+            credential_types = {
+                item["credential_type"].id: item["credential_type"] for item in prepared
+            }
+            for credential_type in credential_types.values():
+                credential_type.last_issue_date = now
+                credential_type.save()
+
+        # add to the set of "hookable credentials"
+        corp_nums = {item["topic"].source_id for item in prepared}
+        new_hook_corp_nums = set(
+            HookableCredential.objects.filter(
+                corp_num__in=corp_nums, topic_status="New"
+            ).values_list("corp_num", flat=True)
+        )
+        hookable_creds = []
+        for item in prepared:
+            topic = item["topic"]
+            credential = item["result"].credential
+            if item["topic_created"] or topic.source_id not in new_hook_corp_nums:
+                topic_status = "New"
+                new_hook_corp_nums.add(topic.source_id)
+            else:
+                topic_status = "Stream"
+            hookable_creds.append(
+                HookableCredential(
+                    topic_status=topic_status,
+                    corp_num=topic.source_id,
+                    credential_type=item["credential_type"].schema.name,
+                    credential_json={
+                        "cred_def_id": credential.cred_def_id,
+                        "schema_name": credential.schema_name,
+                        "attributes": item["claims"],
+                    },
+                )
+            )
+        cls._bulk_create(HookableCredential, hookable_creds)
+
+        # Reindex each Topic once to account for active Credentials that
+        # are created after Topic indexes are generated
+        topics = {item["topic"].id: item["topic"] for item in prepared}
+        Topic.objects.filter(pk__in=topics.keys()).update(
+            update_timestamp=timezone.now()
+        )
+        for topic in topics.values():
+            mark_dirty(topic)
+        TopicSummary.refresh(topics.keys())
+
+        for item in prepared:
+            item["result"].db_credential = item["db_credential"]
+
+    @classmethod
+    def _write_batch_relationships(cls, prepared):
+        """
+        Create topic relationships for a committed batch in a separate transaction
+
+        When the batch insert fails each relationship is retried in its own
+        savepoint, so that only the credentials whose relationship cannot be
+        created are reported as failed.
+        """
+        items = [item for item in prepared if item["related_topic"] is not None]
+        if not items:
+            return
+        relationships = [
+            TopicRelationship(
+                credential=item["db_credential"],
+                topic=item["topic"],
+                related_topic=item["related_topic"],
+            )
+            for item in items
+        ]
+        try:
+            with transaction.atomic():
+                cls._bulk_create(TopicRelationship, relationships)
+        except IntegrityError as e:
+            LOGGER.error(
+                "Error creating topic relationships for batch, retrying singly: %s",
+                str(e),
+            )
+            with transaction.atomic():
+                for item, relationship in zip(items, relationships):
+                    # drop any key assigned by the rolled back insert
+                    relationship.pk = None
+                    try:
+                        with transaction.atomic():
+                            cls._bulk_create(TopicRelationship, [relationship])
+                    except IntegrityError as e:
+                        LOGGER.error("Error creating topic relationship: %s", str(e))
+                        item["result"].error = CredentialException(
+                            "Error creating topic relationship: {}".format(e)
+                        )
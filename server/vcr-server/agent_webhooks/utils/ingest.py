@@ -0,0 +1,288 @@
+import logging
+import os
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from api.v2.models.Credential import Credential as CredentialModel
+from api.v2.utils import call_agent_with_retry
+
+from agent_webhooks.models import PendingCredential
+from agent_webhooks.utils.credential import Credential, CredentialManager
+
+LOGGER = logging.getLogger(__name__)
+
+# seconds after which a claimed credential is assumed abandoned and claimed again
+CREDENTIAL_QUEUE_LEASE = int(os.getenv("CREDENTIAL_QUEUE_LEASE", "300"))
+# number of claims after which a credential is dropped from the queue
+CREDENTIAL_QUEUE_MAX_ATTEMPTS = int(os.getenv("CREDENTIAL_QUEUE_MAX_ATTEMPTS", "5"))
+# number of topic partitions credentials are queued in, each one is drained by
+# a single worker; must match between the webhook and worker processes
+CREDENTIAL_QUEUE_PARTITIONS = int(os.getenv("CREDENTIAL_QUEUE_PARTITIONS", "16"))
+
+
+def credential_records_url(cred_ex_id: str, v: str = None) -> str:
+    return (
+        f"{settings.AGENT_ADMIN_URL}/issue-credential{'-' + v if v else ''}"
+        f"/records/{cred_ex_id}"
+    )
+
+
+def send_problem_report(cred_ex_id: str, error, v: str = None):
+    """
+    Report a credential processing error to the agent
+    """
+    LOGGER.error(f"Send problem report for {cred_ex_id}")
+    resp = call_agent_with_retry(
+        f"{credential_records_url(cred_ex_id, v)}/problem-report",
+        post_method=True,
+        payload={"explain_ltxt": str(error)},
+        headers=settings.ADMIN_REQUEST_HEADERS,
+    )
+    resp.raise_for_status()
+
+
+def store_credential(
+    cred_ex_id: str, cred_id: str, existing: bool = False, v: str = None
+) -> bool:
+    """
+    Instruct the agent to store a credential in the wallet, unless a
+    duplicate credential is already there
+
+    Returns:
+        bool -- False if neither the credential exchange nor the credential
+            could be found by the agent
+    """
+    # check if the credential is in the wallet already
+    if existing:
+        resp = call_agent_with_retry(
+            f"{settings.AGENT_ADMIN_URL}/credential/{cred_id}",
+            post_method=False,
+            headers=settings.ADMIN_REQUEST_HEADERS,
+        )
+        if resp.status_code == 404:
+            existing = False
+
+    # Instruct the agent to store the credential in wallet
+    if not existing:
+        # post with retry - if returned status is 503 unavailable retry a few times
+        resp = call_agent_with_retry(
+            f"{credential_records_url(cred_ex_id, v)}/store",
+            post_method=True,
+            payload={"credential_id": cred_id},
+            headers=settings.ADMIN_REQUEST_HEADERS,
+        )
+        if resp.status_code == 404:
+            # TODO assume the credential exchange has completed?
+            resp = call_agent_with_retry(
+                f"{settings.AGENT_ADMIN_URL}/credential/{cred_id}",
+                post_method=False,
+                headers=settings.ADMIN_REQUEST_HEADERS,
+            )
+            if resp.status_code == 404:
+                LOGGER.error(
+                    " >>> Error cred exchange id is missing but credential is not available for "
+                    + cred_ex_id + ", " + cred_id
+                )
+                return False
+        else:
+            resp.raise_for_status()
+    return True
+
+
+def credential_partition(manager: CredentialManager, cred_data: dict) -> int:
+    """
+    Partition of the topic the credential is expected to resolve to. Credentials
+    without a resolvable topic key are all placed in partition 0.
+    """
+    try:
+        credential = Credential(cred_data)
+        credential_type = manager.get_credential_type(credential)
+        topic_key = manager.topic_key(
+            credential, manager.get_processor_config(credential_type)
+        )
+    except Exception as e:
+        # processing the credential will report the error
+        LOGGER.warning("Could not resolve credential topic key: %s", str(e))
+        topic_key = None
+    if not topic_key:
+        return 0
+    return zlib.crc32(topic_key.encode("utf-8")) % CREDENTIAL_QUEUE_PARTITIONS
+
+
+def credential_queue_depths() -> dict:
+    """
+    Number of queued and claimed credentials for each partition
+    """
+    rows = (
+        PendingCredential.objects.order_by()
+        .values("partition")
+        .annotate(depth=Count("id"), claimed=Count("claimed_at"))
+    )
+    return {
+        row["partition"]: {"depth": row["depth"], "claimed": row["claimed"]}
+        for row in rows
+    }
+
+
+def enqueue_credential(
+    cred_ex_id: str, cred_data: dict, v: str = None, manager: CredentialManager = None
+):
+    """
+    Persist a received credential for the credential queue workers. A credential
+    exchange which is already queued (webhook retries) is not queued again.
+    """
+    partition = credential_partition(manager, cred_data) if manager else 0
+    PendingCredential.objects.get_or_create(
+        cred_ex_id=cred_ex_id,
+        defaults={"version": v, "credential_data": cred_data, "partition": partition},
+    )
+
+
+class CredentialQueueWorker:
+    """
+    Drains the pending credential table, optionally limited to a set of
+    partitions. Each claimed batch is written to the application database in
+    arrival order, then each credential is either stored in the wallet or
+    reported to the agent as a problem.
+    """
+
+    def __init__(self, batch_size: int = 100, partitions: list = None):
+        """Initialize the credential queue worker instance."""
+        self.batch_size = batch_size
+        self.partitions = partitions
+
+    def claim_batch(self) -> list:
+        """
+        Claim the oldest unclaimed credentials, along with any whose claim
+        has expired because their worker stopped
+        """
+        now = timezone.now()
+        expired = now - timedelta(seconds=CREDENTIAL_QUEUE_LEASE)
+        pending = PendingCredential.objects.select_for_update(skip_locked=True)
+        if self.partitions is not None:
+            pending = pending.filter(partition__in=self.partitions)
+        with transaction.atomic():
+            rows = list(
+                pending.filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+                .order_by("id")[: self.batch_size]
+            )
+            if rows:
+                PendingCredential.objects.filter(
+                    pk__in=[row.pk for row in rows]
+                ).update(claimed_at=now, attempts=F("attempts") + 1)
+        for row in rows:
+            row.claimed_at = now
+            row.attempts += 1
+        return rows
+
+    def run_batch(self) -> int:
+        """
+        Claim and process one batch of pending credentials
+
+        Returns:
+            int -- the number of credentials claimed
+        """
+        rows = self.claim_batch()
+        if not rows:
+            return 0
+
+        # use a new manager for each batch to pick up issuer registrations
+        # received by the web workers
+        manager = CredentialManager()
+
+        errors = {}
+        credentials = {}
+        for row in rows:
+            try:
+                credentials[row.pk] = Credential(row.credential_data)
+            except Exception as e:
+                errors[row.pk] = e
+
+        # sanity check that we haven't received these credentials yet
+        existing = set(
+            CredentialModel.objects.filter(
+                credential_id__in=[cred.thread_id for cred in credentials.values()]
+            ).values_list("credential_id", flat=True)
+        )
+        duplicates = set()
+        new_rows = []
+        for row in rows:
+            credential = credentials.get(row.pk)
+            if not credential:
+                continue
+            if credential.thread_id in existing:
+                LOGGER.error(
+                    " >>> Received duplicate for credential_id: "
+                    + credential.thread_id + ", exch id: " + row.cred_ex_id
+                )
+                duplicates.add(row.pk)
+            else:
+                existing.add(credential.thread_id)
+                new_rows.append(row)
+
+        results = manager.process_batch([credentials[row.pk] for row in new_rows])
+        for row, result in zip(new_rows, results):
+            if result.error:
+                errors[row.pk] = result.error
+
+        done = []
+        for row in rows:
+            if self.complete(
+                row,
+                credentials.get(row.pk),
+                errors.get(row.pk),
+                row.pk in duplicates,
+            ):
+                done.append(row.pk)
+        PendingCredential.objects.filter(pk__in=done).delete()
+        return len(rows)
+
+    def complete(self, row: PendingCredential, credential, error, existing) -> bool:
+        """
+        Store a processed credential, or report its processing error
+
+        Returns:
+            bool -- whether the credential can be removed from the queue
+        """
+        try:
+            if error:
+                raise error
+            store_credential(row.cred_ex_id, credential.thread_id, existing, row.version)
+            return True
+        except Exception as e:
+            LOGGER.error(e)
+            try:
+                send_problem_report(row.cred_ex_id, e, row.version)
+                return True
+            except Exception:
+                LOGGER.exception("Error sending problem report for %s", row.cred_ex_id)
+                # leave the claim to expire so the credential is retried
+                if row.attempts < CREDENTIAL_QUEUE_MAX_ATTEMPTS:
+                    return False
+                LOGGER.error(
+                    "Dropping credential exchange %s after %d attempts",
+                    row.cred_ex_id,
+                    row.attempts,
+                )
+                return True
+
+    def run(self, stop_event=None, poll_interval: float = 1.0, once: bool = False):
+        """
+        Process batches until the queue is empty (`once`) or `stop_event` is set
+        """
+        while not (stop_event and stop_event.is_set()):
+            try:
+                claimed = self.run_batch()
+            except Exception:
+                LOGGER.exception("Error processing credential queue batch")
+                claimed = 0
+            if not claimed:
+                if once:
+                    break
+                time.sleep(poll_interval)
@@ -1,10 +1,13 @@
 import logging
 from typing import Sequence, Tuple
 
+from django.db import transaction
+
 from api.v2.auth import create_issuer_user
 from api.v2.models.CredentialType import CredentialType
 from api.v2.models.Issuer import Issuer
 from api.v2.models.Schema import Schema
+from api.v2.search.cache import invalidate_facet_labels
 from api.v2.serializers.rest import (
     CredentialTypeExtSerializer,
     IssuerSerializer,
@@ -92,6 +95,7 @@ class IssuerManager:
         issuer.logo_b64 = issuer_logo
         issuer.endpoint = issuer_endpoint
         issuer.save()
+        transaction.on_commit(invalidate_facet_labels)
 
         return issuer
 
@@ -155,4 +159,6 @@ class IssuerManager:
             credential_type.save()
             credential_types.append(credential_type)
 
+        if credential_types:
+            transaction.on_commit(invalidate_facet_labels)
         return schemas, credential_types
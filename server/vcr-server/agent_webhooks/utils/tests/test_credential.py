@@ -1,10 +1,16 @@
 from datetime import datetime, timezone
 import json
 
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from unittest.mock import patch
 
 from agent_webhooks.utils import credential
+from api.v2.models import Claim, CredentialType, Name, Schema, Topic
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Credential import Credential as CredentialModel
+from api.v2.models.Name import name_key
+from api.v2.models.TopicRelationship import TopicRelationship
 
 
 class Credential_TestCase(TestCase):
@@ -53,6 +59,65 @@ class CredentialManager_TestCase(TestCase):
         assert mgr.process_mapping(test_claim_mapping, test_cred) == "attr-value"
         assert mgr.process_mapping(test_processor_mapping, test_cred) == "TEST-VALUE"
 
+    def test_processor_config(self):
+        test_cred = credential.Credential(
+            {
+                "thread_id": "thread-12345-67890",
+                "schema_id": "schema id",
+                "cred_def_id": "not:a:did:987654",
+                "rev_reg_id": "rev reg id",
+                "attrs": {"attr": "attr-value"},
+            },
+            None,
+        )
+        cred_type = CredentialType(
+            id=1,
+            processor_config={
+                "topic": {
+                    "source_id": {"input": "attr", "from": "claim"},
+                    "type": {"input": "topic-type", "from": "value"},
+                },
+                "mapping": [
+                    {
+                        "model": "attribute",
+                        "fields": {
+                            "type": {"input": "attr", "from": "value"},
+                            "value": {
+                                "input": "attr",
+                                "from": "claim",
+                                "processor": ["string_helpers.uppercase"],
+                            },
+                        },
+                    }
+                ],
+            },
+        )
+
+        mgr = credential.CredentialManager()
+        with patch(
+            "agent_webhooks.utils.credential.import_module",
+            wraps=credential.import_module,
+        ) as mock_import:
+            pconfig = mgr.get_processor_config(cred_type)
+            assert mgr.get_processor_config(cred_type) is pconfig
+            assert mock_import.call_count == 1
+
+            selector = pconfig.topic_selectors[0]
+            assert selector["source_id"](test_cred) == "attr-value"
+            assert selector["type"](test_cred) == "topic-type"
+            assert selector["name"](test_cred) is None
+
+            models = mgr.create_search_models(
+                CredentialModel(), pconfig, save=False, source=test_cred
+            )
+            assert [(m.type, m.value) for m in models] == [("attr", "ATTR-VALUE")]
+            assert mock_import.call_count == 1
+
+        with self.assertRaises(credential.CredentialException):
+            credential.ProcessorConfig(
+                {"mapping": [{"model": "name", "fields": {"text": {"from": "claim"}}}]}
+            )
+
     def test_resolve_topic(self):
         test_cred = credential.Credential(
             {
@@ -92,6 +157,109 @@ class CredentialManager_TestCase(TestCase):
         assert related_topic.type == "related-type"
         assert related_topic_created
 
+    def test_find_topic_by_name(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        schema = Schema.objects.create(
+            name="schema-name", version="1.0", origin_did="not:a:did"
+        )
+        cred_type = CredentialType.objects.create(schema=schema, issuer=issuer)
+        topics = []
+        for idx, text in enumerate(["Acme Ltd.", "ACME  ltd."]):
+            topic = Topic.objects.create(source_id="BC000{}".format(idx), type="registration")
+            cred = CredentialModel.objects.create(
+                topic=topic, credential_type=cred_type, credential_id=str(idx)
+            )
+            if idx:
+                Name.objects.bulk_create([Name(credential=cred, text=text)])
+            else:
+                cred.names.create(text=text)
+            topics.append(topic)
+
+        # case and whitespace variants share a key, the text must still match
+        assert set(Name.objects.values_list("text_key", flat=True)) == {
+            name_key("acme ltd.")
+        }
+        mgr = credential.CredentialManager()
+        assert mgr.find_topic_by_name("Acme Ltd.") == topics[0]
+        assert mgr.find_topic_by_name("ACME  ltd.") == topics[1]
+        with self.assertRaises(Topic.DoesNotExist):
+            mgr.find_topic_by_name("acme ltd.")
+
+        # mapped values which are not strings are stored as text
+        cred = CredentialModel.objects.create(
+            topic=topics[0], credential_type=cred_type, credential_id="2"
+        )
+        Name.objects.bulk_create([Name(credential=cred, text=1234)])
+        cred.names.create(text=True)
+        assert sorted(cred.names.values_list("text", "text_key")) == [
+            ("1234", name_key("1234")),
+            ("True", name_key("True")),
+        ]
+
+    def test_topic_key(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        schema = Schema.objects.create(
+            name="schema-name", version="1.0", origin_did="not:a:did"
+        )
+        cred_type = CredentialType.objects.create(schema=schema, issuer=issuer)
+        topic = Topic.objects.create(source_id="BC0001", type="registration")
+        cred = CredentialModel.objects.create(
+            topic=topic, credential_type=cred_type, credential_id="0"
+        )
+        cred.names.create(text="Acme Ltd.")
+
+        test_cred = credential.Credential(
+            {
+                "thread_id": "thread-12345-67890",
+                "schema_id": "schema id",
+                "cred_def_id": "not:a:did:987654",
+                "rev_reg_id": "rev reg id",
+                "attrs": {"topic_id": "BC0001", "legal_name": "Acme Ltd."},
+            },
+            None,
+        )
+        by_name = {"name": {"input": "legal_name", "from": "claim"}}
+        by_source_id = {
+            "source_id": {"input": "topic_id", "from": "claim"},
+            "type": {"input": "registration", "from": "value"},
+        }
+        missing_name = {"name": {"input": "Missing Ltd.", "from": "value"}}
+        other_source_id = {
+            "source_id": {"input": "BC0002", "from": "value"},
+            "type": {"input": "registration", "from": "value"},
+        }
+
+        mgr = credential.CredentialManager()
+        # selectors by name and by source_id give one key for the same topic
+        assert mgr.topic_key(test_cred, {"topic": [by_name]}) == "BC0001::registration"
+        assert (
+            mgr.topic_key(test_cred, {"topic": [by_source_id]}) == "BC0001::registration"
+        )
+        # the key follows the topic resolved from the selectors
+        for selectors in (
+            [missing_name, by_source_id],
+            [by_source_id, missing_name],
+            [other_source_id, by_name],
+            [by_name, other_source_id],
+        ):
+            pconfig = {"topic": selectors}
+            key = mgr.topic_key(test_cred, pconfig)
+            resolved = mgr.resolve_credential_topics(test_cred, pconfig)[0]
+            assert key == "{}::{}".format(resolved.source_id, resolved.type)
+        assert mgr.topic_key(test_cred, {"topic": [missing_name]}) is None
+
     def test_cardinality(self):
         test_cred = credential.Credential(
             {
@@ -165,3 +333,150 @@ class CredentialManager_TestCase(TestCase):
             "revoked_date": datetime(2001, 1, 1, 12, 0, 0, 0, timezone.utc),
             "revoked": True,
         }
+
+    def test_process_batch(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        schema = Schema.objects.create(
+            name="schema-name", version="1.0", origin_did="not:a:did"
+        )
+        cred_type = CredentialType.objects.create(schema=schema, issuer=issuer)
+        cred_type.processor_config = {
+            "topic": [
+                {
+                    "source_id": {"input": "topic_id", "from": "claim"},
+                    "type": {"input": "registration", "from": "value"},
+                }
+            ],
+            "mapping": [
+                {
+                    "model": "name",
+                    "fields": {
+                        "text": {"input": "legal_name", "from": "claim"},
+                        "type": {"input": "entity_name", "from": "value"},
+                    },
+                }
+            ],
+        }
+
+        def make_cred(thread_id, attrs):
+            return credential.Credential(
+                {
+                    "thread_id": thread_id,
+                    "schema_id": "did123:2:schema-name:1.0",
+                    "cred_def_id": "did123:3:CL:1:tag",
+                    "rev_reg_id": None,
+                    "attrs": attrs,
+                }
+            )
+
+        creds = [
+            make_cred("thread-1", {"topic_id": "BC1", "legal_name": "First"}),
+            make_cred("thread-2", {"topic_id": "BC2", "legal_name": "Second"}),
+            make_cred("thread-3", {"legal_name": "No topic"}),
+        ]
+
+        mgr = credential.CredentialManager()
+        with patch.object(
+            mgr, "get_credential_type", return_value=cred_type
+        ), patch("agent_webhooks.utils.credential.HookableCredential") as hookable, patch(
+            "agent_webhooks.utils.credential.TopicSummary"
+        ) as topic_summary, patch(
+            "agent_webhooks.utils.credential.UPDATE_CRED_TYPE_TIMESTAMP", False
+        ):
+            results = mgr.process_batch(creds)
+
+        assert [result.success for result in results] == [True, True, False]
+        assert isinstance(results[2].error, credential.CredentialException)
+        assert CredentialModel.objects.count() == 2
+        assert Claim.objects.count() == 4
+        assert sorted(Name.objects.values_list("text", flat=True)) == [
+            "First",
+            "Second",
+        ]
+        first = results[0].db_credential
+        assert first.topic.source_id == "BC1"
+        assert first.latest
+        assert first.credential_set is not None
+        assert first.names.get().text == "First"
+        assert first.names.get().text_key == name_key("First")
+        assert [
+            call[1]["topic_status"] for call in hookable.call_args_list
+        ] == ["New", "New"]
+        # the summaries of both topics are refreshed together
+        topic_summary.refresh.assert_called_once()
+        assert set(topic_summary.refresh.call_args[0][0]) == set(
+            CredentialModel.objects.values_list("topic_id", flat=True)
+        )
+
+    def test_write_batch_relationships(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        schema = Schema.objects.create(
+            name="schema-name", version="1.0", origin_did="not:a:did"
+        )
+        cred_type = CredentialType.objects.create(schema=schema, issuer=issuer)
+        topic = Topic.objects.create(source_id="BC1", type="registration")
+        related = Topic.objects.create(source_id="BC2", type="registration")
+        # not in the database, so the relationship breaks its foreign key
+        missing = Topic(id=related.id + 100, source_id="BC3", type="registration")
+
+        prepared = []
+        for idx, related_topic in enumerate((related, missing, related)):
+            prepared.append(
+                {
+                    "result": credential.CredentialProcessResult(None),
+                    "topic": topic,
+                    "related_topic": related_topic,
+                    "db_credential": CredentialModel.objects.create(
+                        topic=topic,
+                        credential_type=cred_type,
+                        credential_id="cred-{}".format(idx),
+                    ),
+                }
+            )
+
+        inserts = []
+        bulk_create = TopicRelationship.objects.bulk_create
+
+        def check_bulk_create(instances, batch_size=None):
+            # stand in for the foreign key check of a postgres bulk insert
+            inserts.append(len(instances))
+            topic_ids = set(Topic.objects.values_list("id", flat=True))
+            if any(rel.related_topic_id not in topic_ids for rel in instances):
+                raise IntegrityError("violates foreign key constraint")
+            bulk_create(instances, batch_size=batch_size)
+            for rel in instances:
+                rel.pk = TopicRelationship.objects.get(credential=rel.credential).pk
+
+        with patch.object(
+            connection.features, "can_return_ids_from_bulk_insert", True
+        ), patch.object(
+            TopicRelationship.objects, "bulk_create", side_effect=check_bulk_create
+        ), patch(
+            "agent_webhooks.utils.credential.signals.post_save.send"
+        ) as post_save:
+            credential.CredentialManager._write_batch_relationships(prepared)
+
+        # the batch insert failed, then each relationship was inserted alone
+        assert inserts == [3, 1, 1, 1]
+        assert [item["result"].error is None for item in prepared] == [
+            True,
+            False,
+            True,
+        ]
+        assert isinstance(prepared[1]["result"].error, credential.CredentialException)
+        assert sorted(
+            TopicRelationship.objects.values_list("credential__credential_id", flat=True)
+        ) == ["cred-0", "cred-2"]
+        assert post_save.call_count == 2
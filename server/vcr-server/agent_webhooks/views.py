@@ -14,6 +14,11 @@ from rest_framework.response import Response
 from api.v2.models.Credential import Credential as CredentialModel
 from api.v2.utils import log_timing_method, log_timing_event, call_agent_with_retry
 from agent_webhooks.utils.credential import Credential, CredentialManager
+from agent_webhooks.utils.ingest import (
+    enqueue_credential,
+    send_problem_report,
+    store_credential,
+)
 from agent_webhooks.utils.issuer import IssuerManager
 
 LOGGER = logging.getLogger(__name__)
@@ -37,6 +42,13 @@ else:
     LOGGER.error(">>> NO not processing inbound credentials")
     PROCESS_INBOUND_CREDENTIALS = False
 
+PROCESS_CREDENTIALS_ASYNC = os.environ.get('PROCESS_CREDENTIALS_ASYNC', 'false')
+if PROCESS_CREDENTIALS_ASYNC.upper() == "TRUE":
+    LOGGER.debug(">>> YES queueing inbound credentials for the credential queue workers")
+    PROCESS_CREDENTIALS_ASYNC = True
+else:
+    PROCESS_CREDENTIALS_ASYNC = False
+
 RANDOM_ERRORS = os.environ.get('RANDOM_ERRORS', 'false').upper() == "TRUE"
 if RANDOM_ERRORS:
     LOGGER.error(">>> YES generating random credential processing errors")
@@ -194,15 +206,8 @@ def handle_credentials(state, message):
 
     except Exception as e:
         LOGGER.error(e)
-        LOGGER.error(f"Send problem report for {credential_exchange_id}")
         # Send a problem report for the error
-        resp = call_agent_with_retry(
-            f"{settings.AGENT_ADMIN_URL}/issue-credential/records/{credential_exchange_id}/problem-report",
-            post_method=True,
-            payload={"explain_ltxt": str(e)},
-            headers=settings.ADMIN_REQUEST_HEADERS,
-        )
-        resp.raise_for_status()
+        send_problem_report(credential_exchange_id, e)
         return Response({"success": False, "error": str(e)})
 
     return Response(response_data)
@@ -390,7 +395,8 @@ def handle_register_issuer(message):
     issuer_manager = IssuerManager()
     updated = issuer_manager.register_issuer(message)
 
-    # reset the global CredentialManager instance (to clear the CredentialType cache)
+    # reset the global CredentialManager instance (to clear the CredentialType
+    # cache and rebuild the compiled processor configs)
     global credential_manager
     credential_manager = CredentialManager()
 
@@ -502,15 +508,8 @@ def handle_credentials_2_0(state, message):
 
     except Exception as e:
         LOGGER.error(e)
-        LOGGER.error(f"Send problem report for {cred_ex_id}")
         # Send a problem report for the error
-        resp = call_agent_with_retry(
-            f"{settings.AGENT_ADMIN_URL}/issue-credential-2.0/records/{cred_ex_id}/problem-report",
-            post_method=True,
-            payload={"explain_ltxt": str(e)},
-            headers=settings.ADMIN_REQUEST_HEADERS,
-        )
-        resp.raise_for_status()
+        send_problem_report(cred_ex_id, e, "2.0")
         return Response({"success": False, "error": str(e)})
 
     return Response(response_data)
@@ -518,7 +517,16 @@ def handle_credentials_2_0(state, message):
 
 def receive_credential(cred_ex_id, cred_data, v=None):
     existing = False
-    if PROCESS_INBOUND_CREDENTIALS:
+    if PROCESS_INBOUND_CREDENTIALS and PROCESS_CREDENTIALS_ASYNC:
+        # the credential queue workers populate the database and store the credential
+        enqueue_credential(cred_ex_id, cred_data, v, credential_manager)
+        return Response(
+            {
+                "success": True,
+                "details": f"Queued credential with id {cred_data['thread_id']}",
+            }
+        )
+    elif PROCESS_INBOUND_CREDENTIALS:
         credential = Credential(cred_data)
 
         # sanity check that we haven't received this credential yet
@@ -537,39 +545,8 @@ def receive_credential(cred_ex_id, cred_data, v=None):
     else:
         ret_cred_id = cred_data["thread_id"]
 
-    # check if the credential is in the wallet already
-    if existing:
-        resp = call_agent_with_retry(
-            f"{settings.AGENT_ADMIN_URL}/credential/{ret_cred_id}",
-            post_method=False,
-            headers=settings.ADMIN_REQUEST_HEADERS,
-        )
-        if resp.status_code == 404:
-            existing = False
-
-    # Instruct the agent to store the credential in wallet
-    if not existing:
-        # post with retry - if returned status is 503 unavailable retry a few times
-        resp = call_agent_with_retry(
-            f"{settings.AGENT_ADMIN_URL}/issue-credential{'-' + v if v else ''}/records/{cred_ex_id}/store",
-            post_method=True,
-            payload={"credential_id": ret_cred_id},
-            headers=settings.ADMIN_REQUEST_HEADERS,
-        )
-        if resp.status_code == 404:
-            # TODO assume the credential exchange has completed?
-            resp = call_agent_with_retry(
-                f"{settings.AGENT_ADMIN_URL}/credential/{ret_cred_id}",
-                post_method=False,
-                headers=settings.ADMIN_REQUEST_HEADERS,
-            )
-            if resp.status_code == 404:
-                LOGGER.error(
-                    " >>> Error cred exchange id is missing but credential is not available for " + cred_ex_id + ", " + ret_cred_id)
-                return Response("Error cred exchange id is missing but credential is not available", status=status.HTTP_400_BAD_REQUEST)
-            pass
-        else:
-            resp.raise_for_status()
+    if not store_credential(cred_ex_id, ret_cred_id, existing, v):
+        return Response("Error cred exchange id is missing but credential is not available", status=status.HTTP_400_BAD_REQUEST)
 
     response_data = {
         "success": True,
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0027_auto_20200519_2019'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolrQueueItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_timestamp', models.DateTimeField(auto_now=True, null=True)),
+                ('index_cls', models.TextField()),
+                ('using', models.TextField(null=True)),
+                ('remove', models.BooleanField(default=False)),
+                ('object_id', models.TextField()),
+            ],
+            options={
+                'db_table': 'solr_queue_item',
+                'ordering': ('id',),
+            },
+        ),
+    ]
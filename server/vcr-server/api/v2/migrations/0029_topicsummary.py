@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:24
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0028_solrqueueitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicSummary',
+            fields=[
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_timestamp', models.DateTimeField(auto_now=True, null=True)),
+                ('topic', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='api_v2.Topic')),
+                ('inactive', models.BooleanField(null=True)),
+                ('revoked', models.BooleanField(null=True)),
+                ('effective_date', models.DateTimeField(null=True)),
+                ('revoked_date', models.DateTimeField(null=True)),
+                ('names', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('addresses', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('attributes', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('credential_set', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api_v2.CredentialSet')),
+                ('credential_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api_v2.CredentialType')),
+            ],
+            options={
+                'db_table': 'topic_summary',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:37
+
+from api.v2.models.Name import NameKeyField, name_key
+from django.db import migrations
+
+
+def set_text_keys(apps, schema_editor):
+    Name = apps.get_model("api_v2", "Name")
+    batch = []
+    for name in Name.objects.only("id", "text").order_by().iterator(chunk_size=2000):
+        name.text_key = name_key(name.text)
+        batch.append(name)
+        if len(batch) >= 2000:
+            Name.objects.bulk_update(batch, ["text_key"])
+            batch = []
+    if batch:
+        Name.objects.bulk_update(batch, ["text_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0029_topicsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='name',
+            name='text_key',
+            field=NameKeyField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(set_text_keys, migrations.RunPython.noop),
+    ]
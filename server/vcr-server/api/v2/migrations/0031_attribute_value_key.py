@@ -0,0 +1,40 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:38
+
+from api.v2.models.Attribute import ValueKeyField, value_key
+from django.db import migrations, models
+
+
+def set_value_keys(apps, schema_editor):
+    Attribute = apps.get_model("api_v2", "Attribute")
+    batch = []
+    for attribute in (
+        Attribute.objects.only("id", "value").order_by().iterator(chunk_size=2000)
+    ):
+        attribute.value_key = value_key(attribute.value)
+        batch.append(attribute)
+        if len(batch) >= 2000:
+            Attribute.objects.bulk_update(batch, ["value_key"])
+            batch = []
+    if batch:
+        Attribute.objects.bulk_update(batch, ["value_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0030_name_text_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attribute',
+            name='value_key',
+            field=ValueKeyField(editable=False, null=True),
+        ),
+        # the keys are set before the index is built
+        migrations.RunPython(set_value_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attribute',
+            index=models.Index(fields=['type', 'value_key'], name='attribute_type_value_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# the name selection rules of api.v2.utils at the time of this migration
+LOCAL_NAME_TYPES = ("display_name", "entity_name_assumed", "entity_name")
+
+
+def local_name_index(types):
+    if len(types) == 0:
+        return None
+    for type in LOCAL_NAME_TYPES:
+        if type in types:
+            return types.index(type)
+    return 0
+
+
+def remote_name_index(types):
+    if "entity_name_assumed" in types and "entity_name" in types:
+        return types.index("entity_name")
+    return None
+
+
+def update_batch(Name, TopicSummary, batch):
+    # the stored names may refer to names deleted since the summary was built
+    name_ids = set()
+    for summary, local_id, remote_id in batch:
+        name_ids.update((local_id, remote_id))
+    name_ids.discard(None)
+    existing = set(
+        Name.objects.filter(id__in=name_ids).values_list("id", flat=True)
+    )
+    summaries = []
+    for summary, local_id, remote_id in batch:
+        summary.local_name_id = local_id if local_id in existing else None
+        summary.remote_name_id = remote_id if remote_id in existing else None
+        summaries.append(summary)
+    TopicSummary.objects.bulk_update(summaries, ["local_name", "remote_name"])
+
+
+def set_preferred_names(apps, schema_editor):
+    Name = apps.get_model("api_v2", "Name")
+    TopicSummary = apps.get_model("api_v2", "TopicSummary")
+    batch = []
+    for summary in (
+        TopicSummary.objects.only("topic_id", "names").order_by().iterator(chunk_size=2000)
+    ):
+        types = [name["type"] for name in summary.names]
+        local_index = local_name_index(types)
+        remote_index = remote_name_index(types)
+        batch.append(
+            (
+                summary,
+                summary.names[local_index]["id"] if local_index is not None else None,
+                summary.names[remote_index]["id"] if remote_index is not None else None,
+            )
+        )
+        if len(batch) >= 2000:
+            update_batch(Name, TopicSummary, batch)
+            batch = []
+    if batch:
+        update_batch(Name, TopicSummary, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0031_attribute_value_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topicsummary',
+            name='local_name',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api_v2.Name'),
+        ),
+        migrations.AddField(
+            model_name='topicsummary',
+            name='remote_name',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api_v2.Name'),
+        ),
+        migrations.RunPython(set_preferred_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0032_topicsummary_preferred_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solrqueueitem',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='solrqueueitem',
+            name='dead',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='solrqueueitem',
+            name='last_error',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='solrqueueitem',
+            name='next_attempt',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -1,8 +1,43 @@
+import hashlib
+
 from django.db import models
 
 from .Auditable import Auditable
 
 
+def value_key(value):
+    """
+    Hash of an attribute value, for looking up attributes by an index instead
+    of comparing their full value
+    """
+    if value is None:
+        return None
+    # mapped values are not always strings, the text field stores them as such
+    return hashlib.sha1(str(value).encode("utf-8")).hexdigest()
+
+
+class ValueKeyField(models.CharField):
+    """
+    Key of the attribute value, set whenever the attribute is saved or bulk
+    created
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs["max_length"] = 40
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs["max_length"]
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = value_key(model_instance.value)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class Attribute(Auditable):
     reindex_related = ["credential"]
 
@@ -12,8 +47,26 @@ class Attribute(Auditable):
     type = models.TextField(db_index=True, default="text")
     format = models.TextField(null=True)
     value = models.TextField(null=True)
+    value_key = ValueKeyField(null=True)
 
     class Meta:
         db_table = "attribute"
         unique_together = (("credential", "type"),)
+        indexes = [
+            models.Index(fields=["type", "value_key"], name="attribute_type_value_idx")
+        ]
         ordering = ("id",)
+
+    @classmethod
+    def topic_ids(cls, type, value):
+        """
+        Ids of the topics whose latest non-revoked credentials hold an
+        attribute value, probing the (type, value_key) index
+        """
+        return cls.objects.filter(
+            type=type,
+            value_key=value_key(value),
+            value=value,
+            credential__latest=True,
+            credential__revoked=False,
+        ).values("credential__topic_id")
@@ -1,9 +1,44 @@
+import hashlib
+
 from django.db import models
 
 from .Auditable import Auditable
 from .Credential import Credential
 
 
+def name_key(text):
+    """
+    Hash of the normalised text of a name, for looking up names by an index
+    instead of comparing their full text
+    """
+    if text is None:
+        return None
+    # mapped values are not always strings, the text field stores them as such
+    normalised = " ".join(str(text).split()).casefold()
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()
+
+
+class NameKeyField(models.CharField):
+    """
+    Key of the name text, set whenever the name is saved or bulk created
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs["max_length"] = 40
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs["max_length"]
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = name_key(model_instance.text)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class Name(Auditable):
     reindex_related = ["credential"]
 
@@ -11,6 +46,7 @@ class Name(Auditable):
         Credential, related_name="names", on_delete=models.CASCADE
     )
     text = models.TextField(null=True)
+    text_key = NameKeyField(null=True, db_index=True)
     language = models.TextField(null=True)
     type = models.TextField(null=True)
 
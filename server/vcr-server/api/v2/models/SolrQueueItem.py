@@ -0,0 +1,29 @@
+from django.db import models
+
+from .Auditable import Auditable
+
+
+class SolrQueueItem(Auditable):
+    """
+    A pending Solr index update or removal, recorded by the durable Solr queue
+    until Solr has accepted it
+    """
+
+    # dotted path of the search index class
+    index_cls = models.TextField()
+    using = models.TextField(null=True)
+    remove = models.BooleanField(default=False)
+    # the row id for updates, the haystack identifier for removals
+    object_id = models.TextField()
+    # failed attempts to send the item to Solr on its own
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(null=True)
+    # the item is not sent before this time, while it is a dirty mark held to be
+    # coalesced, claimed by an indexer, or after a failed attempt
+    next_attempt = models.DateTimeField(null=True)
+    # dead letter, no longer sent to Solr and kept to be inspected or requeued
+    dead = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "solr_queue_item"
+        ordering = ("id",)
@@ -7,8 +7,6 @@ from .Attribute import Attribute
 from .Auditable import Auditable
 from .Name import Name
 
-from api.v2.utils import local_name, remote_name
-
 
 class Topic(Auditable):
 
@@ -27,6 +25,7 @@ class Topic(Auditable):
 
     _active_cred_ids = None
     _active_cred_type_ids = None
+    _preferred_names = None
 
     class Meta:
         db_table = "topic"
@@ -86,19 +85,22 @@ class Topic(Auditable):
             return Name.objects.filter(credential_id__in=creds)
         return []
 
+    def get_preferred_names(self):
+        """
+        The local and remote names of the topic, loaded once
+        """
+        if self._preferred_names is None:
+            # imported here as the summary model depends on this module
+            from .TopicSummary import TopicSummary
+
+            TopicSummary.load_preferred_names([self])
+        return self._preferred_names
+
     def get_local_name(self):
-        creds = self.get_active_credential_ids()
-        if creds:
-            names = Name.objects.filter(credential_id__in=creds)
-            return local_name(names)
-        return None
+        return self.get_preferred_names()[0]
 
     def get_remote_name(self):
-        creds = self.get_active_credential_ids()
-        if creds:
-            names = Name.objects.filter(credential_id__in=creds)
-            return remote_name(names)
-        return None
+        return self.get_preferred_names()[1]
 
     def get_active_related_to(self):
         return self.related_to.filter(
@@ -0,0 +1,200 @@
+from django.contrib.postgres import fields as contrib
+from django.db import models, transaction
+from django.db.models import F
+
+from .Address import Address
+from .Attribute import Attribute
+from .Auditable import Auditable
+from .Credential import Credential
+from .CredentialSet import CredentialSet
+from .Name import Name
+from .Topic import Topic
+
+from api.v2.utils import local_name, local_name_index, remote_name, remote_name_index
+
+
+class TopicSummary(Auditable):
+    """
+    Denormalised search result data of a topic, built from its foundational
+    credential and the names, addresses and attributes of its active credentials
+    """
+
+    topic = models.OneToOneField(
+        Topic, related_name="summary", primary_key=True, on_delete=models.CASCADE
+    )
+    credential_set = models.ForeignKey(
+        CredentialSet, related_name="+", null=True, on_delete=models.SET_NULL
+    )
+    credential_type = models.ForeignKey(
+        "CredentialType", related_name="+", null=True, on_delete=models.SET_NULL
+    )
+    inactive = models.BooleanField(null=True)
+    revoked = models.BooleanField(null=True)
+    effective_date = models.DateTimeField(null=True)
+    revoked_date = models.DateTimeField(null=True)
+
+    names = contrib.JSONField(default=list)
+    addresses = contrib.JSONField(default=list)
+    attributes = contrib.JSONField(default=list)
+
+    # preferred names among the names of the active credentials
+    local_name = models.ForeignKey(
+        Name, related_name="+", null=True, on_delete=models.SET_NULL
+    )
+    remote_name = models.ForeignKey(
+        Name, related_name="+", null=True, on_delete=models.SET_NULL
+    )
+
+    class Meta:
+        db_table = "topic_summary"
+
+    @classmethod
+    def build(cls, topic_ids) -> list:
+        """
+        Build the summaries of a set of topics with a fixed number of queries
+        """
+        topics = dict(Topic.objects.filter(id__in=topic_ids).values_list("id", "type"))
+        if not topics:
+            return []
+        summaries = {topic_id: cls(topic_id=topic_id) for topic_id in topics}
+
+        # the latest credential of the first credential set matching the topic type
+        found = set()
+        for cred_set in (
+            CredentialSet.objects.filter(
+                topic_id__in=topics, credential_type__description=F("topic__type")
+            )
+            .select_related("latest_credential")
+            .order_by("id")
+        ):
+            if cred_set.topic_id in found:
+                continue
+            found.add(cred_set.topic_id)
+            credential = cred_set.latest_credential
+            if credential:
+                summary = summaries[cred_set.topic_id]
+                summary.credential_set_id = credential.credential_set_id
+                summary.credential_type_id = credential.credential_type_id
+                summary.inactive = credential.inactive
+                summary.revoked = credential.revoked
+                summary.effective_date = credential.effective_date
+                summary.revoked_date = credential.revoked_date
+
+        active = {
+            cred_id: (topic_id, cred_type_id, cred_type_desc)
+            for cred_id, topic_id, cred_type_id, cred_type_desc in Credential.objects.filter(
+                topic_id__in=topics, latest=True, revoked=False
+            ).values_list(
+                "id", "topic_id", "credential_type_id", "credential_type__description"
+            )
+        }
+        if active:
+            for name in Name.objects.filter(credential_id__in=active).values(
+                "id", "text", "language", "type", "credential_id"
+            ):
+                summaries[active[name["credential_id"]][0]].names.append(name)
+            for address in Address.objects.filter(credential_id__in=active).values(
+                "id",
+                "addressee",
+                "civic_address",
+                "city",
+                "province",
+                "postal_code",
+                "country",
+                "credential_id",
+            ):
+                summaries[active[address["credential_id"]][0]].addresses.append(
+                    address
+                )
+            for attribute in Attribute.objects.filter(credential_id__in=active).values(
+                "id", "type", "format", "value", "credential_id"
+            ):
+                topic_id, cred_type_id, cred_type_desc = active[
+                    attribute["credential_id"]
+                ]
+                # only the attributes of credentials matching the topic type
+                if cred_type_desc == topics[topic_id]:
+                    attribute["credential_type_id"] = cred_type_id
+                    summaries[topic_id].attributes.append(attribute)
+
+        for summary in summaries.values():
+            summary.set_preferred_names()
+        return list(summaries.values())
+
+    def set_preferred_names(self):
+        """
+        Pick the local and remote names among the summarised names
+        """
+        types = [name["type"] for name in self.names]
+        local_index = local_name_index(types)
+        remote_index = remote_name_index(types)
+        self.local_name_id = (
+            self.names[local_index]["id"] if local_index is not None else None
+        )
+        self.remote_name_id = (
+            self.names[remote_index]["id"] if remote_index is not None else None
+        )
+
+    @classmethod
+    def load_preferred_names(cls, topics):
+        """
+        Set the local and remote names of a list of topics, read from their
+        summaries with a single query, or from the names of their active
+        credentials for topics which are not summarised yet
+        """
+        pending = {}
+        for topic in topics:
+            if topic._preferred_names is None:
+                pending.setdefault(topic.id, []).append(topic)
+        if not pending:
+            return
+
+        for summary in (
+            cls.objects.filter(topic_id__in=pending)
+            .select_related("local_name", "remote_name")
+            .defer("names", "addresses", "attributes")
+        ):
+            for topic in pending.pop(summary.topic_id):
+                topic._preferred_names = (summary.local_name, summary.remote_name)
+
+        if pending:
+            active_topics = dict(
+                Credential.objects.filter(
+                    topic_id__in=pending, latest=True, revoked=False
+                ).values_list("id", "topic_id")
+            )
+            topic_names = {topic_id: [] for topic_id in pending}
+            if active_topics:
+                for name in Name.objects.filter(credential_id__in=active_topics):
+                    topic_names[active_topics[name.credential_id]].append(name)
+            for topic_id, names in topic_names.items():
+                for topic in pending[topic_id]:
+                    topic._preferred_names = (local_name(names), remote_name(names))
+
+    @classmethod
+    def refresh(cls, topic_ids):
+        """
+        Rebuild and store the summaries of a set of topics
+        """
+        summaries = cls.build(set(topic_ids))
+        if not summaries:
+            return
+        fields = [
+            field.name
+            for field in cls._meta.concrete_fields
+            if not field.primary_key and field.name != "create_timestamp"
+        ]
+        with transaction.atomic():
+            existing = set(
+                cls.objects.filter(
+                    topic_id__in=[summary.topic_id for summary in summaries]
+                ).values_list("topic_id", flat=True)
+            )
+            for summary in summaries:
+                if summary.topic_id in existing:
+                    summary.save(update_fields=fields)
+            # topics summarised concurrently keep the other summary
+            cls.objects.bulk_create(
+                [summary for summary in summaries if summary.topic_id not in existing],
+                ignore_conflicts=True,
+            )
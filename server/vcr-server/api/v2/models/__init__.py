@@ -6,6 +6,8 @@ from .CredentialSet import CredentialSet
 from .CredentialType import CredentialType
 from .Name import Name
 from .Schema import Schema
+from .SolrQueueItem import SolrQueueItem
 from .Topic import Topic
 from .TopicRelationship import TopicRelationship
+from .TopicSummary import TopicSummary
 from .User import User
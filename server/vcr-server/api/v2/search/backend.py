@@ -0,0 +1,87 @@
+from haystack.backends.solr_backend import (
+    SolrEngine,
+    SolrSearchBackend,
+    SolrSearchQuery,
+)
+
+
+class CursorSolrSearchBackend(SolrSearchBackend):
+    """
+    Solr backend supporting deep paging with cursorMark
+    """
+
+    def build_search_kwargs(self, query_string, cursor_mark=None, **kwargs):
+        search_kwargs = super(CursorSolrSearchBackend, self).build_search_kwargs(
+            query_string, **kwargs
+        )
+        if cursor_mark is not None:
+            # cursors need a sort ending on the unique key and no start offset
+            search_kwargs["cursorMark"] = cursor_mark
+            search_kwargs["sort"] = "{}, id asc".format(
+                search_kwargs.get("sort") or "score desc"
+            )
+            search_kwargs.pop("start", None)
+        return search_kwargs
+
+    def _process_results(self, raw_results, *args, **kwargs):
+        results = super(CursorSolrSearchBackend, self)._process_results(
+            raw_results, *args, **kwargs
+        )
+        results["next_cursor_mark"] = getattr(raw_results, "nextCursorMark", None)
+        return results
+
+
+class CursorSolrSearchQuery(SolrSearchQuery):
+    def __init__(self, *args, **kwargs):
+        super(CursorSolrSearchQuery, self).__init__(*args, **kwargs)
+        self.cursor_mark = None
+        self._next_cursor_mark = None
+
+    def set_cursor_mark(self, cursor_mark):
+        """
+        Page from a cursor mark rather than an offset ("*" for the first page)
+        """
+        self.cursor_mark = cursor_mark
+
+    def get_next_cursor_mark(self):
+        if self._results is None:
+            self.run()
+        return self._next_cursor_mark
+
+    def build_params(self, spelling_query=None, **kwargs):
+        search_kwargs = super(CursorSolrSearchQuery, self).build_params(
+            spelling_query, **kwargs
+        )
+        if self.cursor_mark is not None:
+            search_kwargs["cursor_mark"] = self.cursor_mark
+        return search_kwargs
+
+    def run(self, spelling_query=None, **kwargs):
+        final_query = self.build_query()
+        search_kwargs = self.build_params(spelling_query, **kwargs)
+
+        if kwargs:
+            search_kwargs.update(kwargs)
+
+        results = self.backend.search(final_query, **search_kwargs)
+
+        self._results = results.get("results", [])
+        self._hit_count = results.get("hits", 0)
+        self._facet_counts = self.post_process_facets(results)
+        self._stats = results.get("stats", {})
+        self._spelling_suggestion = results.get("spelling_suggestion", None)
+        self._next_cursor_mark = results.get("next_cursor_mark")
+
+    def _reset(self):
+        super(CursorSolrSearchQuery, self)._reset()
+        self._next_cursor_mark = None
+
+    def _clone(self, klass=None, using=None):
+        clone = super(CursorSolrSearchQuery, self)._clone(klass=klass, using=using)
+        clone.cursor_mark = self.cursor_mark
+        return clone
+
+
+class CursorSolrEngine(SolrEngine):
+    backend = CursorSolrSearchBackend
+    query = CursorSolrSearchQuery
@@ -0,0 +1,133 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+LOGGER = logging.getLogger(__name__)
+
+
+# number of seconds search responses are cached (0 to disable); the index
+# generation invalidating them is kept in the cache, which must therefore be
+# shared by all server processes (see CACHES in the settings)
+SEARCH_CACHE_TIMEOUT = int(os.getenv("SEARCH_CACHE_TIMEOUT") or "0")
+
+# number of seconds facet labels are cached in each process
+FACET_LABEL_CACHE_TIMEOUT = int(os.getenv("FACET_LABEL_CACHE_TIMEOUT", "300"))
+
+INDEX_GENERATION_KEY = "search.index_generation"
+
+if SEARCH_CACHE_TIMEOUT > 0 and settings.CACHES["default"]["BACKEND"].endswith(
+    "LocMemCache"
+):
+    LOGGER.warning(
+        "Search responses are cached in a per-process cache, "
+        "and may be served after other processes update the index"
+    )
+
+
+def index_generation():
+    """
+    Return the current generation of the search index
+    """
+    generation = cache.get(INDEX_GENERATION_KEY)
+    if generation is None:
+        cache.add(INDEX_GENERATION_KEY, 0, timeout=None)
+        generation = cache.get(INDEX_GENERATION_KEY, 0)
+    return generation
+
+
+def bump_index_generation():
+    """
+    Start a new generation of the search index, once updates are committed,
+    so that cached search responses are no longer used
+    """
+    try:
+        cache.incr(INDEX_GENERATION_KEY)
+    except ValueError:
+        cache.add(INDEX_GENERATION_KEY, 1, timeout=None)
+
+
+def search_cache_key(prefix, request):
+    """
+    Build the cache key of a search request from its normalised parameters
+    """
+    params = []
+    for key in sorted(request.query_params):
+        values = sorted(value for value in request.query_params.getlist(key) if value)
+        if values:
+            params.append((key, values))
+    digest = hashlib.sha256(repr(params).encode("utf-8")).hexdigest()
+    return "search.{}.{}.{}".format(prefix, index_generation(), digest)
+
+
+def cached_response(prefix, request, get_response):
+    """
+    Return the response data cached for a search request, or get and cache it
+    """
+    if SEARCH_CACHE_TIMEOUT <= 0:
+        return get_response()
+    key = search_cache_key(prefix, request)
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+    response = get_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, SEARCH_CACHE_TIMEOUT)
+    return response
+
+
+FACET_LABEL_GENERATION_KEY = "search.facet_label_generation"
+
+_facet_labels = {}
+_facet_labels_lock = threading.Lock()
+
+
+def facet_labels(model, field, values=()):
+    """
+    Return the labels of all rows of a facet model, by string primary key
+
+    Labels are loaded again once they expire, once they are invalidated by any
+    process sharing the cache, or when one of the given values has no label.
+    Values still without a label after loading are remembered until the labels
+    expire, so that each of them triggers at most one load.
+    """
+    key = (model, field)
+    generation = cache.get(FACET_LABEL_GENERATION_KEY, 0)
+    values = {str(value) for value in values}
+    with _facet_labels_lock:
+        entry = _facet_labels.get(key)
+    missing = set()
+    if (
+        entry
+        and entry[1] == generation
+        and time.perf_counter() - entry[0] < FACET_LABEL_CACHE_TIMEOUT
+    ):
+        missing = values - entry[2].keys() - entry[3]
+        if not missing:
+            return entry[2]
+        missing |= entry[3]
+    labels = {
+        str(pk): text for pk, text in model.objects.values_list("pk", field)
+    }
+    missing = (missing | values) - labels.keys()
+    with _facet_labels_lock:
+        _facet_labels[key] = (time.perf_counter(), generation, labels, missing)
+    return labels
+
+
+def invalidate_facet_labels():
+    """
+    Drop the cached facet labels of all processes, once the issuers or
+    credential types are updated
+    """
+    with _facet_labels_lock:
+        _facet_labels.clear()
+    try:
+        cache.incr(FACET_LABEL_GENERATION_KEY)
+    except ValueError:
+        cache.add(FACET_LABEL_GENERATION_KEY, 1, timeout=None)
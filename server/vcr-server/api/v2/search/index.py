@@ -14,14 +14,26 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
         super(TxnAwareSearchIndex, self).__init__(*args, **kwargs)
         self._transaction_added = {}
         self._transaction_removed = {}
+        self._transaction_dirty = {}
         self._transaction_savepts = None
 
     def reset(self):
         LOGGER.debug("Resetting TxnAwareSearchIndex ...")
         self._transaction_added = {}
         self._transaction_removed = {}
+        self._transaction_dirty = {}
         self._transaction_savepts = None
 
+    def _queue_in_transaction(self):
+        """
+        Whether the backend queue records items in the transaction updating
+        them, so that they are committed or rolled back along with the data
+        """
+        return getattr(self._backend_queue, "transactional", False)
+
+    def _pending(self):
+        return self._transaction_added or self._transaction_removed or self._transaction_dirty
+
     def update_object(self, instance, using=None, **kwargs):
         LOGGER.debug("Updating object; %s ...", instance.id)
         conn = transaction.get_connection()
@@ -32,11 +44,14 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
             if self.should_update(instance, **kwargs):
                 if not using:
                     using = "default"
-                if using not in self._transaction_added:
-                    self._transaction_added[using] = {}
-                self._transaction_added[using][instance.id] = instance
+                if self._queue_in_transaction():
+                    self._backend_queue.add(self.__class__, using, [instance])
+                else:
+                    if using not in self._transaction_added:
+                        self._transaction_added[using] = {}
+                    self._transaction_added[using][instance.id] = instance
         else:
-            if self._transaction_added or self._transaction_removed:
+            if self._pending():
                 # previous transaction must have ended with rollback
                 self.reset()
             if self._backend_queue:
@@ -55,11 +70,14 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
                 conn.on_commit(self.transaction_committed)
             if not using:
                 using = "default"
-            if using not in self._transaction_removed:
-                self._transaction_removed[using] = {}
-            self._transaction_removed[using][instance.id] = instance
+            if self._queue_in_transaction():
+                self._backend_queue.delete(self.__class__, using, [instance])
+            else:
+                if using not in self._transaction_removed:
+                    self._transaction_removed[using] = {}
+                self._transaction_removed[using][instance.id] = instance
         else:
-            if self._transaction_added or self._transaction_removed:
+            if self._pending():
                 # previous transaction must have ended with rollback
                 self.reset()
             if self._backend_queue:
@@ -69,6 +87,47 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
                     instance, using, **kwargs
                 )
 
+    def mark_dirty(self, instance, using=None):
+        """
+        Queue an index update for the instance which may be coalesced with other
+        updates of the same instance, by the Solr queue when it supports this
+        """
+        LOGGER.debug("Marking object dirty; %s ...", instance.id)
+        if not using:
+            using = "default"
+        conn = transaction.get_connection()
+        if conn.in_atomic_block:
+            if self._transaction_savepts != conn.savepoint_ids:
+                self._transaction_savepts = conn.savepoint_ids
+                conn.on_commit(self.transaction_committed)
+            if self.should_update(instance):
+                if self._queue_in_transaction():
+                    self._queue_dirty(using, [instance])
+                else:
+                    if using not in self._transaction_dirty:
+                        self._transaction_dirty[using] = {}
+                    self._transaction_dirty[using][instance.id] = instance
+        else:
+            if self._pending():
+                # previous transaction must have ended with rollback
+                self.reset()
+            self._queue_dirty(using, [instance])
+
+    def _queue_dirty(self, using, instances):
+        if self._backend_queue and hasattr(self._backend_queue, "mark_dirty"):
+            self._backend_queue.mark_dirty(self.__class__, using, instances)
+        elif self._backend_queue:
+            self._backend_queue.add(self.__class__, using, instances)
+        else:
+            backend = self.get_backend(using)
+            if backend is not None:
+                backend.update(self, instances)
+            else:
+                LOGGER.error(
+                    "Failed to get backend.  Unable to update %d dirty Solr document(s).",
+                    len(instances),
+                )
+
     def transaction_committed(self):
         LOGGER.debug("Committing transaction(s) ...")
         conn = transaction.get_connection()
@@ -117,4 +176,19 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
                                 "Failed to get backend.  Unable to commit %d deferred Solr update(s) after transaction.",
                                 len(instances),
                             )
+
+            for using, instances in self._transaction_dirty.items():
+                added = self._transaction_added.get(using, {})
+                # instances updated by this transaction are indexed already
+                dirty = [
+                    instance
+                    for instance_id, instance in instances.items()
+                    if instance_id not in added
+                ]
+                if dirty:
+                    LOGGER.debug(
+                        "Marking %d Solr document(s) dirty after transaction",
+                        len(dirty),
+                    )
+                    self._queue_dirty(using, dirty)
             self.reset()
@@ -0,0 +1,173 @@
+from api.v2.models.Credential import Credential
+from api.v2.models.Name import Name
+from api.v2.models.TopicRelationship import TopicRelationship
+from api.v2.utils import local_name, remote_name
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _name_data(name):
+    if not name:
+        return {}
+    return {
+        "id": name.id,
+        "text": name.text or None,
+        "language": name.language or None,
+        "credential_id": name.credential_id,
+        "type": name.type,
+    }
+
+
+class CredentialSetLoader:
+    """
+    Serialize the credential sets of a topic, with their credentials, names and
+    related topics, using a fixed number of queries
+    """
+
+    def __init__(self, topic):
+        self.credential_sets = list(
+            topic.credential_sets.order_by("first_effective_date")
+        )
+        set_ids = [cred_set.id for cred_set in self.credential_sets]
+
+        self.credentials = {}
+        for credential in Credential.objects.filter(
+            credential_set_id__in=set_ids
+        ).select_related("credential_type", "topic"):
+            self.credentials.setdefault(credential.credential_set_id, []).append(
+                credential
+            )
+        cred_ids = [
+            credential.id
+            for credentials in self.credentials.values()
+            for credential in credentials
+        ]
+
+        self.names = {}
+        for name in Name.objects.filter(credential_id__in=cred_ids):
+            self.names.setdefault(name.credential_id, []).append(name)
+
+        # ordered as credential.related_topics.all()
+        self.related_topics = {}
+        for relationship in (
+            TopicRelationship.objects.filter(credential_id__in=cred_ids)
+            .select_related("related_topic")
+            .order_by("related_topic_id", "id")
+        ):
+            self.related_topics.setdefault(relationship.credential_id, []).append(
+                relationship.related_topic
+            )
+
+        topic_ids = {
+            credential.topic_id
+            for credentials in self.credentials.values()
+            for credential in credentials
+        }
+        topic_ids.update(
+            related_topic.id
+            for related_topics in self.related_topics.values()
+            for related_topic in related_topics
+        )
+        self.topic_names = self.load_active_names(topic_ids)
+        self.topics = {}
+
+    @staticmethod
+    def load_active_names(topic_ids):
+        """
+        Load the names of the active credentials of each topic, as
+        topic.get_active_names()
+        """
+        active_topics = dict(
+            Credential.objects.filter(
+                topic_id__in=topic_ids, latest=True, revoked=False
+            ).values_list("id", "topic_id")
+        )
+        topic_names = {topic_id: [] for topic_id in topic_ids}
+        if active_topics:
+            for name in Name.objects.filter(credential_id__in=active_topics):
+                topic_names[active_topics[name.credential_id]].append(name)
+        return topic_names
+
+    def topic_data(self, topic):
+        """
+        Compute the names of a topic once, however often it is referenced
+        """
+        data = self.topics.get(topic.id)
+        if data is None:
+            names = self.topic_names[topic.id]
+            data = self.topics[topic.id] = {
+                "names": [_name_data(name) for name in names],
+                "local_name": local_name(names),
+                "remote_name": remote_name(names),
+            }
+        return data
+
+    def credential_data(self, credential):
+        names = self.names.get(credential.id, [])
+        topic = self.topic_data(credential.topic)
+        return {
+            "id": credential.id,
+            "create_timestamp": credential.create_timestamp.isoformat()
+            if credential.create_timestamp else None,
+            "effective_date": credential.effective_date.isoformat()
+            if credential.effective_date else None,
+            "inactive": credential.inactive,
+            "latest": credential.latest,
+            "revoked": credential.revoked,
+            "revoked_date": credential.revoked_date.isoformat()
+            if credential.revoked_date else None,
+            "credential_id": credential.credential_id,
+            "names": [_name_data(name) for name in names],
+            "local_name": _name_data(local_name(names) or topic["local_name"]),
+            "remote_name": _name_data(remote_name(names) or topic["remote_name"]),
+            "topic": {
+                "id": credential.topic.id,
+                "source_id": credential.topic.source_id,
+                "type": credential.topic.type,
+                "local_name": _name_data(topic["local_name"]),
+                "remote_name": _name_data(topic["remote_name"]),
+            },
+            "related_topics": [
+                self.related_topic_data(related_topic)
+                for related_topic in self.related_topics.get(credential.id, [])
+            ],
+            "credential_type": {
+                "id": credential.credential_type.id,
+                "description": credential.credential_type.description,
+            },
+        }
+
+    def related_topic_data(self, related_topic):
+        topic = self.topic_data(related_topic)
+        return {
+            "id": related_topic.id,
+            "source_id": related_topic.source_id,
+            "type": related_topic.type,
+            "names": topic["names"],
+            "local_name": _name_data(topic["local_name"]),
+            "remote_name": _name_data(topic["remote_name"]),
+        }
+
+    def credential_set_data(self, credential_set):
+        return {
+            "id": credential_set.id,
+            "create_timestamp": _isoformat(credential_set.create_timestamp),
+            "update_timestamp": _isoformat(credential_set.update_timestamp),
+            "latest_credential_id": credential_set.latest_credential_id,
+            "topic_id": credential_set.topic_id,
+            "first_effective_date": _isoformat(credential_set.first_effective_date),
+            "last_effective_date": _isoformat(credential_set.last_effective_date),
+            "credentials": [
+                self.credential_data(credential)
+                for credential in self.credentials.get(credential_set.id, [])
+            ],
+        }
+
+    @property
+    def data(self):
+        return [
+            self.credential_set_data(credential_set)
+            for credential_set in self.credential_sets
+        ]
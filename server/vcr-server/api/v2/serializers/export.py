@@ -0,0 +1,219 @@
+import csv
+import json
+import os
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.v2.models.Address import Address
+from api.v2.models.Attribute import Attribute
+from api.v2.models.Credential import Credential
+from api.v2.models.Name import Name
+from api.v2.models.Topic import Topic
+
+# number of topics read from the database cursor and loaded at a time
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# number of seconds the next delta export starts before this export, to include
+# the updates of transactions still open while this export was read
+EXPORT_WATERMARK_OVERLAP = int(os.getenv("EXPORT_WATERMARK_OVERLAP", "300"))
+
+CSV_COLUMNS = (
+    "topic_id",
+    "source_id",
+    "type",
+    "topic_update_timestamp",
+    "credential_id",
+    "credential_type",
+    "effective_date",
+    "credential_update_timestamp",
+    "names",
+    "addresses",
+    "attributes",
+)
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class _Echo:
+    """
+    File-like object returning what is written, for streaming a csv.writer
+    """
+
+    def write(self, value):
+        return value
+
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def parse_since(value):
+    """
+    Parse the ISO 8601 timestamp to export the topics updated after, taken as
+    UTC when it has no time zone
+
+    Raises: ValueError when the timestamp is invalid
+    """
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is None:
+        raise ValueError("Invalid since timestamp")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.utc)
+    return since
+
+
+def export_watermark(overlap=EXPORT_WATERMARK_OVERLAP):
+    """
+    Return the timestamp to export the next delta from, taken before the export
+    is read and moved back by the overlap; a delta may therefore repeat topics
+    of the previous export, which consumers should upsert by topic id
+    """
+    return timezone.now() - timedelta(seconds=overlap)
+
+
+class TopicExporter:
+    """
+    Export topics with their active credentials, names, addresses and
+    attributes, reading the topics with a server-side cursor and loading the
+    credential data of each chunk of topics with a fixed number of queries
+    """
+
+    def __init__(self, since=None, chunk_size=EXPORT_CHUNK_SIZE):
+        self.since = since
+        self.chunk_size = chunk_size
+
+    def topic_queryset(self):
+        topics = Topic.objects.all()
+        if self.since is not None:
+            # topics whose credentials were added, revoked or updated since
+            topics = topics.filter(
+                Q(update_timestamp__gt=self.since)
+                | Q(
+                    id__in=Credential.objects.filter(
+                        update_timestamp__gt=self.since
+                    ).values("topic_id")
+                )
+            )
+        return topics.order_by("id").values(
+            "id", "source_id", "type", "create_timestamp", "update_timestamp"
+        )
+
+    def chunks(self):
+        chunk = []
+        for topic in self.topic_queryset().iterator(chunk_size=self.chunk_size):
+            chunk.append(topic)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def load_credentials(topic_ids):
+        credentials = {}
+        by_id = {}
+        for credential in (
+            Credential.objects.filter(topic_id__in=topic_ids, latest=True, revoked=False)
+            .order_by("id")
+            .values(
+                "id",
+                "topic_id",
+                "credential_id",
+                "credential_type__description",
+                "effective_date",
+                "update_timestamp",
+            )
+        ):
+            data = by_id[credential["id"]] = {
+                "credential_id": credential["credential_id"],
+                "credential_type": credential["credential_type__description"],
+                "effective_date": _isoformat(credential["effective_date"]),
+                "update_timestamp": _isoformat(credential["update_timestamp"]),
+                "names": [],
+                "addresses": [],
+                "attributes": [],
+            }
+            credentials.setdefault(credential["topic_id"], []).append(data)
+        if by_id:
+            for name in Name.objects.filter(credential_id__in=by_id).values(
+                "credential_id", "text", "language", "type"
+            ):
+                by_id[name.pop("credential_id")]["names"].append(name)
+            for address in Address.objects.filter(credential_id__in=by_id).values(
+                "credential_id",
+                "addressee",
+                "civic_address",
+                "city",
+                "province",
+                "postal_code",
+                "country",
+            ):
+                by_id[address.pop("credential_id")]["addresses"].append(address)
+            for attribute in Attribute.objects.filter(credential_id__in=by_id).values(
+                "credential_id", "type", "format", "value"
+            ):
+                by_id[attribute.pop("credential_id")]["attributes"].append(attribute)
+        return credentials
+
+    def topics(self):
+        """
+        Generate the exported data of each topic
+        """
+        for chunk in self.chunks():
+            credentials = self.load_credentials([topic["id"] for topic in chunk])
+            for topic in chunk:
+                yield {
+                    "id": topic["id"],
+                    "source_id": topic["source_id"],
+                    "type": topic["type"],
+                    "create_timestamp": _isoformat(topic["create_timestamp"]),
+                    "update_timestamp": _isoformat(topic["update_timestamp"]),
+                    "credentials": credentials.get(topic["id"], []),
+                }
+
+    def ndjson(self):
+        """
+        Generate one JSON document per line for each topic
+        """
+        for topic in self.topics():
+            yield json.dumps(topic) + "\n"
+
+    def csv(self):
+        """
+        Generate one CSV row per active credential of each topic, with its
+        names, addresses and attributes as JSON lists
+        """
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_COLUMNS)
+        for topic in self.topics():
+            topic_columns = [
+                topic["id"],
+                topic["source_id"],
+                topic["type"],
+                topic["update_timestamp"],
+            ]
+            if not topic["credentials"]:
+                yield writer.writerow(topic_columns)
+            for credential in topic["credentials"]:
+                yield writer.writerow(
+                    topic_columns
+                    + [
+                        credential["credential_id"],
+                        credential["credential_type"],
+                        credential["effective_date"],
+                        credential["update_timestamp"],
+                        json.dumps(credential["names"]),
+                        json.dumps(credential["addresses"]),
+                        json.dumps(credential["attributes"]),
+                    ]
+                )
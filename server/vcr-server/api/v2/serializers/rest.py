@@ -1,5 +1,7 @@
+from django.db.models.manager import Manager
 from rest_framework.serializers import (
     BooleanField,
+    ListSerializer,
     ModelSerializer,
     SerializerMethodField,
 )
@@ -16,6 +18,7 @@ from api.v2.models.Name import Name
 from api.v2.models.Schema import Schema
 from api.v2.models.Topic import Topic
 from api.v2.models.TopicRelationship import TopicRelationship
+from api.v2.models.TopicSummary import TopicSummary
 
 
 class IssuerSerializer(ModelSerializer):
@@ -168,12 +171,40 @@ class CredentialTopicSerializer(TopicSerializer):
         read_only_fields = fields
 
 
+class NamedTopicListSerializer(ListSerializer):
+    """
+    Load the local and remote names of all the listed topics at once
+    """
+
+    def to_representation(self, data):
+        topics = list(data.all() if isinstance(data, Manager) else data)
+        TopicSummary.load_preferred_names(topics)
+        return super(NamedTopicListSerializer, self).to_representation(topics)
+
+
+class NamedCredentialListSerializer(ListSerializer):
+    """
+    Load the local and remote names of the topics of all the listed
+    credentials at once
+    """
+
+    def to_representation(self, data):
+        credentials = list(data.all() if isinstance(data, Manager) else data)
+        TopicSummary.load_preferred_names(
+            [credential.topic for credential in credentials]
+        )
+        return super(NamedCredentialListSerializer, self).to_representation(
+            credentials
+        )
+
+
 class CredentialNamedTopicSerializer(CredentialTopicSerializer):
     names = CredentialNameSerializer(source="get_active_names", many=True)
     local_name = CredentialNameSerializer(source="get_local_name")
     remote_name = CredentialNameSerializer(source="get_remote_name")
 
     class Meta(CredentialTopicSerializer.Meta):
+        list_serializer_class = NamedTopicListSerializer
         fields = CredentialTopicSerializer.Meta.fields + (
             "names",
             "local_name",
@@ -216,13 +247,14 @@ class CredentialExtSerializer(CredentialSerializer):
     addresses = CredentialAddressSerializer(many=True)
     attributes = CredentialAttributeSerializer(many=True)
     credential_type = CredentialTypeSerializer()
-    names = CredentialNameSerializer(many=True)
+    names = CredentialNameSerializer(source="all_names", many=True)
     local_name = CredentialNameSerializer(source="get_local_name")
     remote_name = CredentialNameSerializer(source="get_remote_name")
     topic = CredentialTopicExtSerializer()
     related_topics = CredentialNamedTopicSerializer(many=True)
 
     class Meta(CredentialSerializer.Meta):
+        list_serializer_class = NamedCredentialListSerializer
         depth = 1
         fields = (
             "id",
@@ -14,6 +14,7 @@ from api.v2.models.Attribute import Attribute
 from api.v2.models.CredentialType import CredentialType
 from api.v2.models.Issuer import Issuer
 from api.v2.models.Name import Name
+from api.v2.search.cache import facet_labels
 from api.v2.search_indexes import CredentialIndex
 from api.v2.serializers.rest import (AddressSerializer, AttributeSerializer,
                                      CredentialAddressSerializer,
@@ -342,14 +343,17 @@ class CredentialFacetSerializer(HaystackFacetSerializer):
         return result
 
     def format_facets(self, field_name, facets):
+        labels = None
+        values = [facet[0] for facet in facets]
+        if field_name == "issuer_id":
+            labels = facet_labels(Issuer, "name", values)
+        elif field_name == "credential_type_id":
+            labels = facet_labels(CredentialType, "description", values)
         result = []
         for facet in facets:
             row = {"value": facet[0], "count": facet[1]}
-            # naive method - can be optimized
-            if field_name == "issuer_id":
-                row["text"] = Issuer.objects.get(pk=row["value"]).name
-            elif field_name == "credential_type_id":
-                row["text"] = CredentialType.objects.get(pk=row["value"]).description
+            if labels is not None:
+                row["text"] = labels.get(str(row["value"]))
             result.append(row)
         return result
 
@@ -1,6 +1,20 @@
+from django.apps import apps
+from haystack.exceptions import NotHandled
 from haystack.signals import RealtimeSignalProcessor
 from api.v2.models.CredentialSet import CredentialSet
 
+
+def mark_dirty(instance):
+    """
+    Mark the search documents of a model instance as out of date. Repeated
+    marks are coalesced into one index update, see TxnAwareSearchIndex.mark_dirty.
+    Does nothing unless real-time indexing is enabled.
+    """
+    processor = apps.get_app_config("haystack").signal_processor
+    if isinstance(processor, RelatedRealtimeSignalProcessor):
+        processor.mark_dirty(instance)
+
+
 class RelatedRealtimeSignalProcessor(RealtimeSignalProcessor):
     reindex_related = True
 
@@ -32,27 +46,46 @@ class RelatedRealtimeSignalProcessor(RealtimeSignalProcessor):
         return True
 
     def handle_save(self, sender, instance, **kwargs):
+        self.mark_related_dirty(instance)
+        return super(RelatedRealtimeSignalProcessor, self).handle_save(
+            sender, instance, **kwargs
+        )
+
+    def mark_related_dirty(self, instance):
+        """
+        Mark the related objects of a saved instance for a coalesced reindex,
+        so that a burst of saves reindexes a topic once
+        """
         if self.reindex_related and hasattr(instance, "reindex_related"):
             if self.check_if_reindex(instance):
                 for related in instance.reindex_related:
                     related_obj = getattr(instance, related)
-                    related_objs = None
 
                     # Possible that the relationship is one or many.
                     # Handle both.
                     try:
-                        related_objs = related_obj.all()
+                        related_objs = list(related_obj.all())
                     except AttributeError:
-                        pass
+                        related_objs = [related_obj] if related_obj else []
 
-                    if related_objs:
-                        for related_obj in related_objs:
-                            self.handle_save(related_obj.__class__, related_obj)
-                    else:
-                        self.handle_save(related_obj.__class__, related_obj)
-        return super(RelatedRealtimeSignalProcessor, self).handle_save(
-            sender, instance, **kwargs
-        )
+                    for related_obj in related_objs:
+                        self.mark_related_dirty(related_obj)
+                        self.mark_dirty(related_obj)
+
+    def mark_dirty(self, instance):
+        using_backends = self.connection_router.for_write(instance=instance)
+
+        for using in using_backends:
+            try:
+                index = self.connections[using].get_unified_index().get_index(
+                    instance.__class__
+                )
+            except NotHandled:
+                continue
+            if hasattr(index, "mark_dirty"):
+                index.mark_dirty(instance, using=using)
+            else:
+                index.update_object(instance, using=using)
 
     def handle_delete(self, sender, instance, **kwargs):
         if self.reindex_related and hasattr(instance, "reindex_related"):
@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from api.v2.search.backend import CursorSolrSearchBackend
+
+
+class CursorSolrSearchBackendTest(SimpleTestCase):
+    def setUp(self):
+        self.backend = CursorSolrSearchBackend(
+            "default", URL="http://localhost:8983/solr/test"
+        )
+
+    def test_offset_search_kwargs(self):
+        kwargs = self.backend.build_search_kwargs(
+            "*:*", sort_by="score desc", start_offset=20, end_offset=30
+        )
+        assert kwargs["start"] == 20
+        assert kwargs["rows"] == 10
+        assert kwargs["sort"] == "score desc"
+        assert "cursorMark" not in kwargs
+
+    def test_cursor_search_kwargs(self):
+        kwargs = self.backend.build_search_kwargs(
+            "*:*", cursor_mark="*", start_offset=0, end_offset=10
+        )
+        assert kwargs["cursorMark"] == "*"
+        assert kwargs["rows"] == 10
+        assert kwargs["sort"] == "score desc, id asc"
+        assert "start" not in kwargs
@@ -0,0 +1,121 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from agent_webhooks.utils.issuer import IssuerManager
+from api.v2.models.Issuer import Issuer
+from api.v2.search import cache as search_cache
+from api.v2.serializers.search import CredentialFacetSerializer
+
+
+class SearchCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        search_cache.invalidate_facet_labels()
+        self.factory = APIRequestFactory()
+
+    def request(self, query):
+        return Request(self.factory.get("/api/v4/search/topic" + query))
+
+    def test_search_cache_key(self):
+        key = search_cache.search_cache_key("v4.topic", self.request("?q=abc&type_id=2&type_id=1"))
+        # parameter order and empty values do not change the key
+        assert key == search_cache.search_cache_key(
+            "v4.topic", self.request("?type_id=1&inactive=&q=abc&type_id=2")
+        )
+        assert key != search_cache.search_cache_key("v4.topic", self.request("?q=abd"))
+
+        search_cache.bump_index_generation()
+        assert key != search_cache.search_cache_key(
+            "v4.topic", self.request("?q=abc&type_id=2&type_id=1")
+        )
+
+    @patch("api.v2.search.cache.SEARCH_CACHE_TIMEOUT", 300)
+    def test_cached_response(self):
+        get_response = MagicMock(return_value=Response({"total": 1}))
+        for _ in range(2):
+            response = search_cache.cached_response("v4.topic", self.request("?q=a"), get_response)
+            assert response.data == {"total": 1}
+        get_response.assert_called_once()
+
+        search_cache.bump_index_generation()
+        search_cache.cached_response("v4.topic", self.request("?q=a"), get_response)
+        assert get_response.call_count == 2
+
+    def test_cached_response_disabled(self):
+        # disabled by default, since the cache is not shared between processes
+        assert search_cache.SEARCH_CACHE_TIMEOUT == 0
+        get_response = MagicMock(return_value=Response({"total": 1}))
+        for _ in range(2):
+            search_cache.cached_response("v4.topic", self.request("?q=a"), get_response)
+        assert get_response.call_count == 2
+
+    def test_facet_labels(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did:456",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        assert search_cache.facet_labels(Issuer, "name") == {str(issuer.id): "Test Issuer"}
+        with self.assertNumQueries(0):
+            search_cache.facet_labels(Issuer, "name")
+
+        search_cache.invalidate_facet_labels()
+        with self.assertNumQueries(1):
+            search_cache.facet_labels(Issuer, "name")
+
+        # another process invalidated the labels
+        cache.incr(search_cache.FACET_LABEL_GENERATION_KEY)
+        with self.assertNumQueries(1):
+            search_cache.facet_labels(Issuer, "name")
+
+        # a value without a label yet reloads the labels once
+        with self.assertNumQueries(1):
+            labels = search_cache.facet_labels(Issuer, "name", ["0"])
+        assert "0" not in labels
+        # and not again until the labels expire, unless another value is missing
+        with self.assertNumQueries(0):
+            search_cache.facet_labels(Issuer, "name", ["0", str(issuer.id)])
+        with self.assertNumQueries(1):
+            search_cache.facet_labels(Issuer, "name", ["0", "-1"])
+        with self.assertNumQueries(0):
+            search_cache.facet_labels(Issuer, "name", ["-1"])
+            search_cache.facet_labels(Issuer, "name", ["0"])
+        with patch.object(search_cache, "FACET_LABEL_CACHE_TIMEOUT", 0):
+            with self.assertNumQueries(1):
+                search_cache.facet_labels(Issuer, "name", ["0"])
+
+    def test_credential_facet_labels(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did:456",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        serializer = CredentialFacetSerializer()
+        facets = [(str(issuer.id), 3)]
+        serializer.format_facets("issuer_id", facets)
+        with self.assertNumQueries(0):
+            assert serializer.format_facets("issuer_id", facets) == [
+                {"value": str(issuer.id), "count": 3, "text": "Test Issuer"}
+            ]
+
+        with patch("agent_webhooks.utils.issuer.transaction.on_commit") as on_commit:
+            IssuerManager().update_issuer(
+                {
+                    "did": issuer.did,
+                    "name": "Renamed Issuer",
+                    "abbreviation": "TI",
+                    "email": "test@issuer.io",
+                    "url": "http://www.issuer.fake.io",
+                }
+            )
+        on_commit.call_args[0][0]()
+        assert serializer.format_facets("issuer_id", facets)[0]["text"] == "Renamed Issuer"
@@ -0,0 +1,130 @@
+from unittest.mock import MagicMock
+
+from django.test import TestCase
+
+from api.v2.models.Address import Address
+from api.v2.models.Attribute import Attribute
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialSet import CredentialSet
+from api.v2.models.CredentialType import CredentialType
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Name import Name
+from api.v2.models.Schema import Schema
+from api.v2.models.Topic import Topic
+from api.v2.models.TopicSummary import TopicSummary
+from api.v4.serializers.search.topic import SearchSerializer
+
+
+class TopicSummaryTest(TestCase):
+    def setUp(self):
+        schema = Schema.objects.create(
+            name="registration", version="1.0.0", origin_did="not:a:did:123"
+        )
+        issuer = Issuer.objects.create(
+            did="not:a:did:123",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        self.cred_type = CredentialType.objects.create(
+            schema=schema, issuer=issuer, description="registration"
+        )
+        other_schema = Schema.objects.create(
+            name="business_number", version="1.0.0", origin_did="not:a:did:123"
+        )
+        other_type = CredentialType.objects.create(
+            schema=other_schema, issuer=issuer, description="business_number"
+        )
+
+        self.topic = Topic.objects.create(source_id="BC0001", type="registration")
+        self.cred_set = CredentialSet.objects.create(
+            credential_type=self.cred_type, topic=self.topic
+        )
+        Credential.objects.create(
+            topic=self.topic,
+            credential_set=self.cred_set,
+            credential_type=self.cred_type,
+            credential_id="cred-1",
+            revoked=True,
+        )
+        self.cred = Credential.objects.create(
+            topic=self.topic,
+            credential_set=self.cred_set,
+            credential_type=self.cred_type,
+            credential_id="cred-2",
+            latest=True,
+        )
+        self.cred_set.latest_credential = self.cred
+        self.cred_set.save()
+        other_cred = Credential.objects.create(
+            topic=self.topic,
+            credential_type=other_type,
+            credential_id="cred-3",
+            latest=True,
+        )
+
+        self.name = Name.objects.create(
+            credential=self.cred, text="Entity Name", type="entity_name"
+        )
+        self.address = Address.objects.create(credential=self.cred, city="Victoria")
+        self.attribute = Attribute.objects.create(
+            credential=self.cred, type="entity_status", value="ACT"
+        )
+        Attribute.objects.create(
+            credential=other_cred, type="business_number", value="123"
+        )
+
+    def test_build(self):
+        with self.assertNumQueries(6):
+            (summary,) = TopicSummary.build([self.topic.id])
+
+        assert summary.topic_id == self.topic.id
+        assert summary.credential_set_id == self.cred_set.id
+        assert summary.credential_type_id == self.cred_type.id
+        assert summary.revoked is False
+        assert [name["text"] for name in summary.names] == ["Entity Name"]
+        assert summary.local_name_id == self.name.id
+        assert summary.remote_name_id is None
+        assert [address["city"] for address in summary.addresses] == ["Victoria"]
+        # only the attributes of credentials matching the topic type
+        assert summary.attributes == [
+            {
+                "id": self.attribute.id,
+                "type": "entity_status",
+                "format": self.attribute.format,
+                "value": "ACT",
+                "credential_id": self.cred.id,
+                "credential_type_id": self.cred_type.id,
+            }
+        ]
+
+    def test_search_representation(self):
+        (summary,) = TopicSummary.build([self.topic.id])
+        self.topic.summary = summary
+        data = SearchSerializer().to_representation(MagicMock(object=self.topic))
+
+        assert list(data) == list(SearchSerializer.Meta.fields)
+        assert data["id"] == self.topic.id
+        assert data["names"] == summary.names
+        assert data["credential_set"]["id"] == self.cred_set.id
+        assert data["credential_type"]["description"] == "registration"
+        assert data["effective_date"] is not None
+        assert data["revoked_date"] is None
+
+    def test_preferred_names(self):
+        assumed = Name.objects.create(
+            credential=self.cred, text="Assumed Name", type="entity_name_assumed"
+        )
+        (summary,) = TopicSummary.build([self.topic.id])
+        assert summary.local_name_id == assumed.id
+        assert summary.remote_name_id == self.name.id
+
+        # computed from the active names when the topics are not summarised
+        topics = [Topic.objects.get(pk=self.topic.id) for _ in range(2)]
+        with self.assertNumQueries(3):
+            TopicSummary.load_preferred_names(topics)
+        with self.assertNumQueries(0):
+            for topic in topics:
+                assert topic.get_local_name() == assumed
+                assert topic.get_remote_name() == self.name
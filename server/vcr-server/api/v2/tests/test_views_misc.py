@@ -1,9 +1,24 @@
+import csv
+import io
+import json
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.http import HttpRequest, JsonResponse
 from django.test import TestCase
-
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialType import CredentialType
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Name import Name
+from api.v2.models.Schema import Schema
+from api.v2.models.Topic import Topic
+from api.v2.serializers.export import EXPORT_WATERMARK_OVERLAP
+from api.v2.utils import log_timing_method
 from api.v2.views import misc
+from vcr_server.utils import metrics
 
 # TODO: figure out why the request.POST dictionary gets reset, thus making the test fail
 # class Misc_Feedback_TestCase(TestCase):
@@ -105,3 +120,114 @@ class Misc_Quickload_TestCase(TestCase):
             ).content,
             "The JsonResponse should match.",
         )
+
+
+class Misc_ExportTopics_TestCase(TestCase):
+    def setUp(self):
+        schema = Schema.objects.create(
+            name="registration", version="1.0.0", origin_did="not:a:did:123"
+        )
+        issuer = Issuer.objects.create(
+            did="not:a:did:123",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        cred_type = CredentialType.objects.create(
+            schema=schema, issuer=issuer, description="registration"
+        )
+        self.topic = Topic.objects.create(source_id="BC0001", type="registration")
+        self.other = Topic.objects.create(source_id="BC0002", type="registration")
+        credential = Credential.objects.create(
+            topic=self.topic,
+            credential_type=cred_type,
+            credential_id="cred-1",
+            latest=True,
+        )
+        Credential.objects.create(
+            topic=self.topic,
+            credential_type=cred_type,
+            credential_id="cred-0",
+            revoked=True,
+        )
+        Name.objects.create(credential=credential, text="Entity Name", type="entity_name")
+
+    def export(self, **params):
+        response = self.client.get("/api/v2/export/topic", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("X-Export-Timestamp", response)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_export_ndjson(self):
+        topics = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([topic["source_id"] for topic in topics], ["BC0001", "BC0002"])
+        (credential,) = topics[0]["credentials"]
+        self.assertEqual(credential["credential_id"], "cred-1")
+        self.assertEqual(credential["names"][0]["text"], "Entity Name")
+        self.assertEqual(topics[1]["credentials"], [])
+
+    def test_export_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(output="csv"))))
+        self.assertEqual([row["source_id"] for row in rows], ["BC0001", "BC0002"])
+        self.assertEqual(rows[0]["credential_type"], "registration")
+        self.assertEqual(json.loads(rows[0]["names"])[0]["text"], "Entity Name")
+
+    def test_export_since(self):
+        since = timezone.now() - timedelta(hours=1)
+        Topic.objects.filter(id=self.other.id).update(update_timestamp=since)
+        Credential.objects.filter(topic=self.topic).update(update_timestamp=since)
+        Topic.objects.filter(id=self.topic.id).update(update_timestamp=since)
+        self.assertEqual(self.export(since=timezone.now().isoformat()), "")
+
+        Credential.objects.filter(credential_id="cred-0").update(
+            update_timestamp=timezone.now()
+        )
+        topics = [
+            json.loads(line)
+            for line in self.export(since=(since + timedelta(minutes=1)).isoformat()).splitlines()
+        ]
+        self.assertEqual([topic["source_id"] for topic in topics], ["BC0001"])
+
+    def test_export_watermark(self):
+        start = timezone.now()
+        response = self.client.get("/api/v2/export/topic")
+        watermark = parse_datetime(response["X-Export-Timestamp"])
+        # the next delta overlaps this export
+        overlap = timedelta(seconds=EXPORT_WATERMARK_OVERLAP)
+        self.assertLessEqual(start - overlap, watermark)
+        self.assertLessEqual(watermark, timezone.now() - overlap)
+        topics = [
+            json.loads(line)
+            for line in self.export(since=watermark.isoformat()).splitlines()
+        ]
+        self.assertEqual([topic["source_id"] for topic in topics], ["BC0001", "BC0002"])
+
+    def test_export_invalid(self):
+        response = self.client.get("/api/v2/export/topic", {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/v2/export/topic", {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+
+class Misc_Status_TestCase(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        log_timing_method("agent_callback", 1.0, 1.25, True)
+
+    def tearDown(self):
+        metrics.registry.reset()
+
+    def test_status(self):
+        response = self.client.get("/api/v2/status")
+        timing = response.json()["agent_callback"]
+        assert timing["total_count"] == 1
+        assert timing["p99_time"] == 0.25
+
+    def test_metrics(self):
+        response = self.client.get("/api/v2/metrics")
+        assert response["Content-Type"].startswith("text/plain")
+        assert (
+            'vcr_method_duration_seconds_count{method="agent_callback"} 1'
+            in response.content.decode()
+        )
@@ -3,9 +3,14 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialSet import CredentialSet
 from api.v2.models.CredentialType import CredentialType
 from api.v2.models.Issuer import Issuer
+from api.v2.models.Name import Name
 from api.v2.models.Schema import Schema
+from api.v2.models.Topic import Topic
+from api.v2.models.TopicRelationship import TopicRelationship
 
 
 @modify_settings(
@@ -219,3 +224,108 @@ class CredentialTypeViewSetTest(APITestCase):
 
         response2 = self.client.get(url + "/2/logo")
         self.assertEqual(response2.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@modify_settings(
+    MIDDLEWARE={"remove": "app.middleware.routing.HTTPHeaderRoutingMiddleware"}
+)
+class TopicViewSetTest(APITestCase):
+    def setUp(self):
+        schema = Schema.objects.create(
+            name="registration", version="1.0.0", origin_did="not:a:did:123"
+        )
+        issuer = Issuer.objects.create(
+            did="not:a:did:123",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        cred_type = CredentialType.objects.create(
+            schema=schema, issuer=issuer, description="registration"
+        )
+
+        self.topic = Topic.objects.create(source_id="BC0001", type="registration")
+        self.related = Topic.objects.create(source_id="FM0001", type="registration")
+        cred_set = CredentialSet.objects.create(
+            credential_type=cred_type, topic=self.topic
+        )
+        self.old_cred = Credential.objects.create(
+            topic=self.topic,
+            credential_set=cred_set,
+            credential_type=cred_type,
+            credential_id="cred-1",
+        )
+        self.cred = Credential.objects.create(
+            topic=self.topic,
+            credential_set=cred_set,
+            credential_type=cred_type,
+            credential_id="cred-2",
+            latest=True,
+        )
+        related_cred = Credential.objects.create(
+            topic=self.related,
+            credential_type=cred_type,
+            credential_id="cred-3",
+            latest=True,
+        )
+        self.entity_name = Name.objects.create(
+            credential=self.cred, text="Entity Name", type="entity_name"
+        )
+        self.assumed_name = Name.objects.create(
+            credential=self.cred, text="Assumed Name", type="entity_name_assumed"
+        )
+        self.related_name = Name.objects.create(
+            credential=related_cred, text="Related Name", type="entity_name"
+        )
+        TopicRelationship.objects.create(
+            credential=self.cred, topic=self.topic, related_topic=self.related
+        )
+
+    def test_list_credential_sets(self):
+        url = reverse("v2:topic-list")
+        with self.assertNumQueries(7):
+            response = self.client.get(url + "/{}/credentialset".format(self.topic.id))
+            data = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(data), 1)
+        old_cred, cred = data[0]["credentials"]
+
+        # credentials without names fall back to the names of the topic
+        self.assertEqual(old_cred["id"], self.old_cred.id)
+        self.assertEqual(old_cred["names"], [])
+        self.assertEqual(old_cred["local_name"]["id"], self.assumed_name.id)
+        self.assertEqual(old_cred["remote_name"]["id"], self.entity_name.id)
+
+        self.assertEqual(
+            [name["text"] for name in cred["names"]], ["Entity Name", "Assumed Name"]
+        )
+        self.assertEqual(cred["local_name"]["text"], "Assumed Name")
+        self.assertEqual(cred["remote_name"]["text"], "Entity Name")
+        self.assertEqual(cred["topic"]["local_name"]["text"], "Assumed Name")
+        self.assertEqual(cred["credential_type"]["description"], "registration")
+
+        related_topic = cred["related_topics"][0]
+        self.assertEqual(related_topic["source_id"], "FM0001")
+        self.assertEqual(related_topic["names"][0]["id"], self.related_name.id)
+        self.assertEqual(related_topic["local_name"]["text"], "Related Name")
+        self.assertEqual(related_topic["remote_name"], {})
+
+    def test_list_topics_by_cursor(self):
+        url = reverse("v2:topic-list")
+        response = self.client.get(url, {"cursor": "*", "page_size": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIn("cursor={}".format(self.topic.id), response.data["next"])
+
+        response = self.client.get(
+            url, {"cursor": self.topic.id, "page_size": 1, "count": "false"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["total"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get(url, {"cursor": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
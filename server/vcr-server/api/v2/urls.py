@@ -9,7 +9,7 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
 from api.v2.views import misc, rest, search
-from api.v2.utils import get_stats, clear_stats
+from api.v2.utils import get_metrics, get_stats, clear_stats
 
 app_name = "api_v2"
 
@@ -50,8 +50,10 @@ router.register(r"search/autocomplete",
 miscPatterns = [
     path("feedback", misc.send_feedback),
     path("quickload", misc.quickload),
+    path("export/topic", misc.export_topics),
     path("status/reset", clear_stats),
     path("status", get_stats),
+    path("metrics", get_metrics),
 ]
 
 swaggerPatterns = [
@@ -4,11 +4,7 @@ A collection of utility classes for TOB
 
 import logging
 import os
-import threading
 from datetime import datetime, timedelta
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 import time
 import json
 
@@ -18,7 +14,7 @@ from subscriptions.models import CredentialHookStats
 from django.conf import settings
 from django.forms.models import model_to_dict
 from django.db import connection
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from drf_yasg.utils import swagger_auto_schema
 from haystack.query import SearchQuerySet
 from pysolr import SolrError
@@ -29,6 +25,9 @@ from rest_framework.decorators import (
     permission_classes,
 )
 
+from vcr_server.utils import metrics
+from vcr_server.utils.http import DEFAULT_TIMEOUT, get_session
+
 LOGGER = logging.getLogger(__name__)
 DT_FMT = '%Y-%m-%d %H:%M:%S.%f%z'
 
@@ -40,9 +39,6 @@ TRACE_TAG = os.getenv("TRACE_TAG", "acapy.events")
 TRACE_LOG_TARGET = "log"
 TRACE_TARGET = os.getenv("TRACE_TARGET", TRACE_LOG_TARGET)
 
-timing_lock = threading.Lock()
-timings = {}
-
 
 def fetch_custom_settings(*args):
     _values = {}
@@ -132,13 +128,33 @@ def solr_counts():
 @authentication_classes(())
 @permission_classes((permissions.AllowAny,))
 def clear_stats(request, *args, **kwargs):
-    global timings
-    timing_lock.acquire()
-    try:
-        timings = {}
-        return JsonResponse({"success": True})
-    finally:
-        timing_lock.release()
+    metrics.registry.reset()
+    return JsonResponse({"success": True})
+
+
+def hook_worker_stats():
+    stats = {}
+    if "subscriptions" in settings.INSTALLED_APPS:
+        # Only add hook stats IF the module is enabled/in use
+        for item in CredentialHookStats.objects.all():
+            stats[item.worker_id] = {
+                "total_count": item.total_count,
+                "attempt_count": item.attempt_count,
+                "success_count": item.success_count,
+                "fail_count": item.fail_count,
+                "retry_count": item.retry_count,
+                "retry_fail_count": item.retry_fail_count
+            }
+    return stats
+
+
+def queue_stats():
+    if "agent_webhooks" in settings.INSTALLED_APPS:
+        # imported here as the credential queue depends on this module
+        from agent_webhooks.utils.ingest import credential_queue_depths
+
+        return credential_queue_depths()
+    return {}
 
 
 @swagger_auto_schema(
@@ -148,64 +164,44 @@ def clear_stats(request, *args, **kwargs):
 @authentication_classes(())
 @permission_classes((permissions.AllowAny,))
 def get_stats(request, *args, **kwargs):
-    global timings
-    timing_lock.acquire()
-    try:
-        hook_worker_stats = {}
-        if "subscriptions" in settings.INSTALLED_APPS:
-            # Only add hook stats IF the module is enabled/in use
-            for item in CredentialHookStats.objects.all():
-                hook_worker_stats[f"web_hook.worker_stats.{item.worker_id}"] = {
-                    "total_count": item.total_count,
-                    "attempt_count": item.attempt_count,
-                    "success_count": item.success_count,
-                    "fail_count": item.fail_count,
-                    "retry_count": item.retry_count,
-                    "retry_fail_count": item.retry_fail_count
-                }
-        return JsonResponse({**timings, **hook_worker_stats})
-    finally:
-        timing_lock.release()
+    stats = metrics.registry.stats()
+    for worker_id, item in hook_worker_stats().items():
+        stats[f"web_hook.worker_stats.{worker_id}"] = item
+    for partition, depths in queue_stats().items():
+        stats[f"credential_queue.partition.{partition}"] = depths
+    return JsonResponse(stats)
+
 
+@swagger_auto_schema(
+    method="get",
+    operation_id="api_v2_metrics",
+    operation_description="Metrics in the Prometheus text exposition format",
+)
+@api_view(["GET"])
+@authentication_classes(())
+@permission_classes((permissions.AllowAny,))
+def get_metrics(request, *args, **kwargs):
+    gauges = {}
+    for worker_id, item in hook_worker_stats().items():
+        for key, value in item.items():
+            gauges.setdefault("web_hook_" + key, []).append(
+                ({"worker": worker_id}, value)
+            )
+    for partition, depths in queue_stats().items():
+        for key, value in depths.items():
+            gauges.setdefault("credential_queue_" + key, []).append(
+                ({"partition": partition}, value)
+            )
+    return HttpResponse(
+        metrics.registry.exposition(gauges),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
-def log_timing_method(method, start_time, end_time, success, data=None):
-    global timings
 
+def log_timing_method(method, start_time, end_time, success):
     if not RECORD_TIMINGS:
         return
-
-    timing_lock.acquire()
-    try:
-        elapsed_time = end_time - start_time
-        if method not in timings:
-            timings[method] = {
-                "total_count": 1,
-                "success_count": 1 if success else 0,
-                "fail_count": 0 if success else 1,
-                "min_time": elapsed_time,
-                "max_time": elapsed_time,
-                "total_time": elapsed_time,
-                "avg_time": elapsed_time,
-                "data": {},
-            }
-        else:
-            timings[method]["total_count"] = timings[method]["total_count"] + 1
-            if success:
-                timings[method]["success_count"] = timings[method]["success_count"] + 1
-            else:
-                timings[method]["fail_count"] = timings[method]["fail_count"] + 1
-            if elapsed_time > timings[method]["max_time"]:
-                timings[method]["max_time"] = elapsed_time
-            if elapsed_time < timings[method]["min_time"]:
-                timings[method]["min_time"] = elapsed_time
-            timings[method]["total_time"] = timings[method]["total_time"] + elapsed_time
-            timings[method]["avg_time"] = (
-                timings[method]["total_time"] / timings[method]["total_count"]
-            )
-        if data:
-            timings[method]["data"][str(timings[method]["total_count"])] = data
-    finally:
-        timing_lock.release()
+    metrics.registry.observe(method, end_time - start_time, success)
 
 
 def log_timing_event(method, message, start_time, end_time, success):
@@ -235,28 +231,14 @@ def log_timing_event(method, message, start_time, end_time, success):
         "ellapsed_milli": int(1000 * (end_time - start_time)) if end_time else 0,
         "outcome": outcome,
     }
-    event_str = json.dumps(event)
 
-    try:
-        if TRACE_TARGET == TRACE_LOG_TARGET:
-            # write to standard log file
-            LOGGER.setLevel(logging.INFO)
-            LOGGER.info(" %s %s", TRACE_TAG, event_str)
-        else:
-            # should be an http endpoint
-            _ = requests.post(
-                TRACE_TARGET + TRACE_TAG,
-                data=event_str,
-                headers={"Content-Type": "application/json"}
-            )
-    except Exception as e:
-        LOGGER.error(
-            "Error logging trace target: %s tag: %s event: %s",
-            TRACE_TARGET,
-            TRACE_TAG,
-            event_str
-        )
-        LOGGER.exception(e)
+    if TRACE_TARGET == TRACE_LOG_TARGET:
+        # write to standard log file
+        LOGGER.setLevel(logging.INFO)
+        LOGGER.info(" %s %s", TRACE_TAG, json.dumps(event))
+    else:
+        # should be an http endpoint, events are sent in batches in the background
+        metrics.get_trace_exporter(TRACE_TARGET + TRACE_TAG).submit(event)
 
 
 def call_agent_with_retry(agent_url, post_method=True, payload=None, headers=None, retry_count=5, retry_wait=1):
@@ -264,37 +246,19 @@ def call_agent_with_retry(agent_url, post_method=True, payload=None, headers=Non
     Post with retry - if returned status is 503 (or other select errors) unavailable retry a few times.
     """
     try:
-        session = requests.Session()
-        retry = Retry(
-            total=retry_count,
-            connect=retry_count,
-            status=retry_count,
-            status_forcelist=[
-                429,  # too many requests
-                500,  # Internal server error
-                502,  # Bad gateway
-                503,  # Service unavailable
-                504   # Gateway timeout
-            ],
-            method_whitelist=['HEAD', 'TRACE', 'GET',
-                              'POST', 'PUT', 'OPTIONS', 'DELETE'],
-            read=0,
-            redirect=0,
-            backoff_factor=retry_wait
-        )
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
+        session = get_session(agent_url, retry_count, retry_wait)
         if post_method:
             resp = session.post(
                 agent_url,
                 json=payload,
                 headers=headers,
+                timeout=DEFAULT_TIMEOUT,
             )
         else:
             resp = session.get(
                 agent_url,
                 headers=headers,
+                timeout=DEFAULT_TIMEOUT,
             )
         return resp
     except Exception as e:
@@ -302,37 +266,48 @@ def call_agent_with_retry(agent_url, post_method=True, payload=None, headers=Non
         raise
 
 
+# name types preferred as the local name of a topic or credential, in order
+LOCAL_NAME_TYPES = ("display_name", "entity_name_assumed", "entity_name")
+
+
+def local_name_index(types):
+    """
+    Position of the preferred local name in a list of name types
+    """
+    if len(types) == 0:
+        return None
+    for type in LOCAL_NAME_TYPES:
+        if type in types:
+            return types.index(type)
+    # Take the first one
+    return 0
+
+
+def remote_name_index(types):
+    """
+    Position of the remote name in a list of name types
+    """
+    if 'entity_name_assumed' in types and 'entity_name' in types:
+        return types.index('entity_name')
+    return None
+
+
 def local_name(names=[]):
     if len(names) == 0:
         return None
     try:
-        types = [name.type for name in names]
-        local_name = None
-        # Order matters here
-        for type in ['display_name', 'entity_name_assumed', 'entity_name']:
-            if type in types:
-                local_name = names[types.index(type)]
-                break
-        if not local_name:
-            # Take the first one
-            local_name = names[0]
-        return local_name
+        return names[local_name_index([name.type for name in names])]
     except Exception as e:
         LOGGER.error("Exception was raised: " + str(e))
         return None
 
 
-
 def remote_name(names=[]):
     if len(names) == 0:
         return None
     try:
-        types = [name.type for name in names]
-        remote_name = None
-        if 'entity_name_assumed' in types and 'entity_name' in types:
-            remote_name = names[types.index('entity_name')]
-        return remote_name
+        index = remote_name_index([name.type for name in names])
+        return names[index] if index is not None else None
     except Exception as e:
         LOGGER.error("Exception was raised: " + str(e))
         return None
-
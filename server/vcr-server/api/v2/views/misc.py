@@ -2,7 +2,7 @@ import logging
 
 from django.conf import settings
 from django.db import connection
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import permissions
@@ -21,6 +21,12 @@ from api.v2.models.CredentialType import CredentialType
 from api.v2.models.Issuer import Issuer
 from api.v2.models.Topic import Topic
 from api.v2.models.Name import Name
+from api.v2.serializers.export import (
+    EXPORT_CONTENT_TYPES,
+    TopicExporter,
+    export_watermark,
+    parse_since,
+)
 from api.v2.utils import model_counts, record_count, solr_counts
 
 LOGGER = logging.getLogger(__name__)
@@ -103,3 +109,60 @@ def send_feedback(request, *args, **kwargs):
     comments = request.POST.get("comments")
     email_feedback(from_name, from_email, reason, comments)
     return JsonResponse({"status": "ok"})
+
+
+@swagger_auto_schema(
+    method="get",
+    operation_id="api_v2_export_topic",
+    operation_description="Stream all topics with their active credentials, "
+    "names, addresses and attributes",
+    manual_parameters=[
+        openapi.Parameter(
+            "output",
+            openapi.IN_QUERY,
+            description="Export format",
+            type=openapi.TYPE_STRING,
+            enum=list(EXPORT_CONTENT_TYPES),
+            default="ndjson",
+        ),
+        openapi.Parameter(
+            "since",
+            openapi.IN_QUERY,
+            description="Only export topics updated after this ISO 8601 timestamp; "
+            "the X-Export-Timestamp header of an export is the next value to use, "
+            "and overlaps the export so that deltas may repeat topics",
+            type=openapi.TYPE_STRING,
+            format=openapi.FORMAT_DATETIME,
+        ),
+    ],
+)
+@api_view(["GET"])
+@authentication_classes(())
+@permission_classes((permissions.AllowAny,))
+def export_topics(request, *args, **kwargs):
+    """
+    The aiohttp server buffers the whole body of a WSGI response, so it serves
+    this path itself with vcr_server.utils.exportstream; this view streams the
+    export under other WSGI servers
+    """
+    output = request.GET.get("output", "ndjson")
+    if output not in EXPORT_CONTENT_TYPES:
+        return JsonResponse({"detail": "Unsupported output format"}, status=400)
+
+    since = request.GET.get("since")
+    if since:
+        try:
+            since = parse_since(since)
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+
+    export_timestamp = export_watermark()
+    exporter = TopicExporter(since=since)
+    response = StreamingHttpResponse(
+        getattr(exporter, output)(), content_type=EXPORT_CONTENT_TYPES[output]
+    )
+    response["Content-Disposition"] = 'attachment; filename="topics.{}"'.format(
+        output
+    )
+    response["X-Export-Timestamp"] = export_timestamp.isoformat()
+    return response
@@ -19,10 +19,20 @@ class AddressIndex(TxnAwareSearchIndex, indexes.Indexable):
     address_country = indexes.CharField(model_attr="country", null=True)
     address_credential_inactive = indexes.BooleanField()
     address_credential_revoked = indexes.BooleanField()
+    # display fields of autocomplete results, stored but not indexed
+    address_topic_source_id = indexes.CharField(indexed=False)
+    address_topic_type = indexes.CharField(indexed=False)
+    address_credential_id = indexes.CharField(indexed=False)
+    address_credential_type = indexes.CharField(indexed=False, null=True)
 
     def get_model(self):
         return AddressModel
 
+    def index_queryset(self, using=None):
+        return AddressModel.objects.select_related(
+            "credential__topic", "credential__credential_type"
+        )
+
     @staticmethod
     def prepare_address_credential_inactive(obj):
         return obj.credential.inactive
@@ -31,5 +41,21 @@ class AddressIndex(TxnAwareSearchIndex, indexes.Indexable):
     def prepare_address_credential_revoked(obj):
         return obj.credential.revoked
 
+    @staticmethod
+    def prepare_address_topic_source_id(obj):
+        return obj.credential.topic.source_id
+
+    @staticmethod
+    def prepare_address_topic_type(obj):
+        return obj.credential.topic.type
+
+    @staticmethod
+    def prepare_address_credential_id(obj):
+        return obj.credential.credential_id
+
+    @staticmethod
+    def prepare_address_credential_type(obj):
+        return obj.credential.credential_type.description
+
     def get_updated_field(self):
         return "update_timestamp"
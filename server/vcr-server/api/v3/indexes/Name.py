@@ -15,10 +15,20 @@ class NameIndex(TxnAwareSearchIndex, indexes.Indexable):
     name_type = indexes.CharField(model_attr="type")
     name_credential_inactive = indexes.BooleanField()
     name_credential_revoked = indexes.BooleanField()
+    # display fields of autocomplete results, stored but not indexed
+    name_topic_source_id = indexes.CharField(indexed=False)
+    name_topic_type = indexes.CharField(indexed=False)
+    name_credential_id = indexes.CharField(indexed=False)
+    name_credential_type = indexes.CharField(indexed=False, null=True)
 
     def get_model(self):
         return NameModel
 
+    def index_queryset(self, using=None):
+        return NameModel.objects.select_related(
+            "credential__topic", "credential__credential_type"
+        )
+
     @staticmethod
     def prepare_name_credential_inactive(obj):
         return obj.credential.inactive
@@ -27,5 +37,21 @@ class NameIndex(TxnAwareSearchIndex, indexes.Indexable):
     def prepare_name_credential_revoked(obj):
         return obj.credential.revoked
 
+    @staticmethod
+    def prepare_name_topic_source_id(obj):
+        return obj.credential.topic.source_id
+
+    @staticmethod
+    def prepare_name_topic_type(obj):
+        return obj.credential.topic.type
+
+    @staticmethod
+    def prepare_name_credential_id(obj):
+        return obj.credential.credential_id
+
+    @staticmethod
+    def prepare_name_credential_type(obj):
+        return obj.credential.credential_type.description
+
     def get_updated_field(self):
         return "update_timestamp"
@@ -1,13 +1,108 @@
 import logging
 
+from django.db.models import Count, F, Q, QuerySet
+from django.db.models.query import ModelIterable
 from haystack import indexes
 
+from api.v2.models.Address import Address
+from api.v2.models.Attribute import Attribute
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialSet import CredentialSet
+from api.v2.models.Name import Name
 from api.v2.models.Topic import Topic as TopicModel
 from api.v2.search.index import TxnAwareSearchIndex
 
 LOGGER = logging.getLogger(__name__)
 
 
+def load_topic_index_data(topics):
+    """
+    Load the data indexed for a batch of topics with a fixed number of
+    queries, and attach it to each topic as `_index_data`
+    """
+    topics = {topic.id: topic for topic in topics}
+    if not topics:
+        return
+    data = {
+        topic_id: {
+            "foundational_credential": None,
+            "categories": [],
+            "names": [],
+            "addresses": [],
+            "credential_type_ids": set(),
+            "all_credentials_inactive": True,
+            "all_credentials_revoked": True,
+        }
+        for topic_id in topics
+    }
+
+    # the first credential set of each topic matching the topic type
+    foundational = {}
+    for cred_set in (
+        CredentialSet.objects.filter(
+            topic_id__in=topics, credential_type__description=F("topic__type")
+        )
+        .select_related("latest_credential__credential_type")
+        .order_by("id")
+    ):
+        if cred_set.topic_id not in foundational:
+            foundational[cred_set.topic_id] = cred_set.latest_credential
+    found_topics = {}
+    for topic_id, credential in foundational.items():
+        data[topic_id]["foundational_credential"] = credential
+        if credential:
+            found_topics[credential.id] = topic_id
+    if found_topics:
+        for cred_id, cat_type, cat_value in Attribute.objects.filter(
+            credential_id__in=found_topics, format="category"
+        ).values_list("credential_id", "type", "value"):
+            data[found_topics[cred_id]]["categories"].append(f"{cat_type}::{cat_value}")
+
+    active_topics = {}
+    for cred_id, topic_id, cred_type_id in Credential.objects.filter(
+        topic_id__in=topics, latest=True, revoked=False
+    ).values_list("id", "topic_id", "credential_type_id"):
+        active_topics[cred_id] = topic_id
+        data[topic_id]["credential_type_ids"].add(cred_type_id)
+    if active_topics:
+        for cred_id, text in Name.objects.filter(
+            credential_id__in=active_topics
+        ).values_list("credential_id", "text"):
+            data[active_topics[cred_id]]["names"].append(text)
+        for cred_id, civic_address in Address.objects.filter(
+            credential_id__in=active_topics
+        ).values_list("credential_id", "civic_address"):
+            data[active_topics[cred_id]]["addresses"].append(civic_address)
+
+    for row in (
+        Credential.objects.filter(topic_id__in=topics)
+        .values("topic_id")
+        .annotate(
+            active=Count("id", filter=Q(inactive=False)),
+            unrevoked=Count("id", filter=Q(revoked=False)),
+        )
+        .order_by()
+    ):
+        data[row["topic_id"]]["all_credentials_inactive"] = row["active"] == 0
+        data[row["topic_id"]]["all_credentials_revoked"] = row["unrevoked"] == 0
+
+    for topic_id, topic in topics.items():
+        topic._index_data = data[topic_id]
+
+
+class TopicIndexQuerySet(QuerySet):
+    """
+    Topic queryset which loads the indexed data of each fetched batch of
+    topics in bulk, in the same way as prefetch_related
+    """
+
+    def _fetch_all(self):
+        loaded = self._result_cache is not None
+        super(TopicIndexQuerySet, self)._fetch_all()
+        if not loaded and self._iterable_class is ModelIterable:
+            load_topic_index_data(self._result_cache)
+
+
 class TopicIndex(TxnAwareSearchIndex, indexes.Indexable):
     document = indexes.CharField(document=True)
 
@@ -22,36 +117,79 @@ class TopicIndex(TxnAwareSearchIndex, indexes.Indexable):
     topic_credential_type_id = indexes.MultiValueField()
     topic_all_credentials_inactive = indexes.BooleanField()
     topic_all_credentials_revoked = indexes.BooleanField()
+    # display fields of autocomplete results, stored but not indexed
+    topic_type = indexes.CharField(model_attr="type", indexed=False)
+    topic_credential_id = indexes.CharField(indexed=False, null=True)
+    topic_credential_type = indexes.CharField(indexed=False, null=True)
 
     def get_model(self):
         return TopicModel
 
+    def index_queryset(self, using=None):
+        return TopicIndexQuerySet(model=TopicModel)
+
+    def read_queryset(self, using=None):
+        # search results are hydrated from the topic summary, not the index data
+        return TopicModel.objects.select_related(
+            "summary__credential_set",
+            "summary__credential_type__issuer",
+            "summary__credential_type__schema",
+        )
+
+    @staticmethod
+    def get_foundational_credential(obj):
+        index_data = getattr(obj, "_index_data", None)
+        if index_data is not None:
+            return index_data["foundational_credential"]
+        return obj.foundational_credential
+
     @staticmethod
     def prepare_topic_issuer_id(obj):
-        if obj.foundational_credential:
-            return obj.foundational_credential.credential_type.issuer_id
+        foundational_credential = TopicIndex.get_foundational_credential(obj)
+        if foundational_credential:
+            return foundational_credential.credential_type.issuer_id
         return None
 
     @staticmethod
     def prepare_topic_type_id(obj):
-        if obj.foundational_credential:
-            return obj.foundational_credential.credential_type_id
+        foundational_credential = TopicIndex.get_foundational_credential(obj)
+        if foundational_credential:
+            return foundational_credential.credential_type_id
         return None
 
     @staticmethod
     def prepare_topic_inactive(obj):
-        if obj.foundational_credential:
-            return obj.foundational_credential.inactive
+        foundational_credential = TopicIndex.get_foundational_credential(obj)
+        if foundational_credential:
+            return foundational_credential.inactive
         return None
 
     @staticmethod
     def prepare_topic_revoked(obj):
-        if obj.foundational_credential:
-            return obj.foundational_credential.revoked
+        foundational_credential = TopicIndex.get_foundational_credential(obj)
+        if foundational_credential:
+            return foundational_credential.revoked
+        return None
+
+    @staticmethod
+    def prepare_topic_credential_id(obj):
+        foundational_credential = TopicIndex.get_foundational_credential(obj)
+        if foundational_credential:
+            return foundational_credential.credential_id
+        return None
+
+    @staticmethod
+    def prepare_topic_credential_type(obj):
+        foundational_credential = TopicIndex.get_foundational_credential(obj)
+        if foundational_credential:
+            return foundational_credential.credential_type.description
         return None
 
     @staticmethod
     def prepare_topic_category(obj):
+        index_data = getattr(obj, "_index_data", None)
+        if index_data is not None:
+            return index_data["categories"]
         if obj.foundational_credential:
             return [
                 f"{cat.type}::{cat.value}" for cat in obj.foundational_credential.all_categories
@@ -60,6 +198,9 @@ class TopicIndex(TxnAwareSearchIndex, indexes.Indexable):
 
     @staticmethod
     def prepare_topic_name(obj):
+        index_data = getattr(obj, "_index_data", None)
+        if index_data is not None:
+            return index_data["names"]
         # May need to expand this to inactive credentials
         return [
             name.text for name in obj.get_active_names()
@@ -67,6 +208,9 @@ class TopicIndex(TxnAwareSearchIndex, indexes.Indexable):
 
     @staticmethod
     def prepare_topic_address(obj):
+        index_data = getattr(obj, "_index_data", None)
+        if index_data is not None:
+            return index_data["addresses"]
         # May need to expand this to inactive credentials
         return [
             address.civic_address for address in obj.get_active_addresses()
@@ -74,6 +218,9 @@ class TopicIndex(TxnAwareSearchIndex, indexes.Indexable):
 
     @staticmethod
     def prepare_topic_credential_type_id(obj):
+        index_data = getattr(obj, "_index_data", None)
+        if index_data is not None:
+            return list(index_data["credential_type_ids"])
         # May need to expand this to inactive credentials
         credential_type_ids = obj.get_active_credential_type_ids()
         if credential_type_ids:
@@ -82,19 +229,17 @@ class TopicIndex(TxnAwareSearchIndex, indexes.Indexable):
 
     @staticmethod
     def prepare_topic_all_credentials_inactive(obj):
-        all_creds_inactive = True
-        for credential in obj.credentials.all():
-            if not credential.inactive:
-                all_creds_inactive = False
-        return all_creds_inactive
+        index_data = getattr(obj, "_index_data", None)
+        if index_data is not None:
+            return index_data["all_credentials_inactive"]
+        return not obj.credentials.filter(inactive=False).exists()
 
     @staticmethod
     def prepare_topic_all_credentials_revoked(obj):
-        all_creds_revoked = True
-        for credential in obj.credentials.all():
-            if not credential.revoked:
-                all_creds_revoked = False
-        return all_creds_revoked
+        index_data = getattr(obj, "_index_data", None)
+        if index_data is not None:
+            return index_data["all_credentials_revoked"]
+        return not obj.credentials.filter(revoked=False).exists()
 
     def get_updated_field(self):
         return "update_timestamp"
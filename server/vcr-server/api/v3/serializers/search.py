@@ -1,4 +1,5 @@
 import logging
+import os
 
 from abc import abstractmethod
 
@@ -18,6 +19,12 @@ from api.v2.serializers.rest import (
 
 logger = logging.getLogger(__name__)
 
+# read the display fields of autocomplete results from the fields stored in
+# the search index, instead of loading the indexed records from the database
+AUTOCOMPLETE_STORED_FIELDS = (
+    os.getenv("AUTOCOMPLETE_STORED_FIELDS", "false").lower() == "true"
+)
+
 
 class AriesSearchSerializer(HaystackSerializer):
 
@@ -30,6 +37,9 @@ class AriesSearchSerializer(HaystackSerializer):
     credential_type = SerializerMethodField()
     credential_id = SerializerMethodField()
 
+    # prefix of the display fields stored in the search index
+    stored_field_prefix = None
+
     @staticmethod
     @abstractmethod
     def get_type(obj):
@@ -45,21 +55,33 @@ class AriesSearchSerializer(HaystackSerializer):
     def get_value(obj):
         pass
 
-    @staticmethod
-    def get_topic_source_id(obj):
+    @classmethod
+    def get_stored_field(cls, obj, name):
+        return getattr(obj, cls.stored_field_prefix + name, None)
+
+    @classmethod
+    def get_topic_source_id(cls, obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            return cls.get_stored_field(obj, "topic_source_id")
         return obj.object.credential.topic.source_id
 
     # DEPRECATED
-    @staticmethod
-    def get_topic_type(obj):
+    @classmethod
+    def get_topic_type(cls, obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            return cls.get_stored_field(obj, "topic_type")
         return obj.object.credential.topic.type
 
-    @staticmethod
-    def get_credential_id(obj):
+    @classmethod
+    def get_credential_id(cls, obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            return cls.get_stored_field(obj, "credential_id")
         return obj.object.credential.credential_id
 
-    @staticmethod
-    def get_credential_type(obj):
+    @classmethod
+    def get_credential_type(cls, obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            return cls.get_stored_field(obj, "credential_type")
         return obj.object.credential.credential_type.description
 
     class Meta:
@@ -75,6 +97,7 @@ class AriesAutocompleteSerializer(AriesSearchSerializer):
 
 
 class NameAutocompleteSerializer(AriesAutocompleteSerializer):
+    stored_field_prefix = "name_"
 
     @staticmethod
     def get_type(obj):
@@ -95,6 +118,7 @@ class NameAutocompleteSerializer(AriesAutocompleteSerializer):
 
 
 class AddressAutocompleteSerializer(AriesAutocompleteSerializer):
+    stored_field_prefix = "address_"
 
     @staticmethod
     def get_type(obj):
@@ -130,19 +154,28 @@ class TopicAutocompleteSerializer(AriesAutocompleteSerializer):
 
     @staticmethod
     def get_topic_source_id(obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            return obj.topic_source_id
         return obj.object.source_id
 
     # DEPRECATED
     @staticmethod
     def get_topic_type(obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            # documents indexed before the field was added do not store it
+            return getattr(obj, "topic_type", None)
         return obj.object.type
 
     @staticmethod
     def get_credential_id(obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            return getattr(obj, "topic_credential_id", None)
         return obj.object.foundational_credential.credential_id
 
     @staticmethod
     def get_credential_type(obj):
+        if AUTOCOMPLETE_STORED_FIELDS:
+            return getattr(obj, "topic_credential_type", None)
         return obj.object.foundational_credential.credential_type.description
 
     class Meta(TopicSerializer.Meta):
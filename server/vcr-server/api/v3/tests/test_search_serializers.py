@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from api.v2.models.Address import Address
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialSet import CredentialSet
+from api.v2.models.CredentialType import CredentialType
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Name import Name
+from api.v2.models.Schema import Schema
+from api.v2.models.Topic import Topic
+from api.v3.indexes.Address import AddressIndex
+from api.v3.indexes.Name import NameIndex
+from api.v3.indexes.Topic import TopicIndex
+from api.v3.serializers.search import (
+    AddressAutocompleteSerializer,
+    NameAutocompleteSerializer,
+    TopicAutocompleteSerializer,
+)
+
+DISPLAY_FIELDS = ("topic_source_id", "topic_type", "credential_id", "credential_type")
+EXPECTED = ("BC0001", "registration", "cred-1", "registration")
+
+
+def display_fields(serializer, obj):
+    return tuple(getattr(serializer, "get_" + field)(obj) for field in DISPLAY_FIELDS)
+
+
+class AutocompleteSerializerTest(TestCase):
+    def setUp(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did:456",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        schema = Schema.objects.create(
+            name="registration", version="0.0.1", origin_did="not:a:did:456"
+        )
+        # the foundational credential type matches the topic type
+        cred_type = CredentialType.objects.create(
+            schema=schema, issuer=issuer, description="registration"
+        )
+        self.topic = Topic.objects.create(source_id="BC0001", type="registration")
+        cred_set = CredentialSet.objects.create(
+            topic=self.topic, credential_type=cred_type
+        )
+        cred = Credential.objects.create(
+            topic=self.topic,
+            credential_set=cred_set,
+            credential_type=cred_type,
+            credential_id="cred-1",
+            latest=True,
+        )
+        cred_set.latest_credential = cred
+        cred_set.save()
+        self.name = Name.objects.create(credential=cred, text="Acme", type="entity_name")
+        self.address = Address.objects.create(credential=cred, civic_address="1 Main St")
+
+    def test_prepare_stored_fields(self):
+        assert (
+            NameIndex.prepare_name_topic_source_id(self.name),
+            NameIndex.prepare_name_topic_type(self.name),
+            NameIndex.prepare_name_credential_id(self.name),
+            NameIndex.prepare_name_credential_type(self.name),
+        ) == EXPECTED
+        assert (
+            AddressIndex.prepare_address_topic_source_id(self.address),
+            AddressIndex.prepare_address_topic_type(self.address),
+            AddressIndex.prepare_address_credential_id(self.address),
+            AddressIndex.prepare_address_credential_type(self.address),
+        ) == EXPECTED
+        assert (
+            TopicIndex.prepare_topic_credential_id(self.topic),
+            TopicIndex.prepare_topic_credential_type(self.topic),
+        ) == EXPECTED[2:]
+
+    @patch("api.v3.serializers.search.AUTOCOMPLETE_STORED_FIELDS", False)
+    def test_database_fields(self):
+        assert display_fields(
+            NameAutocompleteSerializer, SimpleNamespace(object=self.name)
+        ) == EXPECTED
+        assert display_fields(
+            AddressAutocompleteSerializer, SimpleNamespace(object=self.address)
+        ) == EXPECTED
+        assert display_fields(
+            TopicAutocompleteSerializer, SimpleNamespace(object=self.topic)
+        ) == EXPECTED
+
+    @patch("api.v3.serializers.search.AUTOCOMPLETE_STORED_FIELDS", True)
+    def test_stored_fields(self):
+        name_result = SimpleNamespace(
+            **{"name_" + field: value for field, value in zip(DISPLAY_FIELDS, EXPECTED)}
+        )
+        address_result = SimpleNamespace(
+            **{"address_" + field: value for field, value in zip(DISPLAY_FIELDS, EXPECTED)}
+        )
+        topic_result = SimpleNamespace(
+            topic_source_id="BC0001",
+            topic_type="registration",
+            topic_credential_id="cred-1",
+            topic_credential_type="registration",
+        )
+        with self.assertNumQueries(0):
+            assert display_fields(NameAutocompleteSerializer, name_result) == EXPECTED
+            assert display_fields(AddressAutocompleteSerializer, address_result) == EXPECTED
+            assert display_fields(TopicAutocompleteSerializer, topic_result) == EXPECTED
+
+        # documents indexed before the stored fields were added
+        assert display_fields(
+            TopicAutocompleteSerializer, SimpleNamespace(topic_source_id="BC0001")
+        ) == ("BC0001", None, None, None)
+        assert display_fields(NameAutocompleteSerializer, SimpleNamespace()) == (
+            None,
+            None,
+            None,
+            None,
+        )
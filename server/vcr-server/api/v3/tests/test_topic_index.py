@@ -0,0 +1,132 @@
+from django.test import TestCase
+
+from api.v2.models.Address import Address
+from api.v2.models.Attribute import Attribute
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialSet import CredentialSet
+from api.v2.models.CredentialType import CredentialType
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Name import Name
+from api.v2.models.Schema import Schema
+from api.v2.models.Topic import Topic
+from api.v3.indexes.Topic import TopicIndex, TopicIndexQuerySet
+
+
+def sorted_values(document):
+    return {
+        field: sorted(value) if isinstance(value, list) else value
+        for field, value in document.items()
+    }
+
+
+class TopicIndexTest(TestCase):
+    def setUp(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did:456",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        self.cred_types = {}
+        for name in ("registration", "permit"):
+            schema = Schema.objects.create(
+                name=name, version="0.0.1", origin_did="not:a:did:456"
+            )
+            # the foundational credential type matches the topic type
+            self.cred_types[name] = CredentialType.objects.create(
+                schema=schema, issuer=issuer, description=name
+            )
+        self.index = TopicIndex()
+
+    def make_credential(self, topic, cred_type, idx, **kwargs):
+        cred_set = CredentialSet.objects.create(topic=topic, credential_type=cred_type)
+        cred = Credential.objects.create(
+            topic=topic,
+            credential_set=cred_set,
+            credential_type=cred_type,
+            credential_id="{}-{}-{}".format(topic.source_id, cred_type.description, idx),
+            latest=True,
+            **kwargs
+        )
+        cred_set.latest_credential = cred
+        cred_set.save()
+        Name.objects.create(
+            credential=cred, text="Name {}".format(cred.credential_id), type="entity_name"
+        )
+        Address.objects.create(
+            credential=cred, civic_address="{} Main St".format(cred.credential_id)
+        )
+        Attribute.objects.create(
+            credential=cred, type="entity_status", format="category", value="ACT"
+        )
+        return cred
+
+    def make_topics(self, count, offset=0):
+        topics = []
+        for idx in range(offset, offset + count):
+            topic = Topic.objects.create(
+                source_id="BC{:04d}".format(idx), type="registration"
+            )
+            self.make_credential(topic, self.cred_types["registration"], idx)
+            self.make_credential(topic, self.cred_types["permit"], idx)
+            topics.append(topic)
+        return topics
+
+    def prepare(self, topics):
+        return {
+            topic.id: sorted_values(self.index.full_prepare(topic)) for topic in topics
+        }
+
+    def test_bulk_prepare(self):
+        topics = self.make_topics(2)
+
+        # only credentials of a type other than the topic type
+        topic = Topic.objects.create(source_id="BC1000", type="registration")
+        self.make_credential(topic, self.cred_types["permit"], 0)
+        topics.append(topic)
+
+        # all credentials revoked and inactive
+        topic = Topic.objects.create(source_id="BC1001", type="registration")
+        self.make_credential(
+            topic, self.cred_types["registration"], 0, revoked=True, inactive=True
+        )
+        self.make_credential(
+            topic, self.cred_types["permit"], 0, revoked=True, inactive=True
+        )
+        topics.append(topic)
+
+        # a topic without any credential
+        topics.append(Topic.objects.create(source_id="BC1002", type="registration"))
+
+        ids = [topic.id for topic in topics]
+        expected = self.prepare(Topic.objects.filter(pk__in=ids))
+        loaded = list(TopicIndexQuerySet(model=Topic).filter(pk__in=ids))
+        with self.assertNumQueries(0):
+            prepared = self.prepare(loaded)
+        assert prepared == expected
+
+        assert expected[topics[0].id]["topic_name"]
+        assert expected[topics[0].id]["topic_category"] == ["entity_status::ACT"]
+        assert expected[topics[2].id]["topic_type_id"] is None
+        assert expected[topics[2].id]["topic_category"] == []
+        assert expected[topics[2].id]["topic_name"]
+        assert expected[topics[3].id]["topic_revoked"]
+        assert expected[topics[3].id]["topic_all_credentials_inactive"]
+        assert expected[topics[3].id]["topic_all_credentials_revoked"]
+        assert expected[topics[3].id]["topic_name"] == []
+        assert expected[topics[4].id]["topic_issuer_id"] is None
+        assert expected[topics[4].id]["topic_all_credentials_revoked"]
+
+    def test_bulk_load_queries(self):
+        few = self.make_topics(2)
+        many = self.make_topics(10, offset=2)
+
+        # the topics, then the credential sets, categories, active credentials,
+        # names, addresses and credential counts of the batch
+        for topics in (few, many):
+            ids = [topic.id for topic in topics]
+            with self.assertNumQueries(7):
+                loaded = list(TopicIndexQuerySet(model=Topic).filter(pk__in=ids))
+            with self.assertNumQueries(0):
+                self.prepare(loaded)
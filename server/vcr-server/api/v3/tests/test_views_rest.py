@@ -0,0 +1,99 @@
+from django.test import modify_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.v2.models.Attribute import Attribute, value_key
+from api.v2.models.Credential import Credential
+from api.v2.models.CredentialType import CredentialType
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Schema import Schema
+from api.v2.models.Topic import Topic
+
+
+@modify_settings(
+    MIDDLEWARE={"remove": "app.middleware.routing.HTTPHeaderRoutingMiddleware"}
+)
+class TopicAttributeViewTest(APITestCase):
+    def setUp(self):
+        issuer = Issuer.objects.create(
+            did="not:a:did:456",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        schema = Schema.objects.create(
+            name="test-schema", version="0.0.1", origin_did="not:a:did:456"
+        )
+        cred_type = CredentialType.objects.create(
+            schema=schema, issuer=issuer, credential_def_id="123456"
+        )
+
+        def add_credential(topic, number, latest=True, revoked=False):
+            cred = Credential.objects.create(
+                topic=topic,
+                credential_type=cred_type,
+                credential_id="cred-{}".format(Credential.objects.count()),
+                latest=latest,
+                revoked=revoked,
+            )
+            Attribute.objects.create(
+                credential=cred, type="business_number", value=number
+            )
+
+        self.topics = [
+            Topic.objects.create(source_id="BC000{}".format(idx), type="registration")
+            for idx in range(4)
+        ]
+        # two matching credentials of the same topic
+        add_credential(self.topics[0], "123456789")
+        add_credential(self.topics[0], "123456789")
+        add_credential(self.topics[1], "123456789")
+        # superseded and revoked credentials are not matched
+        add_credential(self.topics[2], "123456789", latest=False)
+        add_credential(self.topics[3], "123456789", revoked=True)
+
+    def test_topic_ids(self):
+        assert Attribute.objects.first().value_key == value_key("123456789")
+        topics = Topic.objects.filter(
+            id__in=Attribute.topic_ids("business_number", "123456789")
+        )
+        assert sorted(topics.values_list("id", flat=True)) == [
+            self.topics[0].id,
+            self.topics[1].id,
+        ]
+        assert not Attribute.topic_ids("registration_id", "123456789").exists()
+
+    def test_non_string_value(self):
+        # processors such as is_historical map booleans and numbers
+        cred = Credential.objects.get(topic=self.topics[1])
+        Attribute.objects.bulk_create(
+            [Attribute(credential=cred, type="is_historical", value=False)]
+        )
+        Attribute.objects.create(credential=cred, type="employees", value=12)
+        assert sorted(
+            cred.attributes.exclude(type="business_number").values_list(
+                "value", "value_key"
+            )
+        ) == [("12", value_key("12")), ("False", value_key("False"))]
+        assert list(
+            Topic.objects.filter(id__in=Attribute.topic_ids("is_historical", "False"))
+        ) == [self.topics[1]]
+
+    def test_topic_attribute(self):
+        url = "/api/v3/search/topic/attribute/business_number::123456789"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get(url, {"cursor": "*", "page_size": 1})
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIn("cursor={}".format(self.topics[0].id), response.data["next"])
+
+        response = self.client.get(url, {"cursor": self.topics[0].id, "page_size": 1})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get("/api/v3/search/topic/attribute/business_number")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
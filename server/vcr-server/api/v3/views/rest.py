@@ -17,6 +17,7 @@ from rest_framework.viewsets import ReadOnlyModelViewSet, GenericViewSet
 from rest_framework.views import APIView
 
 from api.v2.utils import apply_custom_methods, call_agent_with_retry
+from api.v2.models.Attribute import Attribute
 from api.v2.models.Credential import Credential
 from api.v2.models.CredentialType import CredentialType
 from api.v2.models.Issuer import Issuer
@@ -34,6 +35,8 @@ from api.v2.serializers.rest import (
     TopicSerializer,
 )
 
+from vcr_server.pagination import EnhancedPageNumberPagination
+
 from .viewsets import RetriveOnlyModelViewSet
 from ..mixins import MultipleFieldLookupMixin
 
@@ -118,7 +121,15 @@ class InvalidTopicAttributeQuery(APIException):
 
 
 class TopicAttributeView(APIView):
+    """
+    Topics with a latest non-revoked credential holding an attribute value,
+    ordered by id. Up to 200 topics are returned as a list, or pages of topics
+    when a `cursor` is requested.
+    """
+
     queryset = Topic.objects.all()
+    pagination_class = EnhancedPageNumberPagination
+    result_limit = 200
 
     def get(self, request, attribute_query):
         attributes_query = attribute_query.split('::')
@@ -126,10 +137,14 @@ class TopicAttributeView(APIView):
             raise InvalidTopicAttributeQuery()
 
         topics = self.queryset.filter(
-            credentials__attributes__type=attributes_query[0],
-            credentials__attributes__value=attributes_query[1],
-        )[:200]
-        serializer = TopicSerializer(topics, many=True)
+            id__in=Attribute.topic_ids(attributes_query[0], attributes_query[1])
+        ).order_by("id")
+        paginator = self.pagination_class()
+        if paginator.cursor_query_param in request.query_params:
+            page = paginator.paginate_keyset(topics, request)
+            serializer = TopicSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        serializer = TopicSerializer(topics[: self.result_limit], many=True)
         return Response(serializer.data)
 
 
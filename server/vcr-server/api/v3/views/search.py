@@ -30,6 +30,7 @@ from api.v3.search_filters import (
     StatusFilter as AutocompleteStatusFilter,
 )
 from api.v3.serializers.search import (
+    AUTOCOMPLETE_STORED_FIELDS,
     AggregateAutocompleteSerializer,
 )
 
@@ -102,7 +103,8 @@ class AggregateAutocompleteView(AriesHaystackViewSet):
         return ret
 
     index_models = [Address, Name, Topic]
-    load_all = True
+    # the serializers only need the stored fields when these are enabled
+    load_all = not AUTOCOMPLETE_STORED_FIELDS
     serializer_class = AggregateAutocompleteSerializer
     filter_backends = (AutocompleteFilter, AutocompleteStatusFilter)
     ordering = "-score"
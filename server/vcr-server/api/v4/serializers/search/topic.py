@@ -1,6 +1,7 @@
 import logging
 from collections import OrderedDict
 
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework.serializers import BooleanField, CharField, DateTimeField, IntegerField, SerializerMethodField
 from drf_haystack.serializers import HaystackSerializer, HaystackFacetSerializer
 
@@ -10,6 +11,7 @@ from api.v2.models.CredentialType import CredentialType
 from api.v2.models.Issuer import Issuer
 from api.v2.models.Name import Name
 from api.v2.models.Topic import Topic
+from api.v2.search.cache import facet_labels
 
 from api.v2.serializers.rest import (
     AddressSerializer,
@@ -94,6 +96,46 @@ class SearchSerializer(HaystackSerializer):
         # HaystackFilter fields
         search_fields = ("score")
 
+    def to_representation(self, instance):
+        summary = self.get_summary(instance.object)
+        if summary is None:
+            return super().to_representation(instance)
+        return self.summary_representation(instance.object, summary)
+
+    @staticmethod
+    def get_summary(topic):
+        if topic is None:
+            return None
+        try:
+            return topic.summary
+        except ObjectDoesNotExist:
+            return None
+
+    def summary_representation(self, topic, summary):
+        """
+        Serialize a topic from its stored summary rather than from its credentials
+        """
+
+        def related(field_name, value):
+            if value is None:
+                return None
+            return self.fields[field_name].to_representation(value)
+
+        return OrderedDict((
+            ("id", topic.id),
+            ("source_id", topic.source_id),
+            ("type", topic.type),
+            ("names", summary.names),
+            ("addresses", summary.addresses),
+            ("attributes", summary.attributes),
+            ("credential_set", related("credential_set", summary.credential_set)),
+            ("credential_type", related("credential_type", summary.credential_type)),
+            ("inactive", summary.inactive),
+            ("revoked", summary.revoked),
+            ("effective_date", related("effective_date", summary.effective_date)),
+            ("revoked_date", related("revoked_date", summary.revoked_date)),
+        ))
+
 
 class FacetSerializer(CredentialFacetSerializer):
 
@@ -121,13 +163,10 @@ class FacetSerializer(CredentialFacetSerializer):
             Model, field_selector = CredentialType, "description"
 
         if Model and field_selector:
-            rows = Model.objects.filter(pk__in=values)
-            if len(rows):
-                text = {
-                    field_name: {
-                        str(row['id']): row[field_selector] for row in rows.values()
-                    }
-                }
+            labels = facet_labels(Model, field_selector, values)
+            rows = {value: labels[value] for value in values if value in labels}
+            if rows:
+                text = {field_name: rows}
 
         return text
 
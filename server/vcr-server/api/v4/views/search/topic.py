@@ -16,6 +16,7 @@ from api.v2.search.filters import (
 )
 
 from api.v2.models.Topic import Topic
+from api.v2.search.cache import cached_response
 
 from api.v3.views.search import (
     AriesHaystackViewSet,
@@ -78,6 +79,7 @@ class SearchView(AriesHaystackViewSet, FacetMixin):
     facet_objects_serializer_class = SearchSerializer
     ordering_fields = ("effective_date", "revoked_date", "score")
     ordering = "-score"
+    load_all = True
 
     # Backends need to be added in the order of filter operations to be applied
     filter_backends = [
@@ -97,12 +99,21 @@ class SearchView(AriesHaystackViewSet, FacetMixin):
     ]
 
     @swagger_auto_schema(manual_parameters=_swagger_params)
-    def list(self, *args, **kwargs):
-        return super(SearchView, self).list(*args, **kwargs)
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            "v4.topic",
+            request,
+            lambda: super(SearchView, self).list(request, *args, **kwargs),
+        )
 
     # FacetMixin provides /facets
     @action(detail=False, methods=["get"], url_path="facets")
     def facets(self, request):
+        return cached_response(
+            "v4.topic.facets", request, lambda: self.get_facets_response(request)
+        )
+
+    def get_facets_response(self, request):
         queryset = self.get_queryset()
         facet_queryset = self.filter_facet_queryset(queryset)
         result_queryset = self.filter_queryset(queryset)
@@ -11,7 +11,7 @@ from django.conf import settings
 from aiohttp import web
 
 from vcr_server.utils.boot import (
-    init_app, run_django, run_migration, run_reindex, 
+    init_app, run_django, run_migration, run_reindex, run_warmup,
     on_app_startup, on_app_shutdown, on_app_cleanup,
 )
 
@@ -23,6 +23,7 @@ parser.add_argument("-d", "--delay", default=os.getenv("STARTUP_DELAY"))
 
 
 if __name__ == "__main__":
+    boot_start = time.perf_counter()
     args = parser.parse_args()
     if not args.socket and not args.port:
         args.port = 8080
@@ -32,23 +33,35 @@ if __name__ == "__main__":
     else:
         print(">>> Start-up delay disabled ...")
 
+    phase_start = time.perf_counter()
     django.setup()
+    print(">>> Startup: django setup took {:.3f}s".format(time.perf_counter() - phase_start))
 
     disable_migrate = os.environ.get("DISABLE_MIGRATE", "false")
     disconnected = os.environ.get("INDY_DISABLED", "false")
     skip_indexing = os.environ.get("SKIP_INDEXING_ON_STARTUP", "false")
+    skip_warmup = os.environ.get("SKIP_WARMUP_ON_STARTUP", "false")
 
     if not disable_migrate or disable_migrate == "false":
         do_reindex = False
         if not skip_indexing or skip_indexing == "false":
             os.environ["SKIP_INDEXING_ON_STARTUP"] = "active"
             do_reindex = True
+        phase_start = time.perf_counter()
         run_migration()
+        print(">>> Startup: migration took {:.3f}s".format(time.perf_counter() - phase_start))
         if do_reindex:
             # queue in current asyncio loop
             run_django(run_reindex)
 
+    if not skip_warmup or skip_warmup == "false":
+        phase_start = time.perf_counter()
+        for step, elapsed in run_warmup().items():
+            print(">>> Startup: warmup of {} took {:.3f}s".format(step, elapsed))
+        print(">>> Startup: warmup took {:.3f}s".format(time.perf_counter() - phase_start))
+
     app = init_app(on_startup=on_app_startup, on_cleanup=on_app_cleanup, on_shutdown=on_app_shutdown)
+    print(">>> Startup: ready after {:.3f}s".format(time.perf_counter() - boot_start))
     web.run_app(
         app, host=args.host, port=args.port, path=args.socket, handle_signals=True
     )
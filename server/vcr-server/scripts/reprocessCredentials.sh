@@ -10,10 +10,14 @@ usage() {
   and schemas from the registered agents.
   ----------------------------------------------------------------------------------------
   Usage:
-    ${0} [ -h ]
+    ${0} [ -h ] [ reprocess_credentials options ]
   
   Options:
     -h Prints the usage for the script
+
+  Any other options are passed to the reprocess_credentials command, for example:
+    ${0} --workers 4 --chunk-size 500
+    ${0} --resume
   ========================================================================================
 EOF
 exit
@@ -33,4 +37,4 @@ done
 shift $((OPTIND-1))
 # ==============================================================================================================================
 
-${MANAGE_CMD} reprocess_credentials
\ No newline at end of file
+${MANAGE_CMD} reprocess_credentials "$@"
\ No newline at end of file
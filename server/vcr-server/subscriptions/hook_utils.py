@@ -1,56 +1,137 @@
 import datetime
+import os
+import threading
 import time
 
+from django.db import transaction
+from django.db.models import signals
+
 from .models.CredentialHook import CredentialHook
 from .models.HookUser import HookUser
 from .models.Subscription import Subscription
 
 from api.v2.utils import log_timing_method
 
+# seconds before subscription changes made by other processes are picked up
+SUBSCRIPTION_INDEX_TTL = int(os.getenv("SUBSCRIPTION_INDEX_TTL", "60"))
+
+
+class SubscriptionIndex:
+    """
+    In-memory index of the active subscriptions of each hook event, keyed by
+    subscription type, topic source id and credential type
+    """
+
+    def __init__(self):
+        self.events = {}
+        subscriptions = Subscription.objects.filter(
+            hook__is_active=True, subscription_expiry__isnull=True
+        ).values_list(
+            "hook_id",
+            "hook__event",
+            "subscription_type",
+            "topic_source_id",
+            "credential_type_id",
+        )
+        for hook_id, event, sub_type, topic_source_id, cred_type_id in subscriptions:
+            entry = self.events.get(event)
+            if entry is None:
+                entry = self.events[event] = {
+                    "New": set(),
+                    "Stream": {},
+                    "Topic": {},
+                    "invalid": {},
+                }
+            if sub_type == "New":
+                entry["New"].add(hook_id)
+            elif sub_type == "Stream":
+                entry["Stream"].setdefault((topic_source_id, cred_type_id), set()).add(
+                    hook_id
+                )
+            elif sub_type == "Topic":
+                entry["Topic"].setdefault(topic_source_id, set()).add(hook_id)
+            else:
+                entry["invalid"][hook_id] = sub_type
+        self.loaded = time.perf_counter()
+
+    def match(self, event_name, instance):
+        """
+        Return the ids of the hooks to be fired for an instance, and any
+        hooks with an invalid subscription type
+        """
+        entry = self.events.get(event_name)
+        if not entry:
+            return set(), {}
+        hook_ids = set()
+        if instance.topic_status == "New":
+            hook_ids.update(entry["New"])
+        if instance.corp_num is not None:
+            hook_ids.update(entry["Topic"].get(instance.corp_num, ()))
+            # subscriptions reference a CredentialType, so only a matching
+            # credential type instance can match a stream subscription
+            cred_type_id = getattr(instance.credential_type, "pk", None)
+            if cred_type_id is not None:
+                hook_ids.update(
+                    entry["Stream"].get((instance.corp_num, cred_type_id), ())
+                )
+        return hook_ids, entry["invalid"]
+
+
+_subscription_index = None
+_subscription_index_lock = threading.Lock()
+
+
+def get_subscription_index():
+    global _subscription_index
+    with _subscription_index_lock:
+        index = _subscription_index
+        if index is None or (
+            time.perf_counter() - index.loaded > SUBSCRIPTION_INDEX_TTL
+        ):
+            index = _subscription_index = SubscriptionIndex()
+        return index
 
-def find_and_fire_hook(event_name, instance, **kwargs):
-    filters = {"event": event_name, "is_active": True}
 
+def invalidate_subscription_index(**kwargs):
+    global _subscription_index
+    with _subscription_index_lock:
+        _subscription_index = None
+
+
+def _subscriptions_changed(sender, **kwargs):
+    invalidate_subscription_index()
+    # rebuild again once the change is visible to other connections
+    transaction.on_commit(invalidate_subscription_index)
+
+
+for _model in (CredentialHook, Subscription):
+    signals.post_save.connect(_subscriptions_changed, sender=_model)
+    signals.post_delete.connect(_subscriptions_changed, sender=_model)
+
+
+def find_and_fire_hook(event_name, instance, **kwargs):
     start_time = time.perf_counter()
     method = "web_hook." + event_name
-    hooks = CredentialHook.objects.filter(**filters)
-    for hook in hooks:
-        if is_registration_valid(hook):
-            send_hook = False
-            # find subscription(s) related to this hook
-            subscriptions = Subscription.objects.filter(hook=hook).all()
-            if 0 < len(subscriptions):
-                # check if we should fire per subscription
-                for subscription in subscriptions:
-                    if subscription.subscription_expiry is not None:
-                        # skip for any non-null subscription expiry date
-                        pass
-                    elif subscription.subscription_type == "New":
-                        if subscription.subscription_type == instance.topic_status:
-                            send_hook = True
-                    elif subscription.subscription_type == "Stream":
-                        if (
-                            subscription.topic_source_id == instance.corp_num
-                            and subscription.credential_type == instance.credential_type
-                        ):
-                            send_hook = True
-                    elif subscription.subscription_type == "Topic":
-                        if subscription.topic_source_id == instance.corp_num:
-                            send_hook = True
-                    else:
-                        print(
-                            "      >>> Error invalid subscription type:",
-                            subscription.subscription_type,
-                        )
-                        raise Exception("Invalid subscription type")
-
-            # logic around whether we hook or not
-            if send_hook:
+    hook_ids, invalid = get_subscription_index().match(event_name, instance)
+    if invalid:
+        for hook in CredentialHook.objects.filter(id__in=invalid, is_active=True):
+            if is_registration_valid(hook):
+                print(
+                    "      >>> Error invalid subscription type:", invalid[hook.id],
+                )
+                raise Exception("Invalid subscription type")
+
+    if hook_ids:
+        hooks = CredentialHook.objects.filter(
+            id__in=hook_ids, event=event_name, is_active=True
+        ).order_by("id")
+        for hook in hooks:
+            if is_registration_valid(hook):
                 hook_start_time = time.perf_counter()
                 hook_method = "web_hook.deliver_hook"
 
                 hook.deliver_hook(instance)
-                
+
                 hook_end_time = time.perf_counter()
                 log_timing_method(hook_method, hook_start_time, hook_end_time, True)
 
@@ -1,22 +1,37 @@
+import atexit
 import json
 import logging
 import os
-from datetime import datetime
+from functools import partial
 
-import pytz
 import requests
 from celery.exceptions import Retry
 # from celery.result import AsyncResult
-from celery.signals import celeryd_after_setup
+from celery.signals import celeryd_after_setup, worker_process_shutdown
 from celery.task import Task
 from django.conf import settings
+from django.db import transaction
 
-from subscriptions.models.Subscription import Subscription
+from vcr_server.utils.http import DEFAULT_TIMEOUT, get_session
 
-from .utils import HookStep, TooManyRetriesException, log_webhook_execution_result
+from .utils import (
+    BatchedWriter,
+    HookStep,
+    TooManyRetriesException,
+    flush_hook_stats,
+    log_webhook_execution_result,
+    subscription_status,
+)
 
 LOGGER = logging.getLogger(__name__)
 
+# group the hook payloads for the same target into a single POST of a JSON list
+HOOK_BATCH_DELIVERY = os.getenv("HOOK_BATCH_DELIVERY", "false").lower() == "true"
+# max number of hook payloads in a single batched POST
+HOOK_BATCH_SIZE = int(os.getenv("HOOK_BATCH_SIZE", "50"))
+# number of seconds committed hook payloads are held to be batched together
+HOOK_BATCH_FLUSH_INTERVAL = float(os.getenv("HOOK_BATCH_FLUSH_INTERVAL", "1"))
+
 
 # class DeliverHookError(Task):
 #     def run(self, uuid):
@@ -31,15 +46,15 @@ LOGGER = logging.getLogger(__name__)
 #         # )
 
 
-class DeliverHook(Task):
+class HookDeliveryTask(Task):
+    abstract = True
     max_retries = 5
 
-    def run(self, target, payload, instance_id=None, hook_id=None, **kwargs):
+    def deliver(self, target, data, payloads):
         """
-        target:     the url to receive the payload.
-        payload:    a python primitive data structure
-        instance_id:   a possibly None "trigger" instance ID
-        hook_id:       the ID of defining Hook object
+        target:     the url to receive the data.
+        data:       the JSON body to post
+        payloads:   the hook payloads included in the data
         """
 
         try:
@@ -50,21 +65,19 @@ class DeliverHook(Task):
                 log_webhook_execution_result(False, HookStep.FIRST_ATTEMPT)
 
                 LOGGER.info("Delivering hook to: {}".format(target))
-                response = requests.post(
+                response = get_session(target).post(
                     url=target,
-                    data=json.dumps(payload),
+                    data=json.dumps(data),
                     headers={"Content-Type": "application/json"},
+                    timeout=DEFAULT_TIMEOUT,
                 )
                 LOGGER.info("--> response {}".format(response.status_code))
                 response.raise_for_status()
 
-                # find subscription and set last successful sent date, and set error count to zero
-                subscription = Subscription.objects.get(
-                    pk=payload["subscription"]["id"]
+                # set last successful sent date, and set error count to zero
+                subscription_status.sent(
+                    [payload["subscription"]["id"] for payload in payloads]
                 )
-                subscription.last_sent_date = datetime.now(pytz.utc)
-                subscription.error_count = 0
-                subscription.save()
 
                 log_webhook_execution_result(True)
 
@@ -83,49 +96,70 @@ class DeliverHook(Task):
             LOGGER.debug("Ignore Retry exception")
             pass
         except Exception as e:
-            # update error status of subscription
-            try:
-                """ Example payload:
-                {
-                  'subscription':
-                    {'id': 2, 'owner': 'anon-ybgshtl14hjp2n6s7xcl0s99ztkosd2o', 'subscription_type': 'New', 'topic_id': 'BC0123456', 'credential_type': None, 'target_url': 'http://ip10-0-172-4-bnpd0ndm4dlga5djnpn0-8000.direct.play-with-von.vonx.io/api/echo', 'hook_token': 'ashdkjahsdkjhaasd88a7d9a8sd9asasda'}, 
-                  'data': 
-                    {'id': 2198, 'corp_num': 'BC1093807', 'credential_type': 'registration.registries.ca', 
-                      'credential_json': {'cred_def_id': '6qnvgJtqwK44D8LFYnV5Yf:3:CL:10:default', 'schema_name': 'registration.registries.ca', 
-                        'attributes': {'expiry_date': '', 'registration_expiry_date': '', 'registration_renewal_effective': '', 'entity_status_effective': '2019-12-13T00:42:53+00:00', 'effective_date': '2019-12-13T00:42:53+00:00', 'entity_name_trans': '', 'registration_date': '2016-10-20T21:55:46+00:00', 'entity_name_effective': '2019-12-13T00:42:53+00:00', 'home_jurisdiction': 'BC', 'entity_name': '1093807 B.C. LTD.', 'reason_description': 'Filing:RESTF', 'registration_id': 'BC1093807', 'entity_type': 'BC', 'entity_name_trans_effective': '', 'extra_jurisdictional_registration': '', 'entity_status': 'ACT', 'entity_name_assumed': '', 'entity_name_assumed_effective': '', 'registered_jurisdiction': ''}
-                      }
-                    }
+            for payload in payloads:
+                self.record_error(payload)
+            raise e
+
+    @staticmethod
+    def record_error(payload):
+        # update error status of subscription
+        try:
+            """ Example payload:
+            {
+              'subscription':
+                {'id': 2, 'owner': 'anon-ybgshtl14hjp2n6s7xcl0s99ztkosd2o', 'subscription_type': 'New', 'topic_id': 'BC0123456', 'credential_type': None, 'target_url': 'http://ip10-0-172-4-bnpd0ndm4dlga5djnpn0-8000.direct.play-with-von.vonx.io/api/echo', 'hook_token': 'ashdkjahsdkjhaasd88a7d9a8sd9asasda'}, 
+              'data': 
+                {'id': 2198, 'corp_num': 'BC1093807', 'credential_type': 'registration.registries.ca', 
+                  'credential_json': {'cred_def_id': '6qnvgJtqwK44D8LFYnV5Yf:3:CL:10:default', 'schema_name': 'registration.registries.ca', 
+                    'attributes': {'expiry_date': '', 'registration_expiry_date': '', 'registration_renewal_effective': '', 'entity_status_effective': '2019-12-13T00:42:53+00:00', 'effective_date': '2019-12-13T00:42:53+00:00', 'entity_name_trans': '', 'registration_date': '2016-10-20T21:55:46+00:00', 'entity_name_effective': '2019-12-13T00:42:53+00:00', 'home_jurisdiction': 'BC', 'entity_name': '1093807 B.C. LTD.', 'reason_description': 'Filing:RESTF', 'registration_id': 'BC1093807', 'entity_type': 'BC', 'entity_name_trans_effective': '', 'extra_jurisdictional_registration': '', 'entity_status': 'ACT', 'entity_name_assumed': '', 'entity_name_assumed_effective': '', 'registered_jurisdiction': ''}
+                  }
                 }
-                """
-                LOGGER.debug("Error sending hook to:", payload["subscription"])
-                LOGGER.debug(
-                    "Credential Type:",
-                    payload["data"]["credential_json"]["schema_name"],
-                )
-                LOGGER.debug(
-                    "Credential:", payload["data"]["credential_json"]["attributes"]
-                )
+            }
+            """
+            LOGGER.debug("Error sending hook to:", payload["subscription"])
+            LOGGER.debug(
+                "Credential Type:",
+                payload["data"]["credential_json"]["schema_name"],
+            )
+            LOGGER.debug(
+                "Credential:", payload["data"]["credential_json"]["attributes"]
+            )
+
+            # update subscription last error date and error count, expiring
+            # the subscription after too many consecutive errors
+            subscription_status.failed(payload["subscription"]["id"])
+
+            log_webhook_execution_result(False)
+
+        except Exception as e2:
+            LOGGER.error("Failed to update subscription error status", e2)
+            pass
 
-                # TODO - update subscription last error date, increment error count, and potentially update status
-                subscription = Subscription.objects.get(
-                    pk=payload["subscription"]["id"]
-                )
-                subscription.last_error_date = datetime.now(pytz.utc)
-                subscription.error_count = subscription.error_count + 1
-                # if too many consecutive errors expire the subscription
-                if subscription.error_count > settings.HOOK_MAX_SUBSCRIPTION_ERRORS:
-                    subscription.subscription_expiry = datetime.now()
-                subscription.save()
-
-                log_webhook_execution_result(False)
-
-            except Exception as e2:
-                LOGGER.error("Failed to update subscription error status", e2)
-                pass
-            raise e
+
+class DeliverHook(HookDeliveryTask):
+    def run(self, target, payload, instance_id=None, hook_id=None, **kwargs):
+        """
+        target:     the url to receive the payload.
+        payload:    a python primitive data structure
+        instance_id:   a possibly None "trigger" instance ID
+        hook_id:       the ID of defining Hook object
+        """
+        self.deliver(target, payload, [payload])
+
+
+class DeliverHookBatch(HookDeliveryTask):
+    def run(self, target, payloads, **kwargs):
+        """
+        target:     the url to receive the payloads.
+        payloads:   a list of hook payloads, posted as a single JSON list
+        """
+        self.deliver(target, payloads, payloads)
 
 
 def deliver_hook_wrapper(target, payload, instance, hook):
+    if HOOK_BATCH_DELIVERY:
+        queue_hook_payload(target, payload)
+        return
     # instance is None if using custom event, not built-in
     if instance is not None:
         instance_id = instance.id
@@ -141,6 +175,54 @@ def deliver_hook_wrapper(target, payload, instance, hook):
     result.forget()
 
 
+class HookPayloadBatcher(BatchedWriter):
+    """
+    Committed hook payloads held by the process, and delivered together for
+    each target by a background thread once per flush interval
+    """
+
+    def empty(self):
+        return {}
+
+    def add(self, target, payload):
+        with self._lock:
+            self._pending.setdefault(target, []).append(payload)
+        self.updated()
+
+    def write(self, pending):
+        for target, payloads in pending.items():
+            for idx in range(0, len(payloads), HOOK_BATCH_SIZE):
+                deliver_hook_batch(target, payloads[idx : idx + HOOK_BATCH_SIZE])
+
+
+hook_batches = HookPayloadBatcher(HOOK_BATCH_FLUSH_INTERVAL)
+
+
+@atexit.register
+def _flush_hook_batches():
+    # deliver the payloads held by a stopping process
+    hook_batches.flush()
+
+
+def queue_hook_payload(target, payload):
+    """
+    Hold a hook payload until the current transaction commits, to be delivered
+    along with the other payloads for the same target
+    """
+    if not transaction.get_connection().in_atomic_block:
+        deliver_hook_batch(target, [payload])
+        return
+    # dropped along with the transaction or savepoint when it is rolled back
+    transaction.on_commit(partial(hook_batches.add, target, payload))
+
+
+def deliver_hook_batch(target, payloads):
+    result = DeliverHookBatch.apply_async(
+        kwargs=dict(target=target, payloads=payloads)
+    )
+    result.forget()
+
+
 @celeryd_after_setup.connect
 def capture_worker_name(sender, instance, **kwargs):
     """
@@ -150,3 +232,11 @@ def capture_worker_name(sender, instance, **kwargs):
     if "CELERY_WORKER_NAME" not in os.environ:
         os.environ["CELERY_WORKER_NAME"] = "{0}".format(sender)
         LOGGER.info(f'Setting worker name: {os.environ["CELERY_WORKER_NAME"]}')
+
+
+@worker_process_shutdown.connect
+def flush_worker_hook_stats(**kwargs):
+    """
+    Write the hook stats and subscription statuses held by a stopping worker
+    """
+    flush_hook_stats()
@@ -259,3 +259,29 @@ class HookUtils_FindAndFireHook_TestCase(TestCase):
         mock_is_reg_valid.assert_called_once_with(self.topichook)
 
         mock_deliver_hook.assert_called_once_with(self.topichook, instance)
+
+    def test_subscription_index(self):
+        index = hook_utils.SubscriptionIndex()
+
+        new_instance = HookableCredential(topic_status="New", corp_num="123")
+        assert index.match(self.event_name + "-new", new_instance) == ({1}, {})
+        assert index.match(self.event_name + "-topic", new_instance) == ({3}, {})
+
+        stream_instance = HookableCredential(
+            topic_status="Stream", corp_num="123", credential_type=self.credType
+        )
+        assert index.match(self.event_name + "-new", stream_instance) == (set(), {})
+        assert index.match(self.event_name + "-stream", stream_instance) == ({2}, {})
+        assert index.match(self.event_name + "-invalid", stream_instance) == (
+            set(),
+            {4: "Invalid"},
+        )
+        assert index.match(self.event_name + "-deactivated", stream_instance) == (
+            set(),
+            {},
+        )
+
+        # changes to subscriptions invalidate the shared index
+        shared = hook_utils.get_subscription_index()
+        Subscription.objects.filter(hook=self.topichook).first().save()
+        assert hook_utils.get_subscription_index() is not shared
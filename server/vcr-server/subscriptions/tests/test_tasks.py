@@ -0,0 +1,58 @@
+from unittest.mock import call, patch
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from subscriptions import tasks
+
+
+class Tasks_HookBatch_TestCase(TestCase):
+    @patch.object(tasks.hook_batches, "flush_interval", 60)
+    @patch("subscriptions.tasks.HOOK_BATCH_SIZE", 2)
+    @patch("subscriptions.tasks.transaction.on_commit", autospec=True)
+    @patch("subscriptions.tasks.deliver_hook_batch", autospec=True)
+    def test_queue_hook_payload(self, mock_deliver, mock_on_commit):
+        payloads = [{"subscription": {"id": idx}} for idx in range(4)]
+        tasks.queue_hook_payload("http://one/hook", payloads[0])
+        tasks.queue_hook_payload("http://two/hook", payloads[1])
+        tasks.queue_hook_payload("http://one/hook", payloads[2])
+        tasks.queue_hook_payload("http://one/hook", payloads[3])
+
+        # payloads are held until the transaction commits
+        assert not mock_deliver.called
+        for (func,), _kwargs in mock_on_commit.call_args_list:
+            func()
+        tasks.hook_batches.flush()
+        assert [call[0] for call in mock_deliver.call_args_list] == [
+            ("http://one/hook", [payloads[0], payloads[2]]),
+            ("http://one/hook", [payloads[3]]),
+            ("http://two/hook", [payloads[1]]),
+        ]
+
+        # nothing is left to deliver
+        mock_deliver.reset_mock()
+        tasks.hook_batches.flush()
+        assert not mock_deliver.called
+
+
+class Tasks_HookBatchTransaction_TestCase(TransactionTestCase):
+    @patch.object(tasks.hook_batches, "flush_interval", 60)
+    @patch("subscriptions.tasks.deliver_hook_batch", autospec=True)
+    def test_rollback_then_commit(self, mock_deliver):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                tasks.queue_hook_payload("http://one/hook", "rolled-back")
+                raise ValueError()
+
+        with transaction.atomic():
+            tasks.queue_hook_payload("http://one/hook", "committed")
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    tasks.queue_hook_payload("http://one/hook", "savepoint")
+                    raise ValueError()
+            tasks.queue_hook_payload("http://one/hook", "third")
+
+        tasks.hook_batches.flush()
+        assert mock_deliver.call_args_list == [
+            call("http://one/hook", ["committed", "third"])
+        ]
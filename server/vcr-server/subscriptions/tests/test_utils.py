@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from subscriptions import utils
+from subscriptions.models import CredentialHookStats, Subscription
+
+
+class Utils_HookStats_TestCase(TestCase):
+    def test_accumulate(self):
+        stats = utils.HookStatsAccumulator(flush_interval=60)
+        with patch.object(stats, "updated"):
+            stats.add("worker-1", attempt_count=1, total_count=1)
+            stats.add("worker-1", success_count=1)
+            stats.add("worker-2", fail_count=1)
+        assert not CredentialHookStats.objects.exists()
+
+        stats.flush()
+        worker = CredentialHookStats.objects.get(worker_id="worker-1")
+        assert (worker.attempt_count, worker.total_count, worker.success_count) == (1, 1, 1)
+        assert CredentialHookStats.objects.get(worker_id="worker-2").fail_count == 1
+
+        with patch.object(stats, "updated"):
+            stats.add("worker-1", attempt_count=2, total_count=2)
+        with self.assertNumQueries(1):
+            stats.flush()
+        worker.refresh_from_db()
+        assert (worker.attempt_count, worker.total_count, worker.success_count) == (3, 3, 1)
+
+    @patch.dict("os.environ", {"CELERY_WORKER_NAME": "worker-1"})
+    @patch("subscriptions.utils.hook_stats")
+    def test_log_webhook_execution_result(self, mock_stats):
+        utils.log_webhook_execution_result(False, utils.HookStep.FIRST_ATTEMPT)
+        utils.log_webhook_execution_result(False, utils.HookStep.RETRY)
+        utils.log_webhook_execution_result(False, utils.HookStep.RETRY_FAIL)
+        utils.log_webhook_execution_result(False)
+        utils.log_webhook_execution_result(True)
+        assert [call[1] for call in mock_stats.add.call_args_list] == [
+            {"attempt_count": 1, "total_count": 1},
+            {"retry_count": 1, "total_count": 1},
+            {"retry_fail_count": 1},
+            {"fail_count": 1},
+            {"success_count": 1},
+        ]
+        assert mock_stats.add.call_args[0] == ("worker-1",)
+
+
+@override_settings(HOOK_MAX_SUBSCRIPTION_ERRORS=2)
+class Utils_SubscriptionStatus_TestCase(TestCase):
+    def setUp(self):
+        owner = get_user_model().objects.create(username="user1", DID="not:a:did:123")
+        self.subscriptions = [
+            Subscription.objects.create(owner=owner, subscription_type="New", error_count=2)
+            for _ in range(3)
+        ]
+        self.status = utils.SubscriptionStatusUpdater(flush_interval=60)
+        patcher = patch.object(self.status, "updated")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_write(self):
+        first, second, third = [subscription.id for subscription in self.subscriptions]
+        self.status.sent([first, second])
+        self.status.failed(second)
+        self.status.failed(third)
+        with self.assertNumQueries(4):
+            self.status.flush()
+
+        first, second, third = Subscription.objects.order_by("id")
+        assert first.last_sent_date is not None
+        assert first.error_count == 0 and first.last_error_date is None
+        # errors after the last success are counted from zero
+        assert second.last_sent_date is not None
+        assert second.error_count == 1 and second.last_error_date is not None
+        # consecutive errors are added up and expire the subscription
+        assert third.last_sent_date is None
+        assert third.error_count == 3
+        assert third.subscription_expiry is not None
+        assert first.subscription_expiry is None and second.subscription_expiry is None
@@ -1,13 +1,26 @@
 import logging
 import os
 import threading
+import time
+from datetime import datetime
 from enum import Enum
 
+import pytz
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, DateTimeField, F, When
+
 from .models.CredentialHookStats import CredentialHookStats
+from .models.Subscription import Subscription
 
 LOGGER = logging.getLogger(__name__)
 
 
+# number of seconds hook stats and subscription statuses are held in the worker
+# before being written, 0 to write them with each hook delivery
+HOOK_STATS_FLUSH_INTERVAL = float(os.getenv("HOOK_STATS_FLUSH_INTERVAL", "5"))
+
+
 class HookStep(Enum):
     FIRST_ATTEMPT = "first_attempt"
     RETRY = "retry_attempt"
@@ -18,36 +31,196 @@ class TooManyRetriesException(Exception):
     pass
 
 
+class BatchedWriter:
+    """
+    Updates held in memory by the worker process and written together by a
+    background thread once per flush interval
+    """
+
+    def __init__(self, flush_interval=HOOK_STATS_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = self.empty()
+        self._pid = None
+
+    def empty(self):
+        raise NotImplementedError
+
+    def write(self, pending):
+        raise NotImplementedError
+
+    def updated(self):
+        """
+        Write the updates now when they are not batched, or make sure the
+        flushing thread of this process is running
+        """
+        if self.flush_interval <= 0:
+            self.flush()
+        elif self._pid != os.getpid():
+            with self._lock:
+                # a forked worker process does not inherit the flushing thread
+                if self._pid != os.getpid():
+                    threading.Thread(
+                        target=self._run, name="hook-stats", daemon=True
+                    ).start()
+                    self._pid = os.getpid()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, self.empty()
+        if pending:
+            try:
+                self.write(pending)
+            except Exception:
+                LOGGER.exception("Error writing %s", self.__class__.__name__)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+
+class HookStatsAccumulator(BatchedWriter):
+    """
+    Hook delivery counts of each worker, written as atomic increments of the
+    worker stats rows
+    """
+
+    def empty(self):
+        return {}
+
+    def add(self, worker_id, **counts):
+        with self._lock:
+            worker_counts = self._pending.setdefault(worker_id, {})
+            for field, count in counts.items():
+                worker_counts[field] = worker_counts.get(field, 0) + count
+        self.updated()
+
+    def write(self, pending):
+        for worker_id, counts in pending.items():
+            increments = {field: F(field) + count for field, count in counts.items()}
+            if CredentialHookStats.objects.filter(worker_id=worker_id).update(
+                **increments
+            ):
+                continue
+            _stats, created = CredentialHookStats.objects.get_or_create(
+                worker_id=worker_id, defaults=counts
+            )
+            if not created:
+                # created by another worker process in the meantime
+                CredentialHookStats.objects.filter(worker_id=worker_id).update(
+                    **increments
+                )
+
+
+class SubscriptionStatusUpdater(BatchedWriter):
+    """
+    Last sent and error status of subscriptions, written in bulk
+    """
+
+    def empty(self):
+        return {}
+
+    def _status(self, subscription_id):
+        return self._pending.setdefault(
+            subscription_id,
+            {"sent_date": None, "error_date": None, "error_count": 0, "reset": False},
+        )
+
+    def sent(self, subscription_ids):
+        now = datetime.now(pytz.utc)
+        with self._lock:
+            for subscription_id in subscription_ids:
+                status = self._status(subscription_id)
+                status["sent_date"] = now
+                status["error_count"] = 0
+                status["reset"] = True
+        self.updated()
+
+    def failed(self, subscription_id):
+        now = datetime.now(pytz.utc)
+        with self._lock:
+            status = self._status(subscription_id)
+            status["error_date"] = now
+            status["error_count"] += 1
+        self.updated()
+
+    def write(self, pending):
+        now = datetime.now(pytz.utc)
+        sent = {
+            subscription_id: status["sent_date"]
+            for subscription_id, status in pending.items()
+            if status["sent_date"]
+        }
+        if sent:
+            # set last successful sent date, and set error count to zero
+            Subscription.objects.filter(pk__in=sent).update(
+                last_sent_date=Case(
+                    *[
+                        When(pk=subscription_id, then=sent_date)
+                        for subscription_id, sent_date in sent.items()
+                    ],
+                    output_field=DateTimeField(),
+                ),
+                error_count=0,
+                update_timestamp=now,
+            )
+
+        # errors since the last success of each subscription
+        failed = []
+        for subscription_id, status in pending.items():
+            if not status["error_date"]:
+                continue
+            error_count = status["error_count"]
+            if not status["reset"]:
+                error_count = F("error_count") + error_count
+            Subscription.objects.filter(pk=subscription_id).update(
+                last_error_date=status["error_date"],
+                error_count=error_count,
+                update_timestamp=now,
+            )
+            failed.append(subscription_id)
+        if failed:
+            # if too many consecutive errors expire the subscription
+            Subscription.objects.filter(
+                pk__in=failed,
+                error_count__gt=int(settings.HOOK_MAX_SUBSCRIPTION_ERRORS),
+            ).update(subscription_expiry=now.date(), update_timestamp=now)
+
+
+hook_stats = HookStatsAccumulator()
+subscription_status = SubscriptionStatusUpdater()
+
+
+def flush_hook_stats():
+    hook_stats.flush()
+    subscription_status.flush()
+
+
 def log_webhook_execution_result(success, hook_step=None, json_data=None):
 
-    worker_name = os.environ["CELERY_WORKER_NAME"]
+    worker_name = os.environ.get("CELERY_WORKER_NAME")
     if worker_name is None:
         LOGGER.warning(
-            "No name set for current worker, falling back to using OS-assigned thread ID"
+            "No name set for current worker, falling back to using the process ID"
         )
-        worker_name = threading.get_native_id()
+        worker_name = str(os.getpid())
 
     # Store stats for current worker
-    current_stats = (
-        CredentialHookStats.objects.filter(worker_id=worker_name).first()
-        or CredentialHookStats(worker_id=worker_name)
-    )
-
-    if success is False or hook_step is HookStep.FIRST_ATTEMPT:
-        current_stats.attempt_count = current_stats.attempt_count + 1
-        current_stats.total_count = current_stats.total_count + 1
+    if hook_step is HookStep.FIRST_ATTEMPT:
+        hook_stats.add(worker_name, attempt_count=1, total_count=1)
     elif success is False and hook_step is HookStep.RETRY:
-        current_stats.retry_count = current_stats.retry_count + 1
-        current_stats.total_count = current_stats.total_count + 1
+        hook_stats.add(worker_name, retry_count=1, total_count=1)
     elif success is False and hook_step is HookStep.RETRY_FAIL:
-        current_stats.retry_fail_count = current_stats.retry_fail_count + 1
+        hook_stats.add(worker_name, retry_fail_count=1)
     elif success is False and hook_step is None:
-        current_stats.fail_count = current_stats.fail_count + 1
+        hook_stats.add(worker_name, fail_count=1)
     elif success is True:
-        current_stats.success_count = current_stats.success_count + 1
+        hook_stats.add(worker_name, success_count=1)
     else:
         LOGGER.warning(
             f"Unexpected argument combination: success={success}, hook_step={hook_step}"
         )
-
-    current_stats.save()
@@ -17,7 +17,7 @@ SOLR_BATCH_SIZE = os.getenv("SOLR_BATCH_SIZE", "100")
 
 engines = {
     "direct": "haystack.backends.simple_backend.SimpleEngine",
-    "solr": "haystack.backends.solr_backend.SolrEngine",
+    "solr": "api.v2.search.backend.CursorSolrEngine",
 }
 
 
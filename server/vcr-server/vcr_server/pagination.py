@@ -2,18 +2,121 @@ import logging
 from collections import OrderedDict
 
 from django.core.paginator import Paginator
-from rest_framework.pagination import BasePagination, PageNumberPagination
+from django.db.models import QuerySet
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    remove_query_param,
+    replace_query_param,
+)
 from rest_framework.response import Response
 
 LOGGER = logging.getLogger(__name__)
 
 
 class EnhancedPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination, or cursor pagination when a `cursor` is requested
+
+    Cursor pages cost the same however deep they are: database querysets are
+    paged on their id, search results with the Solr cursorMark. The first page
+    is requested with `cursor=*` and the following ones with the `next` link.
+    Total counts of cursor pages can be skipped with `count=false`.
+    """
+
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 20
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+
+    cursor = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        if self.cursor_query_param in request.query_params:
+            if isinstance(queryset, QuerySet):
+                return self.paginate_keyset(queryset, request)
+            if hasattr(getattr(queryset, "query", None), "set_cursor_mark"):
+                return self.paginate_cursor_mark(queryset, request)
+        return super(EnhancedPageNumberPagination, self).paginate_queryset(
+            queryset, request, view
+        )
+
+    def include_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() not in (
+            "false",
+            "0",
+        )
+
+    def get_cursor(self, request):
+        return request.query_params[self.cursor_query_param] or "*"
+
+    def paginate_keyset(self, queryset, request):
+        self.request = request
+        self.cursor = self.get_cursor(request)
+        self.cursor_page_size = self.get_page_size(request)
+        queryset = queryset.order_by("id")
+
+        page_queryset = queryset
+        if self.cursor != "*":
+            try:
+                page_queryset = queryset.filter(id__gt=int(self.cursor))
+            except ValueError:
+                raise NotFound("Invalid cursor")
+
+        # one more row tells whether there is a next page
+        rows = list(page_queryset[: self.cursor_page_size + 1])
+        self.next_cursor = None
+        if len(rows) > self.cursor_page_size:
+            rows = rows[: self.cursor_page_size]
+            self.next_cursor = str(rows[-1].id)
+        self.total = queryset.count() if self.include_count(request) else None
+        return rows
+
+    def paginate_cursor_mark(self, queryset, request):
+        self.request = request
+        self.cursor = self.get_cursor(request)
+        self.cursor_page_size = self.get_page_size(request)
+
+        # run the page query directly, the result cache of the search
+        # queryset is sized and limited by the total number of hits
+        query = queryset.query
+        query.set_cursor_mark(self.cursor)
+        query.set_limits(0, self.cursor_page_size)
+        results = query.get_results()
+        rows = queryset.post_process_results(results)
+
+        next_cursor = query.get_next_cursor_mark()
+        self.next_cursor = (
+            next_cursor if results and next_cursor != self.cursor else None
+        )
+        self.total = query.get_count() if self.include_count(request) else None
+        return rows
+
+    def get_next_cursor_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
 
     def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return Response(
+                OrderedDict(
+                    [
+                        ("total", self.total),
+                        ("page_size", self.cursor_page_size),
+                        ("cursor", self.cursor),
+                        ("next", self.get_next_cursor_link()),
+                        ("previous", None),
+                        ("results", data),
+                    ]
+                )
+            )
         return Response(
             OrderedDict(
                 [
@@ -29,6 +132,33 @@ class EnhancedPageNumberPagination(PageNumberPagination):
             )
         )
 
+    def get_schema_fields(self, view):
+        fields = super(EnhancedPageNumberPagination, self).get_schema_fields(view)
+        fields.extend(
+            [
+                coreapi.Field(
+                    name=self.cursor_query_param,
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        title="Cursor",
+                        description="Page with a cursor instead of a page "
+                        "number, starting from '*'",
+                    ),
+                ),
+                coreapi.Field(
+                    name=self.count_query_param,
+                    required=False,
+                    location="query",
+                    schema=coreschema.Boolean(
+                        title="Count",
+                        description="Whether cursor pages include the total count",
+                    ),
+                ),
+            ]
+        )
+        return fields
+
 
 class NullDjangoPaginator(Paginator):
     @property
@@ -141,6 +141,18 @@ CONN_MAX_AGE = CREDS_BATCH_SIZE = int(os.getenv("CONN_MAX_AGE", "0"))
 if CONN_MAX_AGE < 0:
     CONN_MAX_AGE = None
 
+# The search response cache and the invalidation of the facet labels need a
+# cache shared by all server processes, such as the database cache
+# (CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache with the table name
+# as CACHE_LOCATION, created on startup); the default cache is per process
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND")
+        or "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": os.getenv("CACHE_LOCATION") or "",
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/1.9/ref/settings/#auth-password-validators
 
@@ -50,15 +50,24 @@ def run_reindex():
     from django.core.management import call_command
 
     batch_size = os.getenv("SOLR_BATCH_SIZE", 500)
-    call_command(
-        "update_index", "--max-retries=5", "--batch-size={}".format(batch_size)
-    )
+    call_command("rebuild_search_index", "--chunk-size={}".format(batch_size))
+
+
+def run_warmup():
+    from vcr_server.utils.warmup import warmup
+
+    try:
+        return warmup()
+    finally:
+        django.db.connections.close_all()
 
 
 def run_migration():
     from django.core.management import call_command
 
     call_command("migrate")
+    # no-op unless the database cache backend is configured
+    call_command("createcachetable")
 
 
 async def add_server_headers(request, response):
@@ -128,16 +137,19 @@ async def on_app_shutdown(app):
 async def init_app(on_startup=None, on_cleanup=None, on_shutdown=None):
     from aiohttp.web import Application
     from aiohttp_wsgi import WSGIHandler
-    from vcr_server.utils.solrqueue import SolrQueue
+    from vcr_server.utils.exportstream import EXPORT_PATH, export_topics
+    from vcr_server.utils.solrqueue import create_solr_queue
 
     global app_solrqueue
 
     wsgi_handler = WSGIHandler(application)
     app = Application()
-    # all requests forwarded to django
+    # streamed by aiohttp, which holds the whole body of a WSGI response
+    app.router.add_get(EXPORT_PATH, export_topics)
+    # all other requests forwarded to django
     app.router.add_route("*", "/{path_info:.*}", wsgi_handler)
 
-    app_solrqueue = SolrQueue()
+    app_solrqueue = create_solr_queue()
     app_solrqueue.setup(app=app)
 
     if on_startup:
@@ -0,0 +1,126 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+
+from django.db import connections
+
+from api.v2.serializers.export import (
+    EXPORT_CONTENT_TYPES,
+    TopicExporter,
+    export_watermark,
+    parse_since,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+EXPORT_PATH = "/api/v2/export/topic"
+
+# number of bytes of exported lines sent to the client at a time
+EXPORT_WRITE_SIZE = int(os.getenv("EXPORT_WRITE_SIZE", "65536"))
+
+# number of chunks held for a slow client before the export waits for it
+EXPORT_QUEUE_SIZE = int(os.getenv("EXPORT_QUEUE_SIZE", "8"))
+
+
+class ExportStopped(Exception):
+    pass
+
+
+def produce(loop, queue, stopped, lines, write_size=EXPORT_WRITE_SIZE):
+    """
+    Read the exported lines in a worker thread, which keeps the server-side
+    cursor of the export on a single connection, and hand them to the event
+    loop in chunks; ends with None, or with the error raised by the export
+    """
+
+    def put(item):
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                return future.result(timeout=1)
+            except concurrent.futures.TimeoutError:
+                if stopped.is_set():
+                    future.cancel()
+                    raise ExportStopped()
+
+    try:
+        try:
+            chunk = []
+            size = 0
+            for line in lines:
+                data = line.encode("utf-8")
+                chunk.append(data)
+                size += len(data)
+                if size >= write_size:
+                    put(b"".join(chunk))
+                    chunk = []
+                    size = 0
+                    if stopped.is_set():
+                        return
+            if chunk:
+                put(b"".join(chunk))
+            put(None)
+        except ExportStopped:
+            LOGGER.info("Export stopped by the client")
+        except Exception as e:
+            LOGGER.exception("Error exporting topics")
+            put(e)
+    except ExportStopped:
+        pass
+    finally:
+        connections.close_all()
+
+
+async def export_topics(request):
+    """
+    Stream the topic export from the aiohttp server, which would otherwise hold
+    the whole WSGI response body in memory before sending it
+    """
+    from aiohttp import web
+
+    output = request.query.get("output", "ndjson")
+    if output not in EXPORT_CONTENT_TYPES:
+        return web.json_response({"detail": "Unsupported output format"}, status=400)
+    since = request.query.get("since")
+    if since:
+        try:
+            since = parse_since(since)
+        except ValueError as e:
+            return web.json_response({"detail": str(e)}, status=400)
+    else:
+        since = None
+
+    export_timestamp = export_watermark()
+    exporter = TopicExporter(since=since)
+    response = web.StreamResponse(
+        headers={
+            "Content-Disposition": 'attachment; filename="topics.{}"'.format(output),
+            "X-Export-Timestamp": export_timestamp.isoformat(),
+        }
+    )
+    response.content_type = EXPORT_CONTENT_TYPES[output]
+    await response.prepare(request)
+
+    loop = asyncio.get_event_loop()
+    queue = asyncio.Queue(EXPORT_QUEUE_SIZE)
+    stopped = threading.Event()
+    producer = loop.run_in_executor(
+        None, produce, loop, queue, stopped, getattr(exporter, output)()
+    )
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                # the status is sent already, the client sees a truncated export
+                raise chunk
+            await response.write(chunk)
+    finally:
+        stopped.set()
+    await producer
+    await response.write_eof()
+    return response
@@ -0,0 +1,93 @@
+import logging
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+LOGGER = logging.getLogger(__name__)
+
+
+# max number of keep-alive connections kept open to each host
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+
+# number of seconds to wait for a connection to be established
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+
+# number of seconds to wait for a response once the request is sent
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_sessions = threading.local()
+
+
+def _retry_policy(retry_count, retry_wait):
+    return Retry(
+        total=retry_count,
+        connect=retry_count,
+        status=retry_count,
+        status_forcelist=[
+            429,  # too many requests
+            500,  # Internal server error
+            502,  # Bad gateway
+            503,  # Service unavailable
+            504   # Gateway timeout
+        ],
+        method_whitelist=['HEAD', 'TRACE', 'GET',
+                          'POST', 'PUT', 'OPTIONS', 'DELETE'],
+        read=0,
+        redirect=0,
+        backoff_factor=retry_wait
+    )
+
+
+def get_session(url, retry_count=0, retry_wait=0) -> requests.Session:
+    """
+    Return the keep-alive session of the current thread for the host of a url
+
+    Sessions are kept per thread and per host, so that repeated requests to the
+    same endpoint reuse their pooled connections. When `retry_count` is set,
+    connection failures and transient error statuses are retried.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc, retry_count, retry_wait)
+    sessions = getattr(_sessions, "sessions", None)
+    if sessions is None:
+        sessions = _sessions.sessions = {}
+    session = sessions.get(key)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=_retry_policy(retry_count, retry_wait)
+            if retry_count
+            else 0,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        sessions[key] = session
+    return session
+
+
+def close_sessions():
+    """
+    Close the sessions of the current thread
+    """
+    sessions = getattr(_sessions, "sessions", None) or {}
+    _sessions.sessions = {}
+    for session in sessions.values():
+        session.close()
+
+
+def _reset_after_fork():
+    # pooled connections must not be shared with a forked worker process
+    global _sessions
+    _sessions = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
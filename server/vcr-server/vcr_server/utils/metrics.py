@@ -0,0 +1,377 @@
+import atexit
+import bisect
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from vcr_server.utils.http import DEFAULT_TIMEOUT, get_session
+
+LOGGER = logging.getLogger(__name__)
+
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+PERCENTILES = (50, 95, 99)
+
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "vcr")
+
+# max number of trace events sent to the trace target in a single request
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "100"))
+
+# max number of seconds a trace event waits for its batch to be sent
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "1"))
+
+# max number of trace events waiting to be sent, newer events are dropped
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+
+
+class _Series:
+    """
+    Call counts and latency histogram of a method, updated by a single thread
+    """
+
+    __slots__ = ("success", "fail", "total_time", "min_time", "max_time", "buckets")
+
+    def __init__(self):
+        self.success = 0
+        self.fail = 0
+        self.total_time = 0.0
+        self.min_time = None
+        self.max_time = None
+        # the last bucket counts the observations above the largest bound
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, elapsed, success):
+        if success:
+            self.success += 1
+        else:
+            self.fail += 1
+        self.total_time += elapsed
+        if self.min_time is None or elapsed < self.min_time:
+            self.min_time = elapsed
+        if self.max_time is None or elapsed > self.max_time:
+            self.max_time = elapsed
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    def merge(self, other):
+        self.success += other.success
+        self.fail += other.fail
+        self.total_time += other.total_time
+        for value in (other.min_time, other.max_time):
+            if value is None:
+                continue
+            if self.min_time is None or value < self.min_time:
+                self.min_time = value
+            if self.max_time is None or value > self.max_time:
+                self.max_time = value
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    @property
+    def count(self):
+        return self.success + self.fail
+
+    def percentile(self, percent):
+        """
+        Estimate a percentile of the latencies by interpolating within the
+        histogram bucket holding it
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            if bucket and seen + bucket >= rank:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = (
+                    LATENCY_BUCKETS[index]
+                    if index < len(LATENCY_BUCKETS)
+                    else self.max_time
+                )
+                value = lower + (upper - lower) * (rank - seen) / bucket
+                return min(max(value, self.min_time), self.max_time)
+            seen += bucket
+        return self.max_time
+
+
+class _Store:
+    """
+    Metrics recorded by one thread
+    """
+
+    __slots__ = ("generation", "series", "counters")
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.series = {}
+        self.counters = {}
+
+
+class MetricsRegistry:
+    """
+    Method timings and counters, recorded without locking in a store owned by
+    the calling thread and merged when they are read
+
+    The lock is only taken when a thread records its first metric, and when the
+    stores are listed or reset.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stores = []
+        self._generation = 0
+
+    def _store(self):
+        store = getattr(self._local, "store", None)
+        if store is None or store.generation != self._generation:
+            with self._lock:
+                store = self._local.store = _Store(self._generation)
+                self._stores.append(store)
+        return store
+
+    def observe(self, method, elapsed, success=True):
+        """
+        Record the duration in seconds of a method call
+        """
+        series = self._store().series
+        entry = series.get(method)
+        if entry is None:
+            entry = series[method] = _Series()
+        entry.observe(elapsed, success)
+
+    def increment(self, name, value=1):
+        counters = self._store().counters
+        counters[name] = counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._generation += 1
+            self._stores = []
+
+    def collect(self):
+        """
+        Merge the metrics of all threads, returning the series and counters
+        """
+        with self._lock:
+            stores = list(self._stores)
+        series = {}
+        counters = {}
+        for store in stores:
+            for method, entry in list(store.series.items()):
+                series.setdefault(method, _Series()).merge(entry)
+            for name, value in list(store.counters.items()):
+                counters[name] = counters.get(name, 0) + value
+        return series, counters
+
+    def stats(self):
+        """
+        Summary of the timings of each method
+        """
+        series, counters = self.collect()
+        stats = {}
+        for method, entry in sorted(series.items()):
+            stats[method] = {
+                "total_count": entry.count,
+                "success_count": entry.success,
+                "fail_count": entry.fail,
+                "min_time": entry.min_time,
+                "max_time": entry.max_time,
+                "total_time": entry.total_time,
+                "avg_time": entry.total_time / entry.count,
+            }
+            for percent in PERCENTILES:
+                stats[method]["p{}_time".format(percent)] = entry.percentile(percent)
+        for name, value in sorted(counters.items()):
+            stats[name] = value
+        return stats
+
+    def exposition(self, gauges=None):
+        """
+        Render the metrics in the Prometheus text exposition format, with
+        additional gauges given as {name: [(labels, value), ...]}
+        """
+        series, counters = self.collect()
+        lines = []
+
+        name = METRICS_PREFIX + "_method_duration_seconds"
+        lines.append("# HELP {} Duration of method calls".format(name))
+        lines.append("# TYPE {} histogram".format(name))
+        for method, entry in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS + ("+Inf",), entry.buckets):
+                cumulative += bucket
+                lines.append(
+                    _sample(name + "_bucket", {"method": method, "le": bound}, cumulative)
+                )
+            lines.append(_sample(name + "_sum", {"method": method}, entry.total_time))
+            lines.append(_sample(name + "_count", {"method": method}, entry.count))
+
+        name = METRICS_PREFIX + "_method_duration_quantile_seconds"
+        lines.append("# HELP {} Estimated percentiles of method call durations".format(name))
+        lines.append("# TYPE {} gauge".format(name))
+        for method, entry in sorted(series.items()):
+            for percent in PERCENTILES:
+                lines.append(
+                    _sample(
+                        name,
+                        {"method": method, "quantile": percent / 100},
+                        entry.percentile(percent),
+                    )
+                )
+
+        name = METRICS_PREFIX + "_method_calls_total"
+        lines.append("# HELP {} Number of method calls by outcome".format(name))
+        lines.append("# TYPE {} counter".format(name))
+        for method, entry in sorted(series.items()):
+            lines.append(_sample(name, {"method": method, "outcome": "success"}, entry.success))
+            lines.append(_sample(name, {"method": method, "outcome": "fail"}, entry.fail))
+
+        for counter, value in sorted(counters.items()):
+            name = "{}_{}_total".format(METRICS_PREFIX, counter)
+            lines.append("# TYPE {} counter".format(name))
+            lines.append(_sample(name, {}, value))
+
+        for gauge, samples in sorted((gauges or {}).items()):
+            name = "{}_{}".format(METRICS_PREFIX, gauge)
+            lines.append("# TYPE {} gauge".format(name))
+            for labels, value in samples:
+                lines.append(_sample(name, labels, value))
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name, labels, value):
+    if labels:
+        name += "{{{}}}".format(
+            ",".join('{}="{}"'.format(key, _escape(val)) for key, val in labels.items())
+        )
+    return "{} {}".format(name, "NaN" if value is None else value)
+
+
+class TraceExporter:
+    """
+    Send trace events to an http endpoint in batches from a background thread,
+    so that recording an event never waits on the endpoint
+
+    Events are dropped, and counted in the metrics registry, when the queue is
+    full.
+    """
+
+    def __init__(
+        self,
+        url,
+        batch_size=TRACE_BATCH_SIZE,
+        flush_interval=TRACE_FLUSH_INTERVAL,
+        queue_size=TRACE_QUEUE_SIZE,
+    ):
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _start(self):
+        with self._lock:
+            # a forked process does not inherit the sending thread
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(self.queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-exporter", daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, event):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            registry.increment("trace_events_dropped")
+
+    def close(self, timeout=5):
+        """
+        Send the queued events and stop the sending thread
+        """
+        if self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._pid = None
+
+    def _run(self):
+        events_queue = self._queue
+        stopped = False
+        while not stopped:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = (
+                    None if deadline is None else max(0, deadline - time.monotonic())
+                )
+                try:
+                    event = events_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if event is None:
+                    stopped = True
+                    break
+                batch.append(event)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self.send(batch)
+
+    def send(self, batch):
+        try:
+            response = get_session(self.url).post(
+                self.url,
+                data=json.dumps(batch),
+                headers={"Content-Type": "application/json"},
+                timeout=DEFAULT_TIMEOUT,
+            )
+            response.raise_for_status()
+            registry.increment("trace_events_sent", len(batch))
+        except Exception:
+            registry.increment("trace_events_failed", len(batch))
+            LOGGER.exception(
+                "Error sending %s events to trace target: %s", len(batch), self.url
+            )
+
+
+registry = MetricsRegistry()
+
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+def get_trace_exporter(url) -> TraceExporter:
+    """
+    Return the shared trace exporter of an endpoint
+    """
+    exporter = _exporters.get(url)
+    if exporter is None:
+        with _exporters_lock:
+            exporter = _exporters.get(url)
+            if exporter is None:
+                exporter = _exporters[url] = TraceExporter(url)
+    return exporter
+
+
+@atexit.register
+def _close_exporters():
+    for exporter in list(_exporters.values()):
+        exporter.close()
@@ -1,10 +1,20 @@
 import logging
 import threading
+import time
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
 from queue import Empty, Full, Queue
 
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
 from haystack.utils import get_identifier
 
+from api.v2.models.SolrQueueItem import SolrQueueItem
+from api.v2.search.cache import bump_index_generation
 from api.v2.search.index import TxnAwareSearchIndex
 
 LOGGER = logging.getLogger(__name__)
@@ -22,13 +32,108 @@ RAISE_ERRORS = RTI_RAISE_ERRORS == "TRUE"
 RTI_WAIT_TIME = os.getenv("RTI_WAIT_TIME", "5")
 WAIT_TIME = int(RTI_WAIT_TIME)
 
-# max number of items to trigger an update to the solr index
+# max number of items to trigger an update to the solr index; this is the
+# starting (and smallest) batch size of the adaptive batching policy
 RTI_MAX_SOLR_BATCH = os.getenv("RTI_MAX_SOLR_BATCH", "25")
 MAX_SOLR_BATCH = int(RTI_MAX_SOLR_BATCH)
 
+# largest batch size the adaptive batching policy will grow to under load
+RTI_MAX_SOLR_BATCH_LIMIT = os.getenv("RTI_MAX_SOLR_BATCH_LIMIT", "500")
+MAX_SOLR_BATCH_LIMIT = int(RTI_MAX_SOLR_BATCH_LIMIT)
+
+# number of seconds a solr update may take before the batch size is reduced
+RTI_TARGET_LATENCY = os.getenv("RTI_TARGET_LATENCY", "2")
+TARGET_LATENCY = float(RTI_TARGET_LATENCY)
+
+# number of seconds marked dirty documents are held to coalesce repeated updates
+RTI_DIRTY_WINDOW = os.getenv("RTI_DIRTY_WINDOW", "2")
+DIRTY_WINDOW = float(RTI_DIRTY_WINDOW)
+
+# number of threads sending updates to solr, so index classes update concurrently
+RTI_INDEX_WORKERS = os.getenv("RTI_INDEX_WORKERS", "2")
+INDEX_WORKERS = int(RTI_INDEX_WORKERS)
+
+# keep pending index updates in the database (solr_queue_item table) so they
+# are not lost on restart or when solr is unavailable
+RTI_DURABLE_QUEUE = os.getenv("RTI_DURABLE_QUEUE", "FALSE").upper()
+DURABLE_QUEUE = RTI_DURABLE_QUEUE == "TRUE"
+
+# max number of durable queue items read for a single indexing pass
+RTI_MAX_IN_FLIGHT = os.getenv("RTI_MAX_IN_FLIGHT", "500")
+MAX_IN_FLIGHT = int(RTI_MAX_IN_FLIGHT)
+
+# durable queue depth above which writers wait for the indexer (0 to disable)
+RTI_BACKPRESSURE_DEPTH = os.getenv("RTI_BACKPRESSURE_DEPTH", "10000")
+BACKPRESSURE_DEPTH = int(RTI_BACKPRESSURE_DEPTH)
+
+# max number of seconds a writer waits for the durable queue depth to fall
+RTI_BACKPRESSURE_TIMEOUT = os.getenv("RTI_BACKPRESSURE_TIMEOUT", "30")
+BACKPRESSURE_TIMEOUT = int(RTI_BACKPRESSURE_TIMEOUT)
+
+# number of failed attempts after which a durable queue item is dead-lettered,
+# once Solr is seen accepting other items
+RTI_MAX_ATTEMPTS = os.getenv("RTI_MAX_ATTEMPTS", "10")
+MAX_ATTEMPTS = int(RTI_MAX_ATTEMPTS)
+
+# number of seconds before a failed durable queue item is sent again, doubled
+# with each failed attempt up to RTI_RETRY_BACKOFF_LIMIT
+RTI_RETRY_BACKOFF = os.getenv("RTI_RETRY_BACKOFF", "5")
+RETRY_BACKOFF = float(RTI_RETRY_BACKOFF)
+RTI_RETRY_BACKOFF_LIMIT = os.getenv("RTI_RETRY_BACKOFF_LIMIT", "3600")
+RETRY_BACKOFF_LIMIT = float(RTI_RETRY_BACKOFF_LIMIT)
+
+# number of seconds durable queue items claimed by an indexer are left to it,
+# after which they are sent again by any indexer
+RTI_CLAIM_TIMEOUT = os.getenv("RTI_CLAIM_TIMEOUT", "300")
+CLAIM_TIMEOUT = float(RTI_CLAIM_TIMEOUT)
+
+
+def create_solr_queue():
+    """Create the real-time indexing queue selected by RTI_DURABLE_QUEUE."""
+    return DurableSolrQueue() if DURABLE_QUEUE else SolrQueue()
+
+
+class AdaptiveBatchPolicy:
+    """
+    Solr batch size driven by the queue depth and the observed Solr latency.
+
+    The batch size doubles while more items are queued than fit in a batch
+    and Solr responds within the target latency, and halves when Solr is
+    slower than that. When the queue is idle, items are flushed as soon as
+    the indexing thread wakes up whatever the batch size.
+    """
+
+    def __init__(
+        self,
+        min_size=MAX_SOLR_BATCH,
+        max_size=MAX_SOLR_BATCH_LIMIT,
+        target_latency=TARGET_LATENCY,
+    ):
+        self.min_size = min_size
+        self.max_size = max(min_size, max_size)
+        self.target_latency = target_latency
+        self.size = min_size
+        self.latency = None
+        self._lock = threading.Lock()
+
+    def record(self, elapsed, depth):
+        """Record the duration of a Solr update and the queue depth after it."""
+        with self._lock:
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency = 0.7 * self.latency + 0.3 * elapsed
+            if self.latency > self.target_latency:
+                self.size = max(self.min_size, self.size // 2)
+            elif depth > self.size:
+                self.size = min(self.max_size, self.size * 2)
+            return self.size
+
 
 class SolrQueue:
     is_active = False
+    # items are queued once the transaction updating them is committed
+    transactional = False
 
     def __init__(self):
         LOGGER.info("Initializing Solr queue ...")
@@ -37,9 +142,13 @@ class SolrQueue:
         self._stop = threading.Event()
         self._thread = None
         self._trigger = threading.Event()
+        self._policy = AdaptiveBatchPolicy()
+        self._executor = None
+        self._dirty = {}
+        self._dirty_lock = threading.Lock()
 
     def isactive(self):
-        return (self.is_active or not self._queue.empty())
+        return (self.is_active or not self._queue.empty() or bool(self._dirty))
 
     def qsize(self):
         return self._queue.qsize()
@@ -55,6 +164,7 @@ class SolrQueue:
         except Full:
             LOGGER.error("Can't add items to the Solr queue because it is full")
             raise
+        self._trigger.set()
 
     def delete(self, index_cls, using, instances):
         ids = [get_identifier(instance) for instance in instances]
@@ -67,6 +177,47 @@ class SolrQueue:
         except Full:
             LOGGER.error("Can't delete items from the Solr queue because it is full")
             raise
+        self._trigger.set()
+
+    def mark_dirty(self, index_cls, using, instances):
+        """
+        Schedule an update which is coalesced with any other update of the same
+        documents marked within the next RTI_DIRTY_WINDOW seconds
+        """
+        LOGGER.debug("Marking items dirty in Solr queue; Class: %s, Using: %s", index_cls, using)
+        now = time.monotonic()
+        with self._dirty_lock:
+            idle = not self._dirty
+            marked = self._dirty.setdefault((index_cls, using), {})
+            for instance in instances:
+                marked.setdefault(instance.id, now)
+        if idle:
+            # wake the indexing thread to shorten its wait to the dirty window
+            self._trigger.set()
+
+    def _flush_dirty(self, force=False):
+        """Queue the dirty documents which have been held for the dirty window."""
+        expired = time.monotonic() - DIRTY_WINDOW
+        ready = []
+        with self._dirty_lock:
+            for (index_cls, using), marked in self._dirty.items():
+                ids = [obj_id for obj_id, marked_at in marked.items() if force or marked_at <= expired]
+                for obj_id in ids:
+                    del marked[obj_id]
+                if ids:
+                    ready.append((index_cls, using, ids))
+            self._dirty = {key: marked for key, marked in self._dirty.items() if marked}
+        for index_cls, using, ids in ready:
+            LOGGER.debug("Queueing %d dirty items; Class: %s", len(ids), index_cls)
+            self._enqueue_dirty(index_cls, using, ids)
+
+    def _enqueue_dirty(self, index_cls, using, ids):
+        self._queue.put((index_cls, using, ids, 0))
+
+    def _wait_time(self):
+        if self._dirty:
+            return min(WAIT_TIME, DIRTY_WINDOW)
+        return WAIT_TIME
 
     def setup(self, app=None):
         LOGGER.info("Setting up Solr queue ...")
@@ -99,6 +250,10 @@ class SolrQueue:
 
     def start(self):
         LOGGER.info("Starting Solr queue ...")
+        if INDEX_WORKERS > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=INDEX_WORKERS, thread_name_prefix="solr-index"
+            )
         self._thread = threading.Thread(target=self._run)
         self._thread.start()
 
@@ -110,6 +265,12 @@ class SolrQueue:
         self._trigger.set()
         if join:
             self._thread.join()
+        self._shutdown_executor(join)
+
+    def _shutdown_executor(self, wait=True):
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
 
     def trigger(self):
         LOGGER.info("Triggering Solr queue ...")
@@ -118,8 +279,10 @@ class SolrQueue:
     def _run(self):
         LOGGER.info("Running Solr queue ...")
         while True:
-            LOGGER.debug("Waiting [%d] ...", WAIT_TIME)
-            self._trigger.wait(WAIT_TIME)
+            LOGGER.debug("Waiting [%d] ...", self._wait_time())
+            # woken early as items are queued, so idle updates are flushed quickly
+            self._trigger.wait(self._wait_time())
+            self._trigger.clear()
             self._drain()
             if self._stop.is_set():
                 LOGGER.info("Finished running Solr queue ...")
@@ -138,8 +301,10 @@ class SolrQueue:
         global RAISE_ERRORS
         global ABORT_ON_ERRORS
         last_ids = {}
+        flushes = []
         try:
             self.is_active = True
+            self._flush_dirty(force=self._stop.is_set())
             while True:
                 try:
                     index_cls, using, ids, delete = self._queue.get_nowait()
@@ -161,28 +326,19 @@ class SolrQueue:
                         }
                     last_ids[index_cls_type]["ids"].update(ids)
                 for attr, val in last_ids.items():
-                    if (not index_cls) or MAX_SOLR_BATCH <= len(val["ids"]):
+                    if val["ids"] and ((not index_cls) or self._policy.size <= len(val["ids"])):
                         LOGGER.debug("Processing %s items for [%s]", len(val["ids"]), attr)
-                        try:
-                            if val["delete"] == 1:
-                                self.remove(val["index_cls"], val["using"], val["ids"])
-                            else:
-                                self.update(val["index_cls"], val["using"], val["ids"])
-                            last_ids[attr]["ids"] = set()
-                        except:
-                            LOGGER.exception("An unexpected exception was encountered while processing items from the Solr queue.", exc_info=True)
-                            LOGGER.info("Requeueing items for later processing ...")
-                            try:
-                                self._queue.put( (val["index_cls"], val["using"], val["ids"], val["delete"]) )
-                            except Full:
-                                LOGGER.error("Can't requeue items to the Solr queue because it is full; %s", val["ids"])
-                                raise
-                            raise
+                        flushes.append(
+                            self._submit(val["index_cls"], val["using"], val["ids"], val["delete"])
+                        )
+                        last_ids[attr]["ids"] = set()
 
                 if not index_cls:
                     LOGGER.debug("Done indexing items from Solr queue ...")
                     break
 
+            self._wait_for_flushes(flushes, requeue=True)
+
         except Exception as e:
             LOGGER.error("Error processing real-time index queue: %s", str(e))
             if ABORT_ON_ERRORS:
@@ -195,6 +351,54 @@ class SolrQueue:
         finally:
             self.is_active = False
 
+    def _submit(self, index_cls, using, ids, delete):
+        """
+        Send a batch to Solr on the indexing worker pool, or right away
+        when there is no pool
+        """
+        args = (index_cls, using, ids, delete)
+        if self._executor:
+            return args, self._executor.submit(self._flush, *args)
+        future = Future()
+        try:
+            future.set_result(self._flush(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return args, future
+
+    def _flush(self, index_cls, using, ids, delete):
+        start_time = time.perf_counter()
+        try:
+            if delete == 1:
+                self.remove(index_cls, using, ids)
+            else:
+                self.update(index_cls, using, ids)
+        finally:
+            if self._executor:
+                connection.close_if_unusable_or_obsolete()
+        size = self._policy.record(time.perf_counter() - start_time, self.qsize())
+        LOGGER.debug("Solr batch size is now %d", size)
+
+    def _wait_for_flushes(self, flushes, requeue=False):
+        """
+        Wait for submitted batches, raising the first error once all are done
+        """
+        error = None
+        for (index_cls, using, ids, delete), future in flushes:
+            try:
+                future.result()
+            except Exception as e:
+                LOGGER.exception("An unexpected exception was encountered while processing items from the Solr queue.", exc_info=True)
+                if requeue:
+                    LOGGER.info("Requeueing items for later processing ...")
+                    try:
+                        self._queue.put((index_cls, using, ids, delete))
+                    except Full:
+                        LOGGER.error("Can't requeue items to the Solr queue because it is full; %s", ids)
+                error = error or e
+        if error:
+            raise error
+
     def update(self, index_cls, using, ids):
         LOGGER.debug("Updating the indexes for Solr queue items ...")
         index = index_cls()
@@ -205,6 +409,7 @@ class SolrQueue:
             # Turn off silently_fail; throw an exception if there is an error so we can requeue the items being indexed.
             backend.silently_fail = False
             backend.update(index, rows)
+            bump_index_generation()
             # LOGGER.debug("Index update complete.")
         else:
             LOGGER.error("Failed to get backend.  Unable to update the index for %d row(s) from the Solr queue: %s", len(ids), ids)
@@ -220,6 +425,255 @@ class SolrQueue:
             backend.silently_fail = False
             # backend.remove has no support for a list of IDs
             backend.conn.delete(id=ids)
+            bump_index_generation()
         else:
             LOGGER.error("Failed to get backend.  Unable to remove the indexes for %d row(s) from the solr queue: %s", len(ids), ids)
             raise Exception("Failed to get backend.  Unable to remove the index for Solr queue")
+
+
+class DurableSolrQueue(SolrQueue):
+    """
+    Solr queue recording pending index work in the solr_queue_item table.
+
+    Items, including the dirty marks, are recorded in the transaction updating
+    them and claimed by the indexer until Solr has accepted them, so failed
+    batches stay queued and items left over by a restart are indexed when the
+    queue starts. Dirty marks are held back for RTI_DIRTY_WINDOW and coalesced
+    with the other items of the same documents sent in the same batch. The
+    items of a failed batch are sent again one at a time, and the failing
+    items are retried with a growing backoff until they are dead-lettered
+    after RTI_MAX_ATTEMPTS attempts. Writers are held back, once their
+    transaction is committed, while the queue is deeper than
+    RTI_BACKPRESSURE_DEPTH.
+    """
+
+    transactional = True
+
+    def __init__(self):
+        super(DurableSolrQueue, self).__init__()
+        self._depth = 0
+        self._capacity = threading.Condition()
+        self._index_classes = {}
+
+    def isactive(self):
+        # queued items and dirty marks are kept for the next start, no need to wait for them
+        return self.is_active
+
+    def qsize(self):
+        return self._depth
+
+    def add(self, index_cls, using, instances):
+        LOGGER.debug("Adding items to durable Solr queue for indexing; Class: %s, Using: %s", index_cls, using)
+        self._put(index_cls, using, [str(instance.id) for instance in instances], False)
+
+    def delete(self, index_cls, using, instances):
+        LOGGER.debug("Deleting items from durable Solr queue/index; Class: %s, Using: %s", index_cls, using)
+        self._put(index_cls, using, [get_identifier(instance) for instance in instances], True)
+
+    def mark_dirty(self, index_cls, using, instances):
+        LOGGER.debug("Marking items dirty in durable Solr queue; Class: %s, Using: %s", index_cls, using)
+        self._put(
+            index_cls,
+            using,
+            [str(instance.id) for instance in instances],
+            False,
+            next_attempt=timezone.now() + timedelta(seconds=DIRTY_WINDOW),
+        )
+
+    def _put(self, index_cls, using, ids, remove, wait=True, next_attempt=None):
+        cls_path = "{}.{}".format(index_cls.__module__, index_cls.__name__)
+        SolrQueueItem.objects.bulk_create(
+            [
+                SolrQueueItem(
+                    index_cls=cls_path,
+                    using=using,
+                    remove=remove,
+                    object_id=obj_id,
+                    next_attempt=next_attempt,
+                )
+                for obj_id in ids
+            ]
+        )
+        # the indexer is woken, and writers held back, once the items are committed
+        transaction.on_commit(partial(self._queued, len(ids), wait))
+
+    def _queued(self, count, wait=True):
+        with self._capacity:
+            self._depth += count
+        self._trigger.set()
+        if wait:
+            self._wait_for_capacity()
+
+    def _wait_time(self):
+        # dirty marks are held in the table, poll for them while items are queued
+        if self._depth:
+            return min(WAIT_TIME, DIRTY_WINDOW)
+        return WAIT_TIME
+
+    def _wait_for_capacity(self):
+        if not BACKPRESSURE_DEPTH or self._depth <= BACKPRESSURE_DEPTH:
+            return
+        LOGGER.warning("Durable Solr queue has %d items, waiting for the indexer ...", self._depth)
+        self._trigger.set()
+        deadline = time.monotonic() + BACKPRESSURE_TIMEOUT
+        with self._capacity:
+            while self._depth > BACKPRESSURE_DEPTH and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    LOGGER.error("Timed out waiting for the durable Solr queue, %d items queued", self._depth)
+                    break
+                self._capacity.wait(remaining)
+
+    def stop(self, join=True):
+        LOGGER.info("Stopping durable Solr queue, about %s items remain queued ...", self._depth)
+        self._stop.set()
+        self._trigger.set()
+        with self._capacity:
+            self._capacity.notify_all()
+        if join and self._thread:
+            self._thread.join()
+        self._shutdown_executor(join)
+
+    def _run(self):
+        LOGGER.info("Running durable Solr queue ...")
+        try:
+            while True:
+                # the first pass indexes any items queued before a restart
+                self._drain()
+                if self._stop.is_set():
+                    LOGGER.info("Finished running durable Solr queue ...")
+                    return
+                LOGGER.debug("Waiting [%d] ...", self._wait_time())
+                self._trigger.wait(self._wait_time())
+                self._trigger.clear()
+        finally:
+            connection.close()
+
+    def _drain(self):
+        LOGGER.debug("Indexing durable Solr queue items ...")
+        try:
+            self.is_active = True
+            while self._drain_batch() >= MAX_IN_FLIGHT and not self._stop.is_set():
+                pass
+        except Exception as e:
+            # the failed batch stays queued and is retried on the next pass
+            LOGGER.exception("Error processing durable real-time index queue: %s", str(e))
+            if RAISE_ERRORS:
+                raise
+        finally:
+            self.is_active = False
+            try:
+                depth = SolrQueueItem.objects.filter(dead=False).count()
+            except Exception:
+                LOGGER.exception("Error counting durable Solr queue items")
+                depth = None
+            with self._capacity:
+                if depth is not None:
+                    self._depth = depth
+                self._capacity.notify_all()
+
+    def _drain_batch(self):
+        """
+        Claim one bounded batch of due queued items, send it to Solr and remove
+        the items Solr accepted from the queue
+
+        Returns: the number of items processed, or 0 when Solr accepted none of them
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            items = list(
+                SolrQueueItem.objects.select_for_update(skip_locked=True)
+                .filter(Q(next_attempt__isnull=True) | Q(next_attempt__lte=now), dead=False)
+                .order_by("id")[:MAX_IN_FLIGHT]
+            )
+            if items:
+                # claimed rather than locked while the batch is sent to Solr
+                SolrQueueItem.objects.filter(id__in=[item.id for item in items]).update(
+                    next_attempt=now + timedelta(seconds=CLAIM_TIMEOUT)
+                )
+        if not items:
+            return 0
+        batches = {}
+        for item in items:
+            batches.setdefault((item.remove, item.index_cls, item.using), {}).setdefault(
+                item.object_id, []
+            ).append(item)
+        accepted = False
+        unavailable = False
+        failed = []
+        # updates before removals, so that removed rows are not indexed again
+        for remove in (False, True):
+            flushes = []
+            for (is_remove, cls_path, using), queued in batches.items():
+                if is_remove != remove:
+                    continue
+                try:
+                    index_cls = self._index_class(cls_path)
+                except Exception as e:
+                    failed.extend((queued[obj_id], e, True) for obj_id in queued)
+                    continue
+                ids = sorted(queued)
+                size = self._policy.size
+                for start in range(0, len(ids), size):
+                    flushes.append(
+                        (queued, self._submit(index_cls, using, ids[start : start + size], 1 if remove else 0))
+                    )
+            retries = []
+            for queued, ((index_cls, using, ids, delete), future) in flushes:
+                try:
+                    future.result()
+                    accepted = True
+                except Exception as e:
+                    LOGGER.warning("Error sending %d durable Solr queue items: %s", len(ids), str(e))
+                    retries.extend((queued, index_cls, using, obj_id, delete, e, len(ids) == 1) for obj_id in ids)
+            # send the items of the failed batches one at a time, to find the failing ones
+            for queued, index_cls, using, obj_id, delete, error, alone in retries:
+                tried = alone or not unavailable
+                if not alone and not unavailable:
+                    try:
+                        self._submit(index_cls, using, [obj_id], delete)[1].result()
+                        accepted = True
+                        continue
+                    except Exception as e:
+                        error = e
+                        # Solr is not accepting anything, the other items are left for the next attempt
+                        unavailable = not accepted
+                failed.append((queued[obj_id], error, tried))
+        with transaction.atomic():
+            failed_ids = set()
+            now = timezone.now()
+            for queued, error, tried in failed:
+                for item in queued:
+                    failed_ids.add(item.id)
+                    self._failed(item, error, now, tried, accepted)
+            done = [item.id for item in items if item.id not in failed_ids]
+            if done:
+                SolrQueueItem.objects.filter(id__in=done).delete()
+        return len(items) if accepted or not failed else 0
+
+    def _failed(self, item, error, now, tried, accepted):
+        """
+        Record a failed attempt to send an item and when to send it again, or
+        dead-letter it once it has failed too often while Solr accepts other items
+        """
+        if tried:
+            item.attempts += 1
+        item.last_error = str(error)
+        if tried and accepted and item.attempts >= MAX_ATTEMPTS:
+            LOGGER.error(
+                "Dead-lettering durable Solr queue item %s for %s after %d attempts: %s",
+                item.object_id,
+                item.index_cls,
+                item.attempts,
+                item.last_error,
+            )
+            item.dead = True
+        else:
+            backoff = min(RETRY_BACKOFF * 2 ** max(item.attempts - 1, 0), RETRY_BACKOFF_LIMIT)
+            item.next_attempt = now + timedelta(seconds=backoff)
+        item.save(update_fields=("attempts", "last_error", "next_attempt", "dead", "update_timestamp"))
+
+    def _index_class(self, cls_path):
+        if cls_path not in self._index_classes:
+            self._index_classes[cls_path] = import_string(cls_path)
+        return self._index_classes[cls_path]
@@ -0,0 +1,267 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+import django
+import pysolr
+from django.apps import apps
+from django.db.models import Max, Min
+from haystack import connections
+from haystack.exceptions import SkipDocument
+
+from api.v2.search.cache import bump_index_generation
+from vcr_server.utils.http import DEFAULT_TIMEOUT, get_session
+
+LOGGER = logging.getLogger(__name__)
+
+
+# number of row ids read by a producer for a single batch of documents
+SOLR_REBUILD_CHUNK_SIZE = int(os.getenv("SOLR_REBUILD_CHUNK_SIZE", "1000"))
+
+# number of processes preparing documents
+SOLR_REBUILD_PRODUCERS = int(os.getenv("SOLR_REBUILD_PRODUCERS", "2"))
+
+# number of threads posting prepared documents to Solr
+SOLR_REBUILD_POSTERS = int(os.getenv("SOLR_REBUILD_POSTERS", "4"))
+
+# number of times a failed batch is posted again, waiting 2^n seconds in between,
+# as update_index --max-retries
+SOLR_REBUILD_MAX_RETRIES = int(os.getenv("SOLR_REBUILD_MAX_RETRIES", "5"))
+
+
+def core_url(url, core):
+    """
+    Return the url of another core of the Solr server of a core url
+    """
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/").rsplit("/", 1)[0]
+    return urlunsplit(parts._replace(path="{}/{}".format(path, core)))
+
+
+def id_ranges(min_id, max_id, chunk_size):
+    """
+    Split the ids from min_id to max_id into ranges (start, end] of chunk_size ids
+    """
+    if min_id is None:
+        return []
+    return [
+        (start, min(start + chunk_size, max_id))
+        for start in range(min_id - 1, max_id, chunk_size)
+    ]
+
+
+def prepare_documents(task):
+    """
+    Load a range of rows with the set-based index queryset and prepare their
+    Solr documents; run by the producer processes
+    """
+    using, model_label, start, end = task
+    index = connections[using].get_unified_index().get_index(
+        apps.get_model(model_label)
+    )
+    docs = []
+    for obj in index.index_queryset(using=using).filter(id__gt=start, id__lte=end):
+        try:
+            docs.append(index.full_prepare(obj))
+        except SkipDocument:
+            LOGGER.debug("Indexing for object `%s` skipped", obj)
+    return model_label, docs
+
+
+def _init_producer():
+    # producers are spawned rather than forked from a possibly threaded process
+    django.setup()
+
+
+class SolrRebuild:
+    """
+    Rebuild the search index with a pool of producer processes preparing the
+    documents of id ranges and a pool of threads posting them to Solr
+
+    Documents are posted to the live core, or to a `target_core` which is
+    cleared first and can then be swapped with the live core.
+    """
+
+    def __init__(
+        self,
+        using="default",
+        url=None,
+        chunk_size=SOLR_REBUILD_CHUNK_SIZE,
+        producers=SOLR_REBUILD_PRODUCERS,
+        posters=SOLR_REBUILD_POSTERS,
+        max_retries=SOLR_REBUILD_MAX_RETRIES,
+        target_core=None,
+        stdout=None,
+    ):
+        self.using = using
+        self.chunk_size = chunk_size
+        self.producers = max(1, producers)
+        self.posters = max(1, posters)
+        self.max_retries = max(0, max_retries)
+        self.live_url = url or connections[using].options["URL"]
+        self.target_core = target_core
+        self.target_url = (
+            core_url(self.live_url, target_core) if target_core else self.live_url
+        )
+        self.timeout = connections[using].options.get("TIMEOUT", 10)
+        self.stdout = stdout
+        self._local = threading.local()
+        self._posted = {}
+        self._posted_lock = threading.Lock()
+        # bounds the prepared batches waiting for a poster
+        self._pending = threading.BoundedSemaphore(self.posters * 2)
+
+    def log(self, message):
+        LOGGER.info(message)
+        if self.stdout:
+            self.stdout.write(message)
+
+    def solr(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = pysolr.Solr(
+                self.target_url, timeout=self.timeout
+            )
+        return conn
+
+    def indexes(self, models=None):
+        unified_index = connections[self.using].get_unified_index()
+        return [
+            unified_index.get_index(model)
+            for model in unified_index.get_indexed_models()
+            if not models or model._meta.label in models
+        ]
+
+    def tasks(self, indexes):
+        for index in indexes:
+            model = index.get_model()
+            bounds = model.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+            for start, end in id_ranges(
+                bounds["min_id"], bounds["max_id"], self.chunk_size
+            ):
+                yield (self.using, model._meta.label, start, end)
+
+    def post(self, model_label, docs, boost):
+        try:
+            retries = 0
+            while True:
+                try:
+                    self.solr().add(docs, commit=False, boost=boost)
+                    break
+                except pysolr.SolrError as e:
+                    if retries >= self.max_retries:
+                        raise
+                    retries += 1
+                    LOGGER.error(
+                        "Failed posting %s %s documents (retry %s/%s): %s",
+                        len(docs),
+                        model_label,
+                        retries,
+                        self.max_retries,
+                        e,
+                    )
+                    time.sleep(2 ** retries)
+            with self._posted_lock:
+                self._posted[model_label] = self._posted.get(model_label, 0) + len(docs)
+        finally:
+            self._pending.release()
+
+    def run(self, models=None):
+        """
+        Index all rows of the indexed models, or of the given model labels
+        """
+        indexes = self.indexes(models)
+        boosts = {
+            index.get_model()._meta.label: index.get_field_weights()
+            for index in indexes
+        }
+        if self.target_core:
+            self.log("Clearing the {} core".format(self.target_core))
+            self.solr().delete(q="*:*", commit=False)
+
+        start_time = time.perf_counter()
+        futures = []
+        with ThreadPoolExecutor(
+            max_workers=self.posters, thread_name_prefix="solr-rebuild"
+        ) as executor:
+            for model_label, docs in self.produce(indexes):
+                if not docs:
+                    continue
+                self._pending.acquire()
+                futures.append(
+                    executor.submit(self.post, model_label, docs, boosts[model_label])
+                )
+                for future in [future for future in futures if future.done()]:
+                    # raise any error of a post
+                    future.result()
+                    futures.remove(future)
+        for future in futures:
+            future.result()
+        self.solr().commit()
+        elapsed = time.perf_counter() - start_time
+
+        total = sum(self._posted.values())
+        for model_label, count in sorted(self._posted.items()):
+            self.log("{}: {} documents".format(model_label, count))
+        self.log(
+            "Indexed {} documents in {:.1f}s ({:.0f} documents/s)".format(
+                total, elapsed, total / elapsed if elapsed else 0
+            )
+        )
+        if not self.target_core:
+            bump_index_generation()
+        return total
+
+    def produce(self, indexes):
+        tasks = list(self.tasks(indexes))
+        if self.producers == 1:
+            for task in tasks:
+                yield prepare_documents(task)
+            return
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(self.producers, initializer=_init_producer) as pool:
+            for result in pool.imap_unordered(prepare_documents, tasks):
+                yield result
+
+    def swap(self):
+        """
+        Swap the rebuilt target core with the live core
+        """
+        live_core = urlsplit(self.live_url).path.rstrip("/").rsplit("/", 1)[1]
+        admin_url = core_url(self.live_url, "admin/cores")
+        response = get_session(admin_url).get(
+            admin_url,
+            params={
+                "action": "SWAP",
+                "core": live_core,
+                "other": self.target_core,
+                "wt": "json",
+            },
+            timeout=DEFAULT_TIMEOUT,
+        )
+        response.raise_for_status()
+        bump_index_generation()
+        self.log("Swapped the {} and {} cores".format(live_core, self.target_core))
+
+    def create_alias(self, alias):
+        """
+        Point a SolrCloud collection alias at the rebuilt target collection
+        """
+        admin_url = core_url(self.live_url, "admin/collections")
+        response = get_session(admin_url).get(
+            admin_url,
+            params={
+                "action": "CREATEALIAS",
+                "name": alias,
+                "collections": self.target_core,
+                "wt": "json",
+            },
+            timeout=DEFAULT_TIMEOUT,
+        )
+        response.raise_for_status()
+        bump_index_generation()
+        self.log("Pointed the {} alias at {}".format(alias, self.target_core))
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+from django.test import TestCase
+
+from .. import exportstream
+
+
+class ExportStream_TestCase(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def consume(self, lines, stop_after=None):
+        async def run():
+            queue = asyncio.Queue(1)
+            stopped = threading.Event()
+            producer = self.loop.run_in_executor(
+                None, exportstream.produce, self.loop, queue, stopped, lines, 10
+            )
+            chunks = []
+            while stop_after is None or len(chunks) < stop_after:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+            stopped.set()
+            await producer
+            return chunks
+
+        return self.loop.run_until_complete(run())
+
+    def test_produce(self):
+        lines = ["{}\n".format("x" * idx) for idx in range(8)]
+        chunks = self.consume(iter(lines))
+        assert b"".join(chunks).decode("utf-8") == "".join(lines)
+        assert len(chunks) > 1
+        assert all(len(chunk) >= 10 for chunk in chunks[:-1])
+
+    def test_produce_stopped(self):
+        read = []
+
+        def lines():
+            for idx in range(1000):
+                read.append(idx)
+                yield "{:020d}\n".format(idx)
+
+        # the export stops once the client has gone
+        assert len(self.consume(lines(), stop_after=1)) == 1
+        assert len(read) < 1000
+
+    def test_produce_error(self):
+        def lines():
+            yield "first line\n"
+            raise ValueError("export failed")
+
+        async def run():
+            queue = asyncio.Queue(4)
+            await self.loop.run_in_executor(
+                None, exportstream.produce, self.loop, queue, threading.Event(), lines(), 1
+            )
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        first, error = self.loop.run_until_complete(run())
+        assert first == b"first line\n"
+        assert isinstance(error, ValueError)
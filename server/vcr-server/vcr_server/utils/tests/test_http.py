@@ -0,0 +1,29 @@
+import threading
+
+from django.test import TestCase
+
+from ..http import close_sessions, get_session
+
+
+class Sessions_TestCase(TestCase):
+    def tearDown(self):
+        close_sessions()
+
+    def test_get_session(self):
+        session = get_session("http://agent:8024/connections")
+        # sessions are shared by urls on the same host
+        assert get_session("http://agent:8024/credentials") is session
+        assert get_session("https://agent:8024/credentials") is not session
+        assert get_session("http://other/hook") is not session
+
+        # other threads use their own sessions
+        sessions = []
+        thread = threading.Thread(
+            target=lambda: sessions.append(get_session("http://agent:8024/"))
+        )
+        thread.start()
+        thread.join()
+        assert sessions[0] is not session
+
+        close_sessions()
+        assert get_session("http://agent:8024/connections") is not session
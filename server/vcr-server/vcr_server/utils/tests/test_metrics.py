@@ -0,0 +1,72 @@
+import json
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from ..metrics import MetricsRegistry, TraceExporter
+
+
+class MetricsRegistry_TestCase(SimpleTestCase):
+    def test_stats(self):
+        registry = MetricsRegistry()
+
+        def record():
+            for idx in range(100):
+                registry.observe("agent_callback", (idx + 1) / 1000, idx % 10 != 0)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.increment("trace_events_dropped", 2)
+
+        stats = registry.stats()
+        timing = stats["agent_callback"]
+        assert timing["total_count"] == 400
+        assert timing["success_count"] == 360
+        assert timing["fail_count"] == 40
+        assert timing["min_time"] == 0.001
+        assert timing["max_time"] == 0.1
+        assert 0.025 < timing["p50_time"] <= 0.05
+        assert 0.05 < timing["p95_time"] <= timing["p99_time"] <= 0.1
+        assert stats["trace_events_dropped"] == 2
+
+        registry.reset()
+        assert registry.stats() == {}
+        registry.observe("agent_callback", 0.2)
+        assert registry.stats()["agent_callback"]["total_count"] == 1
+
+    def test_exposition(self):
+        registry = MetricsRegistry()
+        registry.observe('hook "a"', 0.003)
+        registry.observe('hook "a"', 100, False)
+        text = registry.exposition(
+            {"credential_queue_depth": [({"partition": 1}, 5)]}
+        )
+        assert "# TYPE vcr_method_duration_seconds histogram" in text
+        assert 'vcr_method_duration_seconds_bucket{method="hook \\"a\\"",le="0.005"} 1' in text
+        assert 'vcr_method_duration_seconds_bucket{method="hook \\"a\\"",le="+Inf"} 2' in text
+        assert 'vcr_method_duration_seconds_count{method="hook \\"a\\""} 2' in text
+        assert 'vcr_method_calls_total{method="hook \\"a\\"",outcome="fail"} 1' in text
+        assert 'vcr_credential_queue_depth{partition="1"} 5' in text
+
+
+class TraceExporter_TestCase(SimpleTestCase):
+    @patch("vcr_server.utils.metrics.get_session")
+    def test_batches(self, mock_session):
+        exporter = TraceExporter(
+            "http://fluentd:8088/acapy.events", batch_size=3, flush_interval=0.05
+        )
+        for idx in range(5):
+            exporter.submit({"outcome": idx})
+        exporter.close()
+
+        post = mock_session.return_value.post
+        batches = [json.loads(call[1]["data"]) for call in post.call_args_list]
+        assert [event["outcome"] for batch in batches for event in batch] == list(
+            range(5)
+        )
+        assert max(len(batch) for batch in batches) <= 3
+        assert post.call_args[0][0] == "http://fluentd:8088/acapy.events"
@@ -0,0 +1,249 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from api.v2.models.SolrQueueItem import SolrQueueItem
+from api.v2.search.index import TxnAwareSearchIndex
+from api.v2.search_indexes import CredentialIndex
+
+from ..solrqueue import AdaptiveBatchPolicy, DurableSolrQueue, SolrQueue
+
+
+class FakeIndex:
+    pass
+
+
+class OtherIndex:
+    pass
+
+
+def fail_on(obj_id):
+    def update(index_cls, using, ids):
+        if obj_id in ids:
+            raise Exception("invalid document")
+
+    return update
+
+
+class AdaptiveBatchPolicy_TestCase(TestCase):
+    def test_record(self):
+        policy = AdaptiveBatchPolicy(min_size=25, max_size=100, target_latency=1.0)
+        # grows while the queue is backed up and solr is fast
+        assert policy.record(0.1, 1000) == 50
+        assert policy.record(0.1, 1000) == 100
+        assert policy.record(0.1, 1000) == 100
+        # stays put when the queue is short
+        assert policy.record(0.1, 10) == 100
+        # shrinks when solr is slow
+        assert policy.record(5.0, 1000) == 50
+        assert policy.record(5.0, 1000) == 25
+        assert policy.record(5.0, 1000) == 25
+
+
+class SolrQueue_TestCase(TestCase):
+    def setUp(self):
+        self.queue = SolrQueue()
+        self.queue.update = MagicMock()
+        self.queue.remove = MagicMock()
+
+    def test_drain(self):
+        self.queue._executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            self.queue.add(FakeIndex, None, [MagicMock(id=1), MagicMock(id=2)])
+            self.queue.add(OtherIndex, None, [MagicMock(id=3)])
+            assert self.queue._trigger.is_set()
+            self.queue._drain()
+        finally:
+            self.queue._shutdown_executor()
+
+        self.queue.update.assert_any_call(FakeIndex, None, {1, 2})
+        self.queue.update.assert_any_call(OtherIndex, None, {3})
+        assert self.queue.qsize() == 0
+
+    def test_mark_dirty(self):
+        topic = MagicMock(id=1)
+        for _ in range(30):
+            self.queue.mark_dirty(FakeIndex, None, [topic])
+        self.queue.mark_dirty(FakeIndex, None, [MagicMock(id=2)])
+        assert self.queue.isactive()
+
+        # held until the dirty window has passed
+        self.queue._drain()
+        self.queue.update.assert_not_called()
+
+        with patch("vcr_server.utils.solrqueue.DIRTY_WINDOW", 0):
+            self.queue._drain()
+        self.queue.update.assert_called_once_with(FakeIndex, None, {1, 2})
+        assert not self.queue.isactive()
+
+    @patch("vcr_server.utils.solrqueue.ABORT_ON_ERRORS", False)
+    def test_failed_batch_requeued(self):
+        self.queue.update.side_effect = [Exception("solr unavailable"), None]
+        self.queue.add(FakeIndex, None, [MagicMock(id=1)])
+        self.queue.add(OtherIndex, None, [MagicMock(id=2)])
+
+        self.queue._drain()
+        assert self.queue.qsize() == 1
+
+
+class DurableSolrQueue_TestCase(TestCase):
+    def setUp(self):
+        self.queue = DurableSolrQueue()
+        self.queue.update = MagicMock()
+        self.queue.remove = MagicMock()
+        # the test transaction is never committed
+        on_commit = patch(
+            "vcr_server.utils.solrqueue.transaction.on_commit",
+            side_effect=lambda func: func(),
+        )
+        self.on_commit = on_commit.start()
+        self.addCleanup(on_commit.stop)
+
+    def test_queued_on_commit(self):
+        self.on_commit.side_effect = None
+        self.queue.add(FakeIndex, None, [MagicMock(id=1)])
+        # recorded in the transaction, the indexer is only woken once it commits
+        assert SolrQueueItem.objects.count() == 1
+        assert not self.queue._trigger.is_set()
+        assert self.queue.qsize() == 0
+
+        (queued,), _kwargs = self.on_commit.call_args
+        queued()
+        assert self.queue._trigger.is_set()
+        assert self.queue.qsize() == 1
+
+    def test_index_queued_in_transaction(self):
+        index = CredentialIndex()
+        self.addCleanup(index.reset)
+        with patch.object(TxnAwareSearchIndex, "_backend_queue", self.queue):
+            with transaction.atomic():
+                index.update_object(MagicMock(id=1))
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    index.update_object(MagicMock(id=2))
+                    raise ValueError()
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    index.mark_dirty(MagicMock(id=3))
+                    raise ValueError()
+            with transaction.atomic():
+                index.mark_dirty(MagicMock(id=4))
+        # rolled back along with the data
+        assert [
+            (item.object_id, item.next_attempt is not None)
+            for item in SolrQueueItem.objects.all()
+        ] == [("1", False), ("4", True)]
+        assert not index._pending()
+
+    def test_mark_dirty(self):
+        topic = MagicMock(id=1)
+        for _ in range(3):
+            self.queue.mark_dirty(FakeIndex, None, [topic])
+        # recorded in the table and held until the dirty window has passed
+        assert SolrQueueItem.objects.count() == 3
+        self.queue._drain()
+        self.queue.update.assert_not_called()
+
+        SolrQueueItem.objects.update(next_attempt=timezone.now())
+        self.queue.add(FakeIndex, None, [topic])
+        self.queue._drain()
+        self.queue.update.assert_called_once_with(FakeIndex, None, ["1"])
+        assert SolrQueueItem.objects.count() == 0
+
+    def test_claimed_while_sent(self):
+        def update(index_cls, using, ids):
+            # the rows are not sent by another indexer in the meantime
+            (item,) = SolrQueueItem.objects.all()
+            assert item.next_attempt > timezone.now()
+
+        self.queue.update.side_effect = update
+        self.queue.add(FakeIndex, None, [MagicMock(id=1)])
+        self.queue._drain()
+        self.queue.update.assert_called_once_with(FakeIndex, None, ["1"])
+        assert SolrQueueItem.objects.count() == 0
+
+    def test_add_and_drain(self):
+        self.queue.add(FakeIndex, None, [MagicMock(id=1), MagicMock(id=2)])
+        self.queue.add(FakeIndex, None, [MagicMock(id=1)])
+        with patch("vcr_server.utils.solrqueue.get_identifier", return_value="obj.3"):
+            self.queue.delete(FakeIndex, None, [MagicMock(id=3)])
+        assert SolrQueueItem.objects.count() == 4
+        assert self.queue.qsize() == 4
+
+        self.queue._drain()
+
+        self.queue.update.assert_called_once_with(FakeIndex, None, ["1", "2"])
+        self.queue.remove.assert_called_once_with(FakeIndex, None, ["obj.3"])
+        assert SolrQueueItem.objects.count() == 0
+        assert self.queue.qsize() == 0
+
+    @patch("vcr_server.utils.solrqueue.RETRY_BACKOFF", 0)
+    def test_failed_batch_stays_queued(self):
+        self.queue.update.side_effect = Exception("solr unavailable")
+        self.queue.add(FakeIndex, None, [MagicMock(id=1)])
+
+        self.queue._drain()
+        assert SolrQueueItem.objects.count() == 1
+
+        self.queue.update.side_effect = None
+        self.queue._drain()
+        assert SolrQueueItem.objects.count() == 0
+
+    def test_failing_item_retried_alone(self):
+        self.queue.update.side_effect = fail_on("2")
+        self.queue.add(FakeIndex, None, [MagicMock(id=1), MagicMock(id=2), MagicMock(id=3)])
+
+        self.queue._drain()
+        assert [call[0][2] for call in self.queue.update.call_args_list] == [
+            ["1", "2", "3"],
+            ["1"],
+            ["2"],
+            ["3"],
+        ]
+        (item,) = SolrQueueItem.objects.all()
+        assert (item.object_id, item.attempts, item.dead) == ("2", 1, False)
+        assert item.last_error == "invalid document"
+        assert item.next_attempt > timezone.now()
+
+        # the failed item is not sent again before its backoff has passed
+        self.queue.update.reset_mock()
+        self.queue._drain()
+        self.queue.update.assert_not_called()
+
+    @patch("vcr_server.utils.solrqueue.MAX_ATTEMPTS", 1)
+    def test_failing_item_dead_lettered(self):
+        self.queue.update.side_effect = fail_on("2")
+        self.queue.add(FakeIndex, None, [MagicMock(id=1), MagicMock(id=2)])
+
+        self.queue._drain()
+        (item,) = SolrQueueItem.objects.all()
+        assert (item.object_id, item.dead) == ("2", True)
+        # dead letters are not counted by the backpressure
+        assert self.queue.qsize() == 0
+
+    @patch("vcr_server.utils.solrqueue.MAX_ATTEMPTS", 1)
+    def test_solr_unavailable(self):
+        self.queue.update.side_effect = Exception("solr unavailable")
+        self.queue.add(FakeIndex, None, [MagicMock(id=1), MagicMock(id=2), MagicMock(id=3)])
+
+        self.queue._drain()
+        # a single item is sent on its own before the others are left for later
+        assert self.queue.update.call_count == 2
+        items = SolrQueueItem.objects.order_by("object_id")
+        assert [(item.attempts, item.dead) for item in items] == [
+            (1, False),
+            (0, False),
+            (0, False),
+        ]
+        assert all(item.next_attempt for item in items)
+
+    @patch("vcr_server.utils.solrqueue.BACKPRESSURE_TIMEOUT", 0)
+    @patch("vcr_server.utils.solrqueue.BACKPRESSURE_DEPTH", 1)
+    def test_backpressure(self):
+        self.queue.add(FakeIndex, None, [MagicMock(id=1), MagicMock(id=2)])
+        # no indexer is running, so the writer gives up after the timeout
+        assert self.queue._trigger.is_set()
+        assert SolrQueueItem.objects.count() == 2
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock, patch
+
+import pysolr
+
+from django.test import TestCase
+
+from api.v2.models.Topic import Topic
+
+from ..solrrebuild import SolrRebuild, core_url, id_ranges
+
+
+class SolrRebuild_TestCase(TestCase):
+    def test_id_ranges(self):
+        assert id_ranges(None, None, 10) == []
+        assert id_ranges(1, 25, 10) == [(0, 10), (10, 20), (20, 25)]
+        assert id_ranges(5, 5, 10) == [(4, 5)]
+
+    def test_core_url(self):
+        url = "http://solr:8983/solr/credential_registry"
+        assert core_url(url, "rebuild") == "http://solr:8983/solr/rebuild"
+        assert core_url(url + "/", "admin/cores") == "http://solr:8983/solr/admin/cores"
+
+    @patch("vcr_server.utils.solrrebuild.bump_index_generation")
+    @patch("vcr_server.utils.solrrebuild.pysolr.Solr")
+    def test_run(self, mock_solr, mock_bump):
+        topics = [
+            Topic.objects.create(source_id="BC000{}".format(idx), type="registration")
+            for idx in range(3)
+        ]
+        rebuild = SolrRebuild(
+            url="http://solr:8983/solr/live",
+            chunk_size=2,
+            producers=1,
+            posters=2,
+            target_core="rebuild",
+        )
+        assert rebuild.run(["api_v2.Topic"]) == 3
+
+        mock_solr.assert_called_with("http://solr:8983/solr/rebuild", timeout=10)
+        conn = mock_solr.return_value
+        conn.delete.assert_called_once_with(q="*:*", commit=False)
+        posted = [
+            doc["django_id"] for call in conn.add.call_args_list for doc in call[0][0]
+        ]
+        assert sorted(posted) == sorted(str(topic.id) for topic in topics)
+        conn.commit.assert_called_once_with()
+        # the live index only changes when the target core is swapped
+        mock_bump.assert_not_called()
+
+    @patch("vcr_server.utils.solrrebuild.time.sleep")
+    @patch("vcr_server.utils.solrrebuild.pysolr.Solr")
+    def test_post_retries(self, mock_solr, mock_sleep):
+        conn = mock_solr.return_value
+        conn.add.side_effect = [pysolr.SolrError("busy"), pysolr.SolrError("busy"), None]
+        rebuild = SolrRebuild(url="http://solr:8983/solr/live", max_retries=2)
+        rebuild._pending.acquire()
+        rebuild.post("api_v2.Topic", [{"id": "1"}], {})
+        assert conn.add.call_count == 3
+        assert [call[0][0] for call in mock_sleep.call_args_list] == [2, 4]
+        assert rebuild._posted == {"api_v2.Topic": 1}
+
+        # the error is raised once the retries are used up
+        conn.add.side_effect = pysolr.SolrError("down")
+        rebuild._pending.acquire()
+        with self.assertRaises(pysolr.SolrError):
+            rebuild.post("api_v2.Topic", [{"id": "2"}], {})
+        assert conn.add.call_count == 6
+        assert rebuild._posted == {"api_v2.Topic": 1}
+        # the batch slot is released either way
+        assert rebuild._pending.acquire(blocking=False)
+
+    @patch("vcr_server.utils.solrrebuild.bump_index_generation")
+    @patch("vcr_server.utils.solrrebuild.get_session")
+    def test_swap(self, mock_session, mock_bump):
+        rebuild = SolrRebuild(
+            url="http://solr:8983/solr/live", target_core="rebuild"
+        )
+        rebuild.swap()
+        mock_session.return_value.get.assert_called_once()
+        args, kwargs = mock_session.return_value.get.call_args
+        assert args[0] == "http://solr:8983/solr/admin/cores"
+        assert kwargs["params"]["action"] == "SWAP"
+        assert (kwargs["params"]["core"], kwargs["params"]["other"]) == ("live", "rebuild")
+        mock_bump.assert_called_once_with()
@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from agent_webhooks.utils.credential import CredentialManager
+from api.v2.models.CredentialType import CredentialType
+from api.v2.models.Issuer import Issuer
+from api.v2.models.Schema import Schema
+
+from .. import warmup
+
+
+class Warmup_TestCase(TestCase):
+    def test_warmup(self):
+        with patch.object(warmup, "warm_schemas", return_value=0):
+            with patch.object(
+                warmup, "WARMUP_STEPS", warmup.WARMUP_STEPS[:1] + (
+                    ("api schemas", warmup.warm_schemas),
+                    ("failing", lambda: 1 / 0),
+                )
+            ):
+                timings = warmup.warmup()
+        assert list(timings) == ["url patterns", "api schemas", "failing"]
+        assert warmup.warm_urls() > 0
+
+    @override_settings(APPLICATION_URL="https://vcr.example.com")
+    def test_schema_request(self):
+        request = warmup.schema_request(RequestFactory(), "/api/v3/")
+        assert (
+            request.build_absolute_uri()
+            == "https://vcr.example.com/api/v3/?format=openapi"
+        )
+
+    def test_preload_credential_types(self):
+        schema = Schema.objects.create(
+            name="registration", version="1.0.0", origin_did="not:a:did:123"
+        )
+        issuer = Issuer.objects.create(
+            did="not:a:did:123",
+            name="Test Issuer",
+            abbreviation="TI",
+            email="test@issuer.io",
+            url="http://www.issuer.fake.io",
+        )
+        cred_type = CredentialType.objects.create(
+            schema=schema, issuer=issuer, credential_def_id="not:a:did:123:3:CL:1"
+        )
+        mgr = CredentialManager()
+        assert mgr.preload() == 1
+
+        class Cred:
+            credential_type_id = cred_type.id
+
+        with self.assertNumQueries(0):
+            assert mgr.get_credential_type(Cred()) == cred_type
+            mgr.get_processor_config(cred_type)
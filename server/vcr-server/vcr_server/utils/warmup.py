@@ -0,0 +1,114 @@
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import URLResolver, get_resolver, resolve
+
+LOGGER = logging.getLogger(__name__)
+
+
+# api docs whose openapi schema is generated once on startup
+SCHEMA_PATHS = ("/api/v2/", "/api/v3/", "/api/v4/", "/hooks/")
+
+
+def warm_urls(resolver=None):
+    """
+    Compile the patterns of all URL resolvers
+    """
+    if resolver is None:
+        resolver = get_resolver()
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        count += 1
+        if isinstance(pattern, URLResolver):
+            count += warm_urls(pattern)
+    resolver.reverse_dict
+    return count
+
+
+def schema_request(factory, path):
+    """
+    Build the openapi schema request of an api path as received on the public
+    application url, since the docs views cache their responses per url
+    """
+    public_url = urlsplit(settings.APPLICATION_URL)
+    return factory.get(
+        path,
+        {"format": "openapi"},
+        secure=public_url.scheme == "https",
+        HTTP_HOST=public_url.netloc,
+    )
+
+
+def warm_schemas():
+    """
+    Generate the openapi schemas, which imports and introspects every view,
+    serializer and filter of the APIs, and fills the schema response cache
+    of the public url
+    """
+    factory = RequestFactory()
+    count = 0
+    for path in SCHEMA_PATHS:
+        try:
+            match = resolve(path)
+        except Exception:
+            continue
+        response = match.func(
+            schema_request(factory, path), *match.args, **match.kwargs
+        )
+        if hasattr(response, "render"):
+            response.render()
+        count += 1
+    return count
+
+
+def warm_search_indexes():
+    from haystack import connections
+
+    return len(connections["default"].get_unified_index().get_indexed_models())
+
+
+def warm_credential_types():
+    from agent_webhooks.views import credential_manager
+
+    return credential_manager.preload()
+
+
+def warm_label_maps():
+    from api.v2.models.CredentialType import CredentialType
+    from api.v2.models.Issuer import Issuer
+    from api.v2.search.cache import facet_labels
+
+    return len(facet_labels(Issuer, "name")) + len(
+        facet_labels(CredentialType, "description")
+    )
+
+
+WARMUP_STEPS = (
+    ("url patterns", warm_urls),
+    ("api schemas", warm_schemas),
+    ("search indexes", warm_search_indexes),
+    ("credential types", warm_credential_types),
+    ("label maps", warm_label_maps),
+)
+
+
+def warmup():
+    """
+    Preload what the first requests would otherwise load lazily, and return the
+    duration of each step. A failing step is logged and does not stop startup.
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS:
+        start_time = time.perf_counter()
+        try:
+            count = step()
+        except Exception:
+            LOGGER.exception("Warmup of %s failed", name)
+            count = None
+        timings[name] = time.perf_counter() - start_time
+        LOGGER.info("Warmed up %s (%s) in %.3fs", name, count, timings[name])
+    return timings